@@ -44,6 +44,9 @@ fi
 echo "Running migrations"
 python manage.py migrate --noinput
 
+# No-op unless DJANGO_CACHE_BACKEND is the database cache
+python manage.py createcachetable
+
 echo "Collecting static files"
 python manage.py collectstatic --noinput
 
@@ -0,0 +1,170 @@
+"""
+Benchmark: one 50-row page of the agent transactions API (POS format).
+
+Builds the same response body three ways:
+
+- "objects" : the previous path, full Transaction rows with
+              company/denomination objects, build_absolute_uri per row,
+              DRF JSONRenderer;
+- "values"  : the `.values()` projection, receipt base URL computed once,
+              DRF JSONRenderer;
+- "lean"    : the same projection rendered by FastJSONRenderer (orjson
+              when installed), i.e. what AgentTransactionsAPIView does now.
+
+Reports the median latency per page and, from a separate tracemalloc pass,
+the peak memory allocated while building one page. Benchmark rows
+are deleted at the end.
+
+Run:
+    python scripts/bench_agent_transactions.py [iterations]
+"""
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+import uuid
+from decimal import Decimal
+from pathlib import Path
+
+# Ensure src/ is on PYTHONPATH (same as manage.py)
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+sys.path.insert(0, str(SRC))
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.dev")
+
+import django
+
+django.setup()
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import RequestFactory
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from apps.accounts.api.agent_transactions import AgentTransactionsAPIView
+from apps.core.api import renderers
+from apps.core.api.pagination import cursor_paginate
+from apps.sales.models import TelecomCompany, RechargeDenomination, Transaction, TransactionReceipt
+
+User = get_user_model()
+
+ITERATIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+PAGE_SIZE = 50
+
+settings.ALLOWED_HOSTS = list(settings.ALLOWED_HOSTS) + ["testserver"]
+request = RequestFactory().get("/api/accounts/agent/transactions/")
+
+
+def objects_page():
+    """The pre-projection serialization (full rows + build_absolute_uri per row)."""
+    qs = Transaction.objects.filter(agent=agent).select_related("company", "denomination").defer("code")
+    items = []
+    for t in cursor_paginate(qs, None, PAGE_SIZE):
+        items.append({
+            "transaction_id": t.id,
+            "company": {"id": t.company.id, "name": t.company.name_ar, "code": t.company.code},
+            "denomination": {"id": t.denomination.id, "value": t.denomination.value},
+            "status": t.status,
+            "price": float(t.price),
+            "created_at": t.created_at.isoformat(),
+            "confirmed_at": t.confirmed_at.isoformat() if t.confirmed_at else None,
+            "receipt_token": str(t.public_token) if t.status == "CONFIRMED" else None,
+            "receipt_url": (
+                request.build_absolute_uri(f"/receipt/{t.public_token}/") if t.status == "CONFIRMED" else None
+            ),
+            "can_print": t.status == "CONFIRMED",
+            "can_reprint": t.status == "CONFIRMED" and t.receipt_reissue_count < t.receipt_reissue_limit,
+            "reissue_count": t.receipt_reissue_count,
+            "reissue_limit": t.receipt_reissue_limit,
+            "reissue_remaining": t.receipt_reissue_limit - t.receipt_reissue_count,
+        })
+    return {"items": items}
+
+
+def values_page():
+    qs = Transaction.objects.filter(agent=agent).values(*AgentTransactionsAPIView.LIST_FIELDS)
+    receipt_base = request.build_absolute_uri("/receipt/")
+    items = []
+    for t in cursor_paginate(qs, None, PAGE_SIZE):
+        confirmed = t["status"] == "CONFIRMED"
+        token = str(t["public_token"]) if confirmed else None
+        items.append({
+            "transaction_id": t["id"],
+            "company": {"id": t["company_id"], "name": t["company__name_ar"], "code": t["company__code"]},
+            "denomination": {"id": t["denomination_id"], "value": t["denomination__value"]},
+            "status": t["status"],
+            "price": float(t["price"]),
+            "created_at": t["created_at"].isoformat(),
+            "confirmed_at": t["confirmed_at"].isoformat() if t["confirmed_at"] else None,
+            "receipt_token": token,
+            "receipt_url": f"{receipt_base}{token}/" if confirmed else None,
+            "can_print": confirmed,
+            "can_reprint": confirmed and t["receipt_reissue_count"] < t["receipt_reissue_limit"],
+            "reissue_count": t["receipt_reissue_count"],
+            "reissue_limit": t["receipt_reissue_limit"],
+            "reissue_remaining": t["receipt_reissue_limit"] - t["receipt_reissue_count"],
+        })
+    return {"items": items}
+
+
+VARIANTS = {
+    "objects": lambda: JSONRenderer().render(objects_page()),
+    "values": lambda: JSONRenderer().render(values_page()),
+    "lean": lambda: renderers.FastJSONRenderer().render(values_page()),
+}
+
+
+def timed():
+    """Median ms per variant; variants run interleaved so drift hits all alike."""
+    samples = {name: [] for name in VARIANTS}
+    for _ in range(ITERATIONS):
+        for name, fn in VARIANTS.items():
+            started = time.perf_counter()
+            fn()
+            samples[name].append((time.perf_counter() - started) * 1000)
+    return {name: statistics.median(values) for name, values in samples.items()}
+
+
+def peak_kib(fn):
+    """Peak memory (KiB) allocated during one call, after a warm-up call."""
+    fn()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024
+
+
+suffix = uuid.uuid4().hex[:6]
+agent = User.objects.create(username=f"bench_agent_{suffix}", role="AGENT", is_active=True)
+company = TelecomCompany.objects.create(code=f"BENCH{suffix}", name_ar="Bench")
+denom = RechargeDenomination.objects.create(
+    company=company, product_type="MOBILE", value=5, price_to_agent=Decimal("1")
+)
+payload = {"lines": [{"label": f"line {i}", "value": "x" * 40} for i in range(20)], "footer": "Bench"}
+now = timezone.now()
+transactions = Transaction.objects.bulk_create([
+    Transaction(
+        agent=agent, company=company, denomination=denom, price=Decimal("1"),
+        code=f"{company.code}-{i}", status="CONFIRMED", confirmed_at=now,
+        receipt_payload=payload,
+    )
+    for i in range(PAGE_SIZE * 2)
+])
+TransactionReceipt.objects.bulk_create([tx.receipt for tx in transactions])
+
+try:
+    encoder = "orjson" if renderers.orjson is not None else "stdlib (orjson not installed)"
+    print(f"{PAGE_SIZE}-row page, median of {ITERATIONS} on {connection.vendor}; lean encoder: {encoder}")
+    results = timed()
+    for name, ms in results.items():
+        print(f"{name:<8} {ms:.3f} ms  peak {peak_kib(VARIANTS[name]):.0f} KiB")
+finally:
+    Transaction.objects.filter(agent=agent).delete()
+    denom.delete()
+    company.delete()
+    agent.delete()
@@ -0,0 +1,140 @@
+"""
+Benchmark: request throughput of hot POS endpoints, DRF rendering vs bytes.
+
+Drives the full Django stack (middleware, auth, DRF view) with the test
+client for:
+
+- /api/app/sales/catalog/          (catalog list, Decimal prices)
+- /api/accounts/agent/transactions/ (50-row page)
+- /api/sales/agent/transactions/    (50-row page)
+- /api/accounts/agent/balance/
+
+in two modes:
+
+- "before" : api_response -> DRF Response -> JSONRenderer (stdlib json),
+             i.e. the views' previous behaviour;
+- "after"  : api_json_response -> final bytes (orjson when installed).
+
+and prints requests/second (median of rounds). Benchmark rows are deleted
+at the end.
+
+Run:
+    python scripts/bench_api_rendering.py [requests_per_round]
+"""
+import os
+import statistics
+import sys
+import time
+import uuid
+from decimal import Decimal
+from pathlib import Path
+
+# Ensure src/ is on PYTHONPATH (same as manage.py)
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+sys.path.insert(0, str(SRC))
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.dev")
+
+import django
+
+django.setup()
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.accounts.api import agent_transactions as accounts_transactions
+from apps.accounts.api import balance_views
+from apps.core.api import renderers
+from apps.core.api.utils import api_response
+from apps.sales.api import agent_transactions_views as sales_transactions
+from apps.sales.api.app import catalog_views as app_catalog
+from apps.sales.models import TelecomCompany, RechargeDenomination, Transaction
+
+User = get_user_model()
+
+REQUESTS = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+ROUNDS = 5
+
+ENDPOINTS = {
+    "catalog": ("/api/app/sales/catalog/", {}),
+    "accounts_tx": ("/api/accounts/agent/transactions/", {"page_size": 50}),
+    "sales_tx": ("/api/sales/agent/transactions/", {"per_page": 50}),
+    "balance": ("/api/accounts/agent/balance/", {}),
+}
+
+# Modules whose hot views now return api_json_response.
+PATCHED = (accounts_transactions, sales_transactions, balance_views, app_catalog)
+
+
+class before_mode:
+    """Route the hot views back through DRF Response + JSONRenderer.
+
+    Without orjson, FastJSONRenderer is DRF's JSONRenderer.
+    """
+
+    def __enter__(self):
+        self.saved = [(module, module.api_json_response) for module in PATCHED]
+        for module in PATCHED:
+            module.api_json_response = api_response
+        self.orjson, renderers.orjson = renderers.orjson, None
+
+    def __exit__(self, *exc):
+        renderers.orjson = self.orjson
+        for module, fn in self.saved:
+            module.api_json_response = fn
+
+
+def throughput(client, path, params):
+    rates = []
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        for _ in range(REQUESTS):
+            response = client.get(path, params)
+        rates.append(REQUESTS / (time.perf_counter() - started))
+        assert response.status_code == 200, (path, response.status_code)
+    return statistics.median(rates)
+
+
+settings.ALLOWED_HOSTS = list(settings.ALLOWED_HOSTS) + ["testserver"]
+
+suffix = uuid.uuid4().hex[:6]
+agent = User.objects.create(username=f"bench_agent_{suffix}", role="AGENT", is_active=True)
+companies = [TelecomCompany.objects.create(code=f"B{suffix}{i}", name_ar=f"شركة {i}") for i in range(5)]
+denoms = [
+    RechargeDenomination.objects.create(
+        company=company, product_type="MOBILE", value=value, price_to_agent=Decimal(value) * Decimal("0.97")
+    )
+    for company in companies
+    for value in (1, 2, 5, 10, 20, 25, 50, 100)
+]
+now = timezone.now()
+Transaction.objects.bulk_create([
+    Transaction(
+        agent=agent, company=denoms[i % len(denoms)].company, denomination=denoms[i % len(denoms)],
+        price=Decimal("4.85"), code=f"BENCH-{suffix}-{i}",
+        status="CONFIRMED" if i % 2 else "PRINTED", confirmed_at=now if i % 2 else None,
+    )
+    for i in range(200)
+])
+
+client = APIClient()
+client.force_authenticate(agent)
+
+try:
+    encoder = "orjson" if renderers.orjson is not None else "stdlib (orjson not installed)"
+    print(f"req/s, median of {ROUNDS} rounds x {REQUESTS} requests on {connection.vendor}; after: {encoder}")
+    print(f"{'endpoint':<12} {'before':>9} {'after':>9} {'speedup':>8}")
+    for name, (path, params) in ENDPOINTS.items():
+        with before_mode():
+            before = throughput(client, path, params)
+        after = throughput(client, path, params)
+        print(f"{name:<12} {before:>9.0f} {after:>9.0f} {after / before:>7.2f}x")
+finally:
+    Transaction.objects.filter(agent=agent).delete()
+    RechargeDenomination.objects.filter(company__in=companies).delete()
+    TelecomCompany.objects.filter(pk__in=[c.pk for c in companies]).delete()
+    agent.delete()
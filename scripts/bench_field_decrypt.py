@@ -0,0 +1,94 @@
+"""
+Benchmark: cost of the encrypted Transaction.code on a 50-item listing page.
+
+Loads the same page of 50 transactions (the AgentTransactionsAPIView query)
+three ways:
+
+- "code"     : every row loaded with `code`, i.e. 50 AES-GCM decryptions;
+- "deferred" : `.defer("code")` as the listing views do;
+- "decrypt"  : the decryptions alone (`decrypt_value` on 50 stored values).
+
+Benchmark rows are deleted at the end.
+
+Run:
+    python scripts/bench_field_decrypt.py [iterations]
+"""
+import os
+import statistics
+import sys
+import time
+import uuid
+from decimal import Decimal
+from pathlib import Path
+
+# Ensure src/ is on PYTHONPATH (same as manage.py)
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+sys.path.insert(0, str(SRC))
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.dev")
+
+import django
+
+django.setup()
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+
+from apps.core.fields import decrypt_value
+from apps.sales.models import TelecomCompany, RechargeDenomination, Transaction
+
+User = get_user_model()
+
+ITERATIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+PAGE_SIZE = 50
+
+
+def page(qs):
+    return list(qs.filter(agent=agent).select_related("company", "denomination").order_by("-created_at")[:PAGE_SIZE])
+
+
+def timed(**variants):
+    """Median ms per variant; variants run interleaved so drift hits all alike."""
+    samples = {name: [] for name in variants}
+    for _ in range(ITERATIONS):
+        for name, fn in variants.items():
+            started = time.perf_counter()
+            fn()
+            samples[name].append((time.perf_counter() - started) * 1000)
+    return {name: statistics.median(values) for name, values in samples.items()}
+
+
+suffix = uuid.uuid4().hex[:6]
+agent = User.objects.create(username=f"bench_agent_{suffix}", role="AGENT", is_active=True)
+company = TelecomCompany.objects.create(code=f"BENCH{suffix}", name_ar="Bench")
+denom = RechargeDenomination.objects.create(
+    company=company, product_type="MOBILE", value=5, price_to_agent=Decimal("1")
+)
+Transaction.objects.bulk_create([
+    Transaction(
+        agent=agent, company=company, denomination=denom, price=Decimal("1"),
+        code=f"{company.code}-{uuid.uuid4().hex[:12]}", status="PRINTED",
+    )
+    for _ in range(PAGE_SIZE)
+])
+stored = list(
+    Transaction.objects.filter(agent=agent)
+    .extra(select={"raw_code": "code"})
+    .values_list("raw_code", flat=True)
+)
+
+try:
+    print(f"{PAGE_SIZE}-item page, median of {ITERATIONS} on {connection.vendor}")
+    results = timed(
+        code=lambda: page(Transaction.objects.all()),
+        deferred=lambda: page(Transaction.objects.defer("code")),
+        decrypt=lambda: [decrypt_value(value) for value in stored],
+    )
+    for name, ms in results.items():
+        print(f"{name:<8} {ms:.3f} ms ({ms * 1000 / PAGE_SIZE:.1f} us/row)")
+finally:
+    Transaction.objects.filter(agent=agent).delete()
+    denom.delete()
+    company.delete()
+    agent.delete()
@@ -0,0 +1,90 @@
+"""
+Benchmark: loading an operator voucher file into RechargeCodeInventory.
+
+Writes a CSV of N codes (1% repeated), then runs
+`apps.sales.services.inventory_import.import_codes` over it twice:
+
+- first pass: every chunk is validated, looked up by code_hash and inserted;
+- second pass (same file again): every code is found by the lookup and
+  skipped, i.e. the cost of the duplicate check alone.
+
+Peak RSS is printed after each pass; it should not grow with N. Benchmark
+rows are deleted at the end.
+
+Run:
+    python scripts/bench_inventory_import.py [codes] [chunk_size]
+"""
+import os
+import resource
+import sys
+import tempfile
+import time
+import uuid
+from decimal import Decimal
+from pathlib import Path
+
+# Ensure src/ is on PYTHONPATH (same as manage.py)
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+sys.path.insert(0, str(SRC))
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.dev")
+
+import django
+
+django.setup()
+
+from django.db import connection
+
+from apps.sales.models import TelecomCompany, RechargeDenomination, RechargeCodeInventory
+from apps.sales.services.inventory_import import IMPORT_CHUNK_SIZE, import_codes, iter_file_codes
+
+CODES = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+CHUNK_SIZE = int(sys.argv[2]) if len(sys.argv) > 2 else IMPORT_CHUNK_SIZE
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def write_codes(path, prefix):
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write("code\n")
+        for i in range(CODES):
+            # Every 100th row repeats the previous code.
+            n = i - 1 if i and i % 100 == 0 else i
+            fh.write(f"{prefix}{n:012d}\n")
+
+
+def run(name, path, denom):
+    started = time.perf_counter()
+    with open(path, "rb") as fh:
+        result = import_codes(denom, iter_file_codes(fh, path), batch_ref="bench", chunk_size=CHUNK_SIZE)
+    elapsed = time.perf_counter() - started
+    print(
+        f"{name:<7} {elapsed:6.1f} s | {result.read / elapsed:9.0f} rows/s | "
+        f"created {result.created} | duplicates {result.duplicates} | "
+        f"invalid {result.invalid} | peak RSS {peak_rss_mb():.0f} MB"
+    )
+
+
+suffix = uuid.uuid4().hex[:6]
+company = TelecomCompany.objects.create(code=f"BENCH{suffix}", name_ar="Bench")
+denom = RechargeDenomination.objects.create(
+    company=company, product_type="MOBILE", value=5, price_to_agent=Decimal("1")
+)
+fd, path = tempfile.mkstemp(suffix=".csv")
+os.close(fd)
+
+try:
+    write_codes(path, f"B{suffix}")
+    print(f"{CODES} codes, chunk {CHUNK_SIZE}, on {connection.vendor} (peak RSS {peak_rss_mb():.0f} MB)")
+    run("import", path, denom)
+    run("again", path, denom)
+finally:
+    os.remove(path)
+    RechargeCodeInventory.objects.filter(denomination=denom).delete()
+    denom.delete()
+    company.delete()
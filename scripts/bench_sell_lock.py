@@ -0,0 +1,135 @@
+"""
+Benchmark: how long a sale holds the agent's AgentBalance row lock.
+
+Compares the previous sell pipeline (INSERT, then build/sign the receipt and
+UPDATE it, all under the lock) with `apps.sales.services.selling.sell_one`
+(receipt built and signed up front, one INSERT, balance debited last with a
+single conditional UPDATE).
+
+Lock hold time is measured from the first statement touching the balance row
+(`SELECT ... FOR UPDATE` before, the debit `UPDATE` after) to the end of the
+atomic block (COMMIT). Benchmark rows are deleted at the end.
+
+Run:
+    python scripts/bench_sell_lock.py [iterations]
+"""
+import os
+import sys
+import time
+import uuid
+import statistics
+from decimal import Decimal
+from pathlib import Path
+
+# Ensure src/ is on PYTHONPATH (same as manage.py)
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+sys.path.insert(0, str(SRC))
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.dev")
+
+import django
+
+django.setup()
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction as db_transaction
+from django.utils import timezone
+
+from apps.accounts.models import AuditLog
+from apps.billing.models import AgentBalance
+from apps.sales.models import TelecomCompany, RechargeDenomination, Transaction
+from apps.sales.services.receipt import build_receipt_payload, sign_receipt_payload
+from apps.sales.services.selling import sell_one
+
+User = get_user_model()
+
+ITERATIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+
+class LockTimer:
+    """Records when the balance row is locked; `stop()` returns the hold time."""
+
+    def __init__(self):
+        self.locked_at = None
+        self.statements = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        if self.locked_at is None and "billing_agentbalance" in sql:
+            self.locked_at = time.perf_counter()
+        elif self.locked_at is not None:
+            self.statements += 1
+        return execute(sql, params, many, context)
+
+    def stop(self):
+        return time.perf_counter() - self.locked_at
+
+
+def legacy_sell(agent, denom):
+    """The pre-refactor pipeline: INSERT, then receipt UPDATE, under the lock."""
+    price = Decimal(denom.price_to_agent)
+    with db_transaction.atomic():
+        agent_balance = AgentBalance.objects.select_for_update().get(agent=agent)
+        agent_balance.balance -= price
+        agent_balance.save()
+
+        tx = Transaction.objects.create(
+            agent=agent,
+            company=denom.company,
+            denomination=denom,
+            price=price,
+            code=f"{denom.company.code}-{uuid.uuid4().hex[:12]}",
+            status="PRINTED",
+            commission_amount=0,
+        )
+        payload = build_receipt_payload(tx)
+        tx.receipt_payload = payload
+        tx.receipt_hmac = sign_receipt_payload(tx, payload)
+        tx.receipt_hmac_created_at = timezone.now()
+        tx.save(update_fields=["receipt_payload", "receipt_hmac", "receipt_hmac_created_at"])
+
+        AuditLog.objects.create(actor=agent, action="SELL", transaction_id=tx.id, message="bench")
+
+
+def current_sell(agent, denom):
+    sell_one(agent, denom, audit_message="bench")
+
+
+def measure(fn, agent, denom):
+    holds, statements = [], []
+    for _ in range(ITERATIONS):
+        timer = LockTimer()
+        with connection.execute_wrapper(timer):
+            fn(agent, denom)
+            holds.append(timer.stop())
+        statements.append(timer.statements)
+    return holds, statements
+
+
+def report(name, holds, statements):
+    holds_ms = sorted(h * 1000 for h in holds)
+    p95 = holds_ms[int(len(holds_ms) * 0.95) - 1]
+    print(
+        f"{name:<8} lock hold: median {statistics.median(holds_ms):.3f} ms | "
+        f"p95 {p95:.3f} ms | statements under lock {statistics.mean(statements):.1f}"
+    )
+
+
+suffix = uuid.uuid4().hex[:6]
+agent = User.objects.create(username=f"bench_agent_{suffix}", role="AGENT", is_active=True)
+company = TelecomCompany.objects.create(code=f"BENCH{suffix}", name_ar="Bench")
+denom = RechargeDenomination.objects.create(
+    company=company, product_type="MOBILE", value=5, price_to_agent=Decimal("1")
+)
+AgentBalance.objects.update_or_create(agent=agent, defaults={"balance": Decimal(ITERATIONS * 10)})
+
+try:
+    print(f"{ITERATIONS} sales per pipeline on {connection.vendor}")
+    report("before", *measure(legacy_sell, agent, denom))
+    report("after", *measure(current_sell, agent, denom))
+finally:
+    AuditLog.objects.filter(actor=agent).delete()
+    Transaction.objects.filter(agent=agent).delete()
+    denom.delete()
+    company.delete()
+    agent.delete()
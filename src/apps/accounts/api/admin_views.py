@@ -4,6 +4,7 @@ from rest_framework import status
 
 from apps.accounts.models import User, AuditLog
 from apps.accounts.permissions import IsAdmin
+from apps.core.api.idempotency import get_idempotency_stats
 from apps.core.api.messages import MESSAGES
 from apps.core.api.utils import api_response
 
@@ -68,3 +69,18 @@ class ToggleAgentStatusAPIView(APIView):
             message=MESSAGES[msg_code],
             http_status=status.HTTP_200_OK
         )
+
+
+class IdempotencyStatsAPIView(APIView):
+    """
+    API لإحصائيات إعادة تشغيل طلبات Idempotency-Key (نسبة الإصابة)
+    """
+    permission_classes = [IsAuthenticated, IsAdmin]
+
+    def get(self, request):
+        return api_response(
+            'SUCCESS',
+            MESSAGES.get('SUCCESS', 'تمت العملية بنجاح'),
+            status.HTTP_200_OK,
+            get_idempotency_stats(),
+        )
@@ -1,4 +1,3 @@
-from django.core.paginator import Paginator
 from django.utils.dateparse import parse_date
 
 from rest_framework.views import APIView
@@ -7,7 +6,9 @@ from rest_framework import status
 
 from apps.accounts.permissions import IsAgent
 from apps.sales.models import Transaction
-from apps.core.api.utils import api_response
+from apps.sales.services.rollup import agent_transaction_count
+from apps.core.api.pagination import InvalidCursor, NumberedPage, cursor_paginate, filter_local_dates, page_paginate, parse_page_size
+from apps.core.api.utils import api_json_response, api_response
 from apps.core.api.messages import MESSAGES
 
 
@@ -16,10 +17,31 @@ class AgentTransactionsAPIView(APIView):
     Agent Transactions API (POS)
     - List agent transactions
     - Filters: status, from, to
-    - Pagination
+    - Cursor pagination: ?cursor=<next_cursor|previous_cursor>&page_size=
+    - Cursor responses keep the pre-cursor page / total_pages / total_items
+      keys; the total comes from the daily sales rollup (no COUNT(*))
+    - Legacy ?page=N (without cursor): numbered pages with page / total_pages /
+      total_items, as before the cursors (COUNT(*) + OFFSET)
     """
     permission_classes = [IsAuthenticated, IsAgent]
 
+    # الأعمدة المعروضة فقط (بدون code / receipt_payload)
+    LIST_FIELDS = (
+        "id",
+        "company_id",
+        "company__name_ar",
+        "company__code",
+        "denomination_id",
+        "denomination__value",
+        "status",
+        "price",
+        "created_at",
+        "confirmed_at",
+        "public_token",
+        "receipt_reissue_count",
+        "receipt_reissue_limit",
+    )
+
     def get(self, request):
         agent = request.user
 
@@ -27,100 +49,97 @@ class AgentTransactionsAPIView(APIView):
         # Query Params
         # ======================
         status_filter = request.GET.get("status")  # PRINTED / CONFIRMED
-        from_date = parse_date(request.GET.get("from"))
-        to_date = parse_date(request.GET.get("to"))
+        from_date = parse_date(request.GET.get("from") or "")
+        to_date = parse_date(request.GET.get("to") or "")
 
-        page = int(request.GET.get("page", 1))
-        page_size = min(int(request.GET.get("page_size", 20)), 50)
+        cursor = request.GET.get("cursor") or None
+        page = request.GET.get("page")
+        page_size = parse_page_size(request.GET.get("page_size"))
 
         # ======================
-        # Base Query (Optimized)
+        # Base Query (values: لا كائنات Transaction ولا JSON الإيصال ولا فك تشفير الكود)
         # ======================
-        qs = (
-            Transaction.objects
-            .filter(agent=agent)
-            .select_related("company", "denomination")
-            .order_by("-created_at")
-        )
+        qs = Transaction.objects.filter(agent=agent).values(*self.LIST_FIELDS)
 
         # ======================
         # Filters
         # ======================
-        if status_filter in ("PRINTED", "CONFIRMED"):
+        if status_filter not in ("PRINTED", "CONFIRMED"):
+            status_filter = None
+        if status_filter:
             qs = qs.filter(status=status_filter)
 
-        if from_date:
-            qs = qs.filter(created_at__date__gte=from_date)
-
-        if to_date:
-            qs = qs.filter(created_at__date__lte=to_date)
+        # نطاق على created_at (وليس __date) ليستخدم فهرس (agent, created_at)
+        qs = filter_local_dates(qs, from_date, to_date)
 
         # ======================
-        # Pagination
+        # Pagination (keyset على created_at, id)
+        # ?page=N القديم يبقى مدعوماً لعملاء POS الذين لم ينتقلوا إلى cursor
         # ======================
-        paginator = Paginator(qs, page_size)
-        page_obj = paginator.get_page(page)
+        try:
+            if page is not None and not cursor:
+                page_obj = page_paginate(qs, page, page_size)
+            else:
+                page_obj = cursor_paginate(qs, cursor, page_size)
+        except InvalidCursor:
+            return api_response(
+                "INVALID_CURSOR",
+                MESSAGES.get("INVALID_CURSOR", "مؤشر الصفحة غير صالح"),
+                status.HTTP_400_BAD_REQUEST,
+            )
 
         # ======================
         # Serialize (POS-friendly)
         # ======================
+        # رابط الإيصال: يُحسب الأساس مرة واحدة لكل طلب
+        receipt_base = request.build_absolute_uri("/receipt/")
+
         items = []
-        for t in page_obj.object_list:
-            can_reprint = (
-                t.status == "CONFIRMED" and
-                t.receipt_reissue_count < t.receipt_reissue_limit
-            )
+        for t in page_obj:
+            confirmed = t["status"] == "CONFIRMED"
+            token = str(t["public_token"]) if confirmed else None
+            reissue_count = t["receipt_reissue_count"]
+            reissue_limit = t["receipt_reissue_limit"]
 
             items.append({
-                "transaction_id": t.id,
+                "transaction_id": t["id"],
                 "company": {
-                    "id": t.company.id,
-                    "name": t.company.name_ar,
-                    "code": t.company.code,
+                    "id": t["company_id"],
+                    "name": t["company__name_ar"],
+                    "code": t["company__code"],
                 },
                 "denomination": {
-                    "id": t.denomination.id,
-                    "value": t.denomination.value,
+                    "id": t["denomination_id"],
+                    "value": t["denomination__value"],
                 },
-                "status": t.status,
-                "price": float(t.price),
-                "created_at": t.created_at.isoformat(),
+                "status": t["status"],
+                "price": float(t["price"]),
+                "created_at": t["created_at"].isoformat(),
                 "confirmed_at": (
-                    t.confirmed_at.isoformat()
-                    if t.confirmed_at else None
-                ),
-                "receipt_token": (
-                    str(t.public_token)
-                    if t.status == "CONFIRMED" else None
-                ),
-                "receipt_url": (
-                    request.build_absolute_uri(
-                        f"/receipt/{t.public_token}/"
-                    )
-                    if t.status == "CONFIRMED" else None
-                ),
-                "can_print": t.status == "CONFIRMED",
-                "can_reprint": can_reprint,
-                "reissue_count": t.receipt_reissue_count,
-                "reissue_limit": t.receipt_reissue_limit,
-                "reissue_remaining": (
-                    t.receipt_reissue_limit - t.receipt_reissue_count
+                    t["confirmed_at"].isoformat()
+                    if t["confirmed_at"] else None
                 ),
+                "receipt_token": token,
+                "receipt_url": f"{receipt_base}{token}/" if confirmed else None,
+                "can_print": confirmed,
+                "can_reprint": confirmed and reissue_count < reissue_limit,
+                "reissue_count": reissue_count,
+                "reissue_limit": reissue_limit,
+                "reissue_remaining": reissue_limit - reissue_count,
             })
 
+        if isinstance(page_obj, NumberedPage):
+            pagination = page_obj.as_dict()
+        else:
+            # total_pages / total_items تبقى في الاستجابة لعملاء POS القدامى (من rollup، بدون COUNT(*))
+            pagination = page_obj.as_dict(total=agent_transaction_count(agent, status_filter, from_date, to_date))
+
         data = {
             "items": items,
-            "pagination": {
-                "page": page_obj.number,
-                "page_size": page_size,
-                "total_pages": paginator.num_pages,
-                "total_items": paginator.count,
-                "has_next": page_obj.has_next(),
-                "has_previous": page_obj.has_previous(),
-            }
+            "pagination": pagination,
         }
 
-        return api_response(
+        return api_json_response(
             "SUCCESS",
             MESSAGES.get("SUCCESS", "تم جلب العمليات"),
             status.HTTP_200_OK,
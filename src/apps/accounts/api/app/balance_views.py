@@ -6,7 +6,7 @@ from rest_framework import status
 
 from apps.accounts.permissions import IsAgent
 from apps.billing.models import AgentBalance
-from apps.core.api.utils import api_response
+from apps.core.api.utils import api_json_response
 from apps.core.api.messages import MESSAGES
 
 
@@ -25,7 +25,7 @@ class AgentBalanceAPIView(APIView):
             defaults={"balance": Decimal("0.00")}
         )
 
-        return api_response(
+        return api_json_response(
             "SUCCESS",
             MESSAGES.get("SUCCESS", "تم بنجاح"),
             status.HTTP_200_OK,
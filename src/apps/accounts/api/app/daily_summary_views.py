@@ -3,7 +3,8 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
 
 from apps.accounts.permissions import IsAgent
-from apps.sales.models import Transaction
+from apps.sales.models import DailySalesRollup
+from apps.sales.services.rollup import rollup_totals
 from apps.core.api.utils import api_response
 from apps.core.api.messages import MESSAGES
 from django.utils.dateparse import parse_date
@@ -19,11 +20,11 @@ class AgentDailySummaryAPIView(APIView):
         agent = request.user
         date = parse_date(request.GET.get('date'))
 
-        qs = Transaction.objects.filter(agent=agent)
+        rollups = DailySalesRollup.objects.filter(agent=agent)
         if date:
-            qs = qs.filter(created_at__date=date)
+            rollups = rollups.filter(date=date)
 
-        total = qs.count()
+        total = rollup_totals(rollups)['total_transactions']
 
         return api_response(
             'SUCCESS',
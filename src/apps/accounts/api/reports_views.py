@@ -1,39 +1,36 @@
 from django.utils import timezone
-from django.db.models import Sum, Count
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 
 from apps.accounts.permissions import IsAdmin
-from apps.sales.models import Transaction
+from apps.sales.models import DailySalesRollup
+from apps.sales.services.rollup import rollup_by_agent, rollup_totals
 
 
 class DailyReportAPIView(APIView):
     permission_classes = [IsAuthenticated, IsAdmin]
 
     def get(self, request):
-        today = timezone.now().date()
+        today = timezone.localdate()
 
-        transactions = Transaction.objects.filter(
-            created_at__date=today,
+        rollups = DailySalesRollup.objects.filter(
+            date=today,
             status='CONFIRMED'
         )
 
+        totals = rollup_totals(rollups)
+
         return Response({
             'date': str(today),
-            'total_transactions': transactions.count(),
-            'total_sales': str(
-                transactions.aggregate(total=Sum('price'))['total'] or 0
-            ),
-            'agents': self._agents_summary(transactions)
+            'total_transactions': totals['total_transactions'],
+            'total_sales': str(totals['total_sales']),
+            'agents': self._agents_summary(rollups)
         })
 
-    def _agents_summary(self, transactions):
+    def _agents_summary(self, rollups):
         data = []
-        agents = transactions.values('agent__username').annotate(
-            total_sales=Sum('price'),
-            total_transactions=Count('id')
-        )
+        agents = rollup_by_agent(rollups)
 
         for a in agents:
             data.append({
@@ -49,29 +46,26 @@ class MonthlyReportAPIView(APIView):
     permission_classes = [IsAuthenticated, IsAdmin]
 
     def get(self, request):
-        now = timezone.now()
+        now = timezone.localdate()
 
-        transactions = Transaction.objects.filter(
-            created_at__year=now.year,
-            created_at__month=now.month,
+        rollups = DailySalesRollup.objects.filter(
+            date__year=now.year,
+            date__month=now.month,
             status='CONFIRMED'
         )
 
+        totals = rollup_totals(rollups)
+
         return Response({
             'month': f"{now.year}-{now.month}",
-            'total_transactions': transactions.count(),
-            'total_sales': str(
-                transactions.aggregate(total=Sum('price'))['total'] or 0
-            ),
-            'agents': self._agents_summary(transactions)
+            'total_transactions': totals['total_transactions'],
+            'total_sales': str(totals['total_sales']),
+            'agents': self._agents_summary(rollups)
         })
 
-    def _agents_summary(self, transactions):
+    def _agents_summary(self, rollups):
         data = []
-        agents = transactions.values('agent__username').annotate(
-            total_sales=Sum('price'),
-            total_transactions=Count('id')
-        )
+        agents = rollup_by_agent(rollups)
 
         for a in agents:
             data.append({
@@ -85,28 +79,25 @@ class YearlyReportAPIView(APIView):
     permission_classes = [IsAuthenticated, IsAdmin]
 
     def get(self, request):
-        now = timezone.now()
+        now = timezone.localdate()
 
-        transactions = Transaction.objects.filter(
-            created_at__year=now.year,
+        rollups = DailySalesRollup.objects.filter(
+            date__year=now.year,
             status='CONFIRMED'
         )
 
+        totals = rollup_totals(rollups)
+
         return Response({
             'year': str(now.year),
-            'total_transactions': transactions.count(),
-            'total_sales': str(
-                transactions.aggregate(total=Sum('price'))['total'] or 0
-            ),
-            'agents': self._agents_summary(transactions)
+            'total_transactions': totals['total_transactions'],
+            'total_sales': str(totals['total_sales']),
+            'agents': self._agents_summary(rollups)
         })
 
-    def _agents_summary(self, transactions):
+    def _agents_summary(self, rollups):
         data = []
-        agents = transactions.values('agent__username').annotate(
-            total_sales=Sum('price'),
-            total_transactions=Count('id')
-        )
+        agents = rollup_by_agent(rollups)
 
         for a in agents:
             data.append({
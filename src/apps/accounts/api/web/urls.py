@@ -2,7 +2,11 @@ from django.urls import path
 
 from apps.accounts.api.views import LoginAPIView, LogoutAPIView
 from apps.accounts.api.auth_views import AgentLoginAPIView
-from apps.accounts.api.admin_views import AdminAgentsListAPIView, ToggleAgentStatusAPIView
+from apps.accounts.api.admin_views import (
+    AdminAgentsListAPIView,
+    ToggleAgentStatusAPIView,
+    IdempotencyStatsAPIView,
+)
 from apps.accounts.api.reports_views import DailyReportAPIView, MonthlyReportAPIView, YearlyReportAPIView
 
 from apps.accounts.api.web.web_views import (
@@ -35,4 +39,5 @@ urlpatterns = [
 
     # System
     path("system/ping/", WebSystemHealthAPIView.as_view(), name="web-api-system-health"),
+    path("admin/system/idempotency/", IdempotencyStatsAPIView.as_view(), name="web-api-admin-idempotency-stats"),
 ]
@@ -1,4 +1,4 @@
-from apps.accounts.utils import get_system_setting
+from apps.accounts.services.system_settings import get_bool
 
 
 def system_settings(request):
@@ -7,13 +7,7 @@ def system_settings(request):
     Returns:
         dict with `SHOW_PROFIT` and `ALLOW_AGENT_USERNAME_EDIT` boolean keys.
     """
-    val = get_system_setting("SHOW_PROFIT", "1")
-    show_profit = str(val).lower() in ("1", "true", "yes", "on")
-
-    val2 = get_system_setting("ALLOW_AGENT_USERNAME_EDIT", "1")
-    allow_edit_username = str(val2).lower() in ("1", "true", "yes", "on")
-
     return {
-        "SHOW_PROFIT": show_profit,
-        "ALLOW_AGENT_USERNAME_EDIT": allow_edit_username,
+        "SHOW_PROFIT": get_bool("SHOW_PROFIT", True),
+        "ALLOW_AGENT_USERNAME_EDIT": get_bool("ALLOW_AGENT_USERNAME_EDIT", True),
     }
@@ -42,6 +42,7 @@ class AdminPermissionMiddleware:
 
             # =========================
             # Admin عادي → فحص الصلاحيات
+            # (snapshot مخزن مؤقتًا: نفس القيم التي تقرأها الـ views بدون استعلام)
             # =========================
             perms = getattr(user, 'permissions', None)
 
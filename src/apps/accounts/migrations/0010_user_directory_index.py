@@ -0,0 +1,18 @@
+# Generated by Django 5.2.10 on 2026-10-18 08:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_add_pos_device_id'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['role', 'username', 'is_active'], name='accounts_user_directory_idx'),
+        ),
+    ]
@@ -5,7 +5,7 @@ import uuid
 from django.apps import apps
 from django.contrib.auth.models import AbstractUser
 from django.db import models
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.utils import timezone
 
@@ -34,22 +34,32 @@ class User(AbstractUser):
     phone = models.CharField(max_length=30, blank=True)
     created_at = models.DateTimeField(default=timezone.now, editable=False)
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # قائمة الوكلاء: فلترة role/is_active وترتيب keyset على username من الفهرس نفسه
+            models.Index(fields=["role", "username", "is_active"], name="accounts_user_directory_idx"),
+        ]
+
     def __str__(self):
         return f"{self.username} ({self.role})"
 
 
     @property
     def permissions(self):
-        """Return the related AdminPermission instance or None.
+        """Return the resolved AdminPermission flags or None.
 
         Templates and existing code expect `request.user.permissions`.
-        This property provides a convenient accessor that returns the
-        OneToOne `admin_permissions` object when present, otherwise None.
+        This property returns a read-only snapshot of the OneToOne
+        `admin_permissions` row (`perms.can_view_agents` and
+        `perms["can_view_agents"]` both work), served from the cache; see
+        `apps.accounts.services.permissions`. Write through
+        `admin_permissions` / AdminPermission instead.
         """
-        try:
-            return self.admin_permissions
-        except Exception:
+        from apps.accounts.services.permissions import get_permission_snapshot
+
+        if self.pk is None:
             return None
+        return get_permission_snapshot(self)
 
 class AdminPermission(models.Model):
     """
@@ -275,3 +285,27 @@ def ensure_user_related_objects(sender, instance: User, created: bool, **kwargs)
         AgentBalance = apps.get_model("billing", "AgentBalance")
         if AgentBalance:
             AgentBalance.objects.get_or_create(agent=instance)
+
+
+@receiver(post_save, sender=AdminPermission)
+def refresh_admin_permission_snapshot(sender, instance: AdminPermission, **kwargs):
+    """حفظ الصلاحيات (أو تطبيق preset) يحدّث النسخة المخزنة مؤقتًا"""
+    from apps.accounts.services.permissions import store_permission_snapshot
+
+    store_permission_snapshot(instance)
+
+
+@receiver(post_delete, sender=AdminPermission)
+def clear_admin_permission_snapshot(sender, instance: AdminPermission, **kwargs):
+    from apps.accounts.services.permissions import clear_permission_snapshot
+
+    clear_permission_snapshot(instance.admin_id)
+
+
+@receiver(post_save, sender=SystemSetting)
+@receiver(post_delete, sender=SystemSetting)
+def invalidate_system_settings(sender, **kwargs):
+    """أي تعديل على الإعدادات (من لوحة الإدارة أو set_system_setting) يبطل النسخة المخزنة"""
+    from apps.accounts.services.system_settings import invalidate_settings
+
+    invalidate_settings()
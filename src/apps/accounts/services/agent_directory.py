@@ -0,0 +1,137 @@
+"""Admin agent directory (agents list page).
+
+One SQL statement per page: each agent row is annotated with its balance,
+today's confirmed sales (count and sum) and last activity (latest
+transaction) through correlated subqueries, which use the OneToOne on
+AgentBalance and the (agent, created_at) index on Transaction.
+
+Pages are keyset-paginated on `username` (`after` / `before` cursors)
+instead of COUNT(*) + OFFSET, and the scan follows the (role, username,
+is_active) index on User, so the cost of a page does not grow with the
+number of agents.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from typing import List, Optional
+
+from django.db.models import Count, DecimalField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.accounts.models import User
+from apps.billing.models import AgentBalance
+from apps.sales.models import Transaction
+
+AGENT_DIRECTORY_PAGE_SIZE = 10
+
+_MONEY = DecimalField(max_digits=15, decimal_places=2)
+
+
+@dataclass
+class AgentDirectoryPage:
+    agents: List[User]
+    # username cursors for the neighbouring pages (None: no such page)
+    next_after: Optional[str]
+    previous_before: Optional[str]
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_after is not None
+
+    @property
+    def has_previous(self) -> bool:
+        return self.previous_before is not None
+
+    @property
+    def has_other_pages(self) -> bool:
+        return self.has_next or self.has_previous
+
+
+def _today_range():
+    start = timezone.make_aware(datetime.combine(timezone.localdate(), time.min))
+    return start, start + timedelta(days=1)
+
+
+def agent_directory_queryset(search: str = "", status: str = ""):
+    """Agents annotated with balance, today_sales_count, today_sales_total and last_activity."""
+    day_start, day_end = _today_range()
+
+    today_sales = (
+        Transaction.objects
+        .filter(agent=OuterRef("pk"), status="CONFIRMED", created_at__gte=day_start, created_at__lt=day_end)
+        .order_by()
+        .values("agent")
+    )
+
+    qs = (
+        User.objects
+        .filter(role=User.Role.AGENT)
+        .only("id", "username", "is_active", "last_login")
+        .annotate(
+            balance=Coalesce(
+                Subquery(AgentBalance.objects.filter(agent=OuterRef("pk")).values("balance")[:1]),
+                Value(Decimal("0")),
+                output_field=_MONEY,
+            ),
+            today_sales_count=Coalesce(
+                Subquery(today_sales.annotate(n=Count("id")).values("n")[:1]),
+                Value(0),
+            ),
+            today_sales_total=Coalesce(
+                Subquery(today_sales.annotate(s=Sum("price")).values("s")[:1]),
+                Value(Decimal("0")),
+                output_field=_MONEY,
+            ),
+            last_activity=Subquery(
+                Transaction.objects
+                .filter(agent=OuterRef("pk"))
+                .order_by("-created_at")
+                .values("created_at")[:1]
+            ),
+        )
+    )
+
+    if search:
+        qs = qs.filter(username__icontains=search)
+
+    if status == "active":
+        qs = qs.filter(is_active=True)
+    elif status == "suspended":
+        qs = qs.filter(is_active=False)
+
+    return qs
+
+
+def get_agent_directory_page(
+    search: str = "",
+    status: str = "",
+    *,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    page_size: int = AGENT_DIRECTORY_PAGE_SIZE,
+) -> AgentDirectoryPage:
+    """Page of agents ordered by username, after/before the given username cursor."""
+    qs = agent_directory_queryset(search, status)
+
+    if before:
+        # Previous page: read backwards from the cursor, then restore the order.
+        rows = list(qs.filter(username__lt=before).order_by("-username")[:page_size + 1])
+        has_more = len(rows) > page_size
+        agents = rows[:page_size][::-1]
+        return AgentDirectoryPage(
+            agents=agents,
+            next_after=agents[-1].username if agents else None,
+            previous_before=agents[0].username if has_more else None,
+        )
+
+    if after:
+        qs = qs.filter(username__gt=after)
+    rows = list(qs.order_by("username")[:page_size + 1])
+    agents = rows[:page_size]
+    return AgentDirectoryPage(
+        agents=agents,
+        next_after=agents[-1].username if len(rows) > page_size else None,
+        previous_before=agents[0].username if after and agents else None,
+    )
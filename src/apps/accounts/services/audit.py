@@ -0,0 +1,183 @@
+"""Audit sink: AuditLog rows written in batches, off the request path.
+
+Sell, confirm and reissue used to INSERT their AuditLog row inside the
+DB transaction that also holds the agent's balance row lock. `record_audit`
+builds the row (timestamped now) and, once the surrounding transaction
+commits, hands it to a per-process queue; a background thread writes the
+queue with one `bulk_create` every AUDIT_BATCH_SIZE events or
+AUDIT_FLUSH_INTERVAL_MS milliseconds, whichever comes first.
+
+- Events of a rolled-back transaction are never queued (`on_commit`).
+- `durable=True`, or AUDIT_ASYNC=False, INSERTs synchronously in the
+  caller's transaction, for rows that must commit with the change (e.g.
+  rows read back to enforce a limit).
+- If a batch INSERT fails, its rows are retried one by one: rows the DB
+  rejects for good (IntegrityError / DataError, e.g. an actor deleted
+  before the flush) are logged and dropped; on any other DB error the
+  remaining rows are kept for the next flush.
+- The queue never holds more than AUDIT_MAX_QUEUE rows: past that, the
+  oldest rows are dropped (and logged), so a DB outage cannot grow memory
+  without bound or push INSERTs onto the request path.
+
+Loss window: queued rows live in process memory only. The queue is flushed
+at interpreter exit, but a hard kill (SIGKILL, OOM, container stop timeout)
+loses the rows not yet written: up to AUDIT_FLUSH_INTERVAL_MS of events in
+normal operation, up to AUDIT_MAX_QUEUE rows while the DB is failing. This
+covers the SELL / CONFIRM / REISSUE_RECEIPT rows. The money movement itself
+is never only here: the Transaction row (status, confirmed_at) and, for a
+sale, its balance ledger entry commit with the change. Events that must
+survive a kill are recorded with `durable=True`.
+"""
+
+import atexit
+import logging
+import threading
+from typing import List, Optional
+
+from django.conf import settings
+from django.db import DatabaseError, DataError, IntegrityError, close_old_connections, transaction as db_transaction
+from django.utils import timezone
+
+from apps.accounts.models import AuditLog
+
+logger = logging.getLogger(__name__)
+
+
+def _async_enabled() -> bool:
+    return bool(getattr(settings, "AUDIT_ASYNC", True))
+
+
+def _batch_size() -> int:
+    return int(getattr(settings, "AUDIT_BATCH_SIZE", 100))
+
+
+def _interval() -> float:
+    return int(getattr(settings, "AUDIT_FLUSH_INTERVAL_MS", 200)) / 1000
+
+
+def _max_queue() -> int:
+    return int(getattr(settings, "AUDIT_MAX_QUEUE", 10000))
+
+
+class AuditSink:
+    """Process-local queue of unsaved AuditLog rows with a flusher thread."""
+
+    def __init__(self):
+        self._queue: List[AuditLog] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def put(self, entry: AuditLog) -> None:
+        with self._lock:
+            self._queue.append(entry)
+            self._trim()
+            size = len(self._queue)
+        self._ensure_thread()
+        if size >= _batch_size():
+            self._wakeup.set()
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._queue)
+
+    def _trim(self) -> None:
+        # Caller holds self._lock.
+        overflow = len(self._queue) - _max_queue()
+        if overflow > 0:
+            del self._queue[:overflow]
+            logger.error("Audit queue over AUDIT_MAX_QUEUE; dropped the %d oldest row(s)", overflow)
+
+    def _requeue(self, rows: List[AuditLog]) -> None:
+        with self._lock:
+            self._queue[:0] = rows
+            self._trim()
+
+    def flush(self) -> int:
+        """Write every queued row now; returns how many were written."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._queue = self._queue, []
+            if not batch:
+                return 0
+            try:
+                AuditLog.objects.bulk_create(batch, batch_size=_batch_size())
+            except DatabaseError:
+                logger.warning("Audit batch of %d row(s) failed; retrying row by row", len(batch), exc_info=True)
+                return self._write_rows(batch)
+            return len(batch)
+
+    def _write_rows(self, batch: List[AuditLog]) -> int:
+        written = 0
+        for index, entry in enumerate(batch):
+            # The failed bulk_create may have assigned ids before rolling back.
+            entry.pk = None
+            try:
+                AuditLog.objects.bulk_create([entry])
+            except (IntegrityError, DataError):
+                logger.exception(
+                    "Audit row dropped, rejected by the DB: action=%s actor_id=%s target_user_id=%s "
+                    "transaction_id=%s created_at=%s",
+                    entry.action, entry.actor_id, entry.target_user_id, entry.transaction_id, entry.created_at,
+                )
+            except DatabaseError:
+                logger.exception("Audit flush failed; %d row(s) kept for retry", len(batch) - index)
+                for rest in batch[index:]:
+                    rest.pk = None
+                self._requeue(batch[index:])
+                break
+            else:
+                written += 1
+        return written
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="audit-sink", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait(_interval())
+            self._wakeup.clear()
+            self.flush()
+            # This thread keeps its own DB connection; drop it if it went stale.
+            close_old_connections()
+
+
+sink = AuditSink()
+atexit.register(sink.flush)
+
+
+def record_audit(
+    action: str,
+    *,
+    actor=None,
+    target_user=None,
+    transaction_id=None,
+    message: str = "",
+    durable: bool = False,
+) -> AuditLog:
+    """Record an audit event; written after commit by the sink unless `durable`."""
+    entry = AuditLog(
+        actor=actor,
+        action=action,
+        target_user=target_user,
+        transaction_id=transaction_id,
+        message=message,
+        created_at=timezone.now(),
+    )
+    if durable or not _async_enabled():
+        entry.save(force_insert=True)
+        return entry
+    db_transaction.on_commit(lambda: sink.put(entry))
+    return entry
+
+
+def flush_audit_log() -> int:
+    """Write queued audit rows synchronously (tests, management commands)."""
+    return sink.flush()
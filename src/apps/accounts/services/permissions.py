@@ -1,5 +1,104 @@
+"""Resolved admin permission snapshots.
+
+Every admin page checks the current admin's AdminPermission several times
+(middleware, sidebar in base.html, `has_perm`, view code) and the panel
+issues dozens of requests per page load. The flags are resolved once into
+a plain dict and kept:
+
+- on the user object for the rest of the request, and
+- in Django's cache under the user id for ADMIN_PERMISSION_CACHE_TIMEOUT
+  seconds.
+
+Saving or deleting an AdminPermission (including applying a preset, which
+is persisted with `save()`) overwrites the cached snapshot once the DB
+transaction commits (see the signal receivers in `apps.accounts.models`).
+Readers only `add()` on a miss, so a snapshot built from a row read just
+before a save cannot replace the newer one. Writes that skip the signals
+(`QuerySet.update()`) are only picked up when the entry expires. With the
+default LocMemCache other workers pick the change up when their copy
+expires; use a shared cache backend (see CACHES) to make it immediate.
+"""
+
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction as db_transaction
+
 from apps.accounts.models import AdminPermission
 
+PERMISSION_FLAGS = (
+    "can_view_agents",
+    "can_add_agents",
+    "can_edit_agents",
+    "can_view_commissions",
+    "can_edit_commissions",
+    "can_view_reports",
+    "can_view_profit",
+    "can_view_audit_logs",
+)
+
+SNAPSHOT_KEY_PREFIX = "riadda:admin_permissions:"
+
+# Attribute used to memoize the snapshot on the user for the current request.
+_USER_ATTR = "_admin_permission_snapshot"
+_MISSING = object()
+
+
+class PermissionSnapshot(dict):
+    """Flag dict that also supports attribute access (`perms.can_view_agents`)."""
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+
+def _timeout() -> int:
+    return int(getattr(settings, "ADMIN_PERMISSION_CACHE_TIMEOUT", 60))
+
+
+def _key(user_id) -> str:
+    return f"{SNAPSHOT_KEY_PREFIX}{user_id}"
+
+
+def _entry(perms: Optional[AdminPermission]) -> Dict:
+    if perms is None:
+        # No row: cached too, so admins without permissions do not query every time.
+        return {"flags": None}
+    return {"flags": {flag: bool(getattr(perms, flag)) for flag in PERMISSION_FLAGS}}
+
+
+def store_permission_snapshot(perms: AdminPermission) -> None:
+    """Replace the cached snapshot of `perms.admin` with this (just saved) row on commit."""
+    key, entry = _key(perms.admin_id), _entry(perms)
+    db_transaction.on_commit(lambda: cache.set(key, entry, timeout=_timeout()))
+
+
+def clear_permission_snapshot(user_id) -> None:
+    key = _key(user_id)
+    db_transaction.on_commit(lambda: cache.delete(key))
+
+
+def get_permission_snapshot(user) -> Optional[PermissionSnapshot]:
+    """Resolved AdminPermission flags of `user`, or None when there is no row.
+
+    No DB query when the snapshot is memoized on the user or cached.
+    """
+    memo = getattr(user, _USER_ATTR, _MISSING)
+    if memo is not _MISSING:
+        return memo
+
+    entry = cache.get(_key(user.pk))
+    if entry is None:
+        entry = _entry(AdminPermission.objects.filter(admin_id=user.pk).first())
+        cache.add(_key(user.pk), entry, timeout=_timeout())
+
+    snapshot = PermissionSnapshot(entry["flags"]) if entry["flags"] is not None else None
+    setattr(user, _USER_ATTR, snapshot)
+    return snapshot
+
 
 def get_admin_ui_permissions(user):
     """Return a dict of UI permission flags for the given user.
@@ -26,15 +125,12 @@ def get_admin_ui_permissions(user):
             "is_super_admin": True,
         }
 
-    perms, _ = AdminPermission.objects.get_or_create(admin=user)
-    return {
-        "can_view_agents": bool(perms.can_view_agents),
-        "can_add_agents": bool(perms.can_add_agents),
-        "can_edit_agents": bool(perms.can_edit_agents),
-        "can_view_commissions": bool(perms.can_view_commissions),
-        "can_edit_commissions": bool(perms.can_edit_commissions),
-        "can_view_reports": bool(perms.can_view_reports),
-        "can_view_profit": bool(getattr(perms, "can_view_profit", True)),
-        "can_view_audit_logs": bool(perms.can_view_audit_logs),
-        "is_super_admin": False,
-    }
+    snapshot = get_permission_snapshot(user)
+    if snapshot is None:
+        # Only on the first visit of an admin without a row; the post_save
+        # receiver caches the new row.
+        perms, _ = AdminPermission.objects.get_or_create(admin=user)
+        snapshot = PermissionSnapshot(_entry(perms)["flags"])
+        setattr(user, _USER_ATTR, snapshot)
+
+    return {**snapshot, "is_super_admin": False}
@@ -0,0 +1,118 @@
+"""Versioned SystemSetting registry.
+
+SystemSetting is a handful of key/value rows read on every HTML page (the
+`system_settings` context processor) and changed a few times a month. All
+rows are loaded with one query into a snapshot tagged with a version stamp
+(`apps.core.cache`) and kept:
+
+- in a process-local dict (no DB, no cache round trip for the values), and
+- in Django's cache under the version, so other workers reuse it.
+
+Each read compares the local snapshot with the current stamp (one cache
+get). Saving or deleting a SystemSetting, e.g. through
+`set_system_setting`, bumps the stamp once the DB transaction commits (see
+the signal receivers in `apps.accounts.models`), so every worker reloads
+on its next request. SYSTEM_SETTINGS_CACHE_TIMEOUT bounds the age of a
+snapshot when the stamp cannot be shared (per-process LocMemCache).
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction as db_transaction
+
+from apps.core.cache import bump_version, get_version
+
+SETTINGS_VERSION_NAME = "accounts.system_settings"
+
+TRUE_VALUES = ("1", "true", "yes", "on")
+
+
+@dataclass(frozen=True)
+class SettingsSnapshot:
+    version: str
+    values: Dict[str, str]
+    built_at: float
+
+
+_snapshot: Optional[SettingsSnapshot] = None
+_lock = threading.Lock()
+
+
+def _timeout() -> int:
+    return int(getattr(settings, "SYSTEM_SETTINGS_CACHE_TIMEOUT", 60))
+
+
+def _load() -> Dict[str, str]:
+    from apps.accounts.models import SystemSetting
+
+    return dict(SystemSetting.objects.values_list("key", "value"))
+
+
+def _current() -> SettingsSnapshot:
+    global _snapshot
+
+    version = get_version(SETTINGS_VERSION_NAME)
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.version == version and time.monotonic() - snapshot.built_at < _timeout():
+        return snapshot
+
+    shared_key = f"accounts:system_settings:{version}"
+    values = cache.get(shared_key)
+    if values is None:
+        values = _load()
+        cache.set(shared_key, values, timeout=_timeout())
+
+    snapshot = SettingsSnapshot(version=version, values=values, built_at=time.monotonic())
+    with _lock:
+        _snapshot = snapshot
+    return snapshot
+
+
+def all_settings() -> Dict[str, str]:
+    return dict(_current().values)
+
+
+def get_setting(key: str, default=None):
+    """Raw (string) value of `key`, or `default` when there is no such row."""
+    return _current().values.get(key, default)
+
+
+def get_bool(key: str, default: bool = False) -> bool:
+    value = get_setting(key)
+    if value is None:
+        return default
+    return str(value).strip().lower() in TRUE_VALUES
+
+
+def get_int(key: str, default: int = 0) -> int:
+    value = get_setting(key)
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def set_setting(key: str, value):
+    """Create or update a setting (stored as string); readers see it after commit."""
+    from apps.accounts.models import SystemSetting
+
+    obj, _ = SystemSetting.objects.update_or_create(key=key, defaults={"value": str(value)})
+    return obj
+
+
+def invalidate_settings() -> None:
+    """Drop the local snapshot and bump the shared version (after commit)."""
+
+    def _bump():
+        global _snapshot
+
+        with _lock:
+            _snapshot = None
+        bump_version(SETTINGS_VERSION_NAME)
+
+    db_transaction.on_commit(_bump)
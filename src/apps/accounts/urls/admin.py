@@ -76,3 +76,5 @@ _add("admin/companies/<int:company_id>/edit/", _find('admin_company_edit'), name
 _add("admin/denominations/", _find('admin_denominations_list'), name="admin_denominations")
 _add("admin/denominations/add/", _find('admin_denomination_create'), name="admin_denomination_add")
 _add("admin/denominations/<int:denom_id>/edit/", _find('admin_denomination_edit'), name="admin_denomination_edit")
+
+_add("admin/inventory/import/", _find('admin_inventory_import'), name="admin_inventory_import")
@@ -1,17 +1,14 @@
-from apps.accounts.models import SystemSetting
+from apps.accounts.services import system_settings
 
 
 def get_system_setting(key, default=None):
-    try:
-        return SystemSetting.objects.get(key=key).value
-    except SystemSetting.DoesNotExist:
-        return default
+    """Value from the cached settings registry (no query once loaded)."""
+    return system_settings.get_setting(key, default)
 
 
 def set_system_setting(key, value):
     """Create or update a system setting value (stored as string)."""
-    obj, _ = SystemSetting.objects.update_or_create(key=key, defaults={"value": str(value)})
-    return obj
+    return system_settings.set_setting(key, value)
 
 from apps.accounts.constants import ADMIN_PERMISSION_PRESETS
 
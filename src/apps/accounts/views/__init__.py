@@ -17,9 +17,13 @@ from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.lib import colors
 
 from apps.accounts.models import User
-from apps.billing.models import AgentBalance
+from apps.accounts.services.agent_directory import get_agent_directory_page
+from apps.billing.models import AgentBalance, BalanceLedgerEntry
+from apps.billing.services import InsufficientBalance, apply_balance_delta
 from apps.sales.models import Transaction
+from apps.core.api.pagination import filter_local_dates
 from apps.core.ui.messages import ui_message
+from apps.core.utils.exports import EXPORT_CHUNK_SIZE, xlsx_response
 
 
 # ===================== Helpers =====================
@@ -34,17 +38,11 @@ def filter_transactions(agent, status_filter, date_from, date_to):
     if status_filter in ['CONFIRMED', 'PRINTED']:
         qs = qs.filter(status=status_filter)
 
-    if date_from:
-        from_date = parse_date(date_from)
-        if from_date:
-            qs = qs.filter(created_at__date__gte=from_date)
-
-    if date_to:
-        to_date = parse_date(date_to)
-        if to_date:
-            qs = qs.filter(created_at__date__lte=to_date)
-
-    return qs
+    return filter_local_dates(
+        qs,
+        parse_date(date_from) if date_from else None,
+        parse_date(date_to) if date_to else None,
+    )
 
 
 # ===================== Dashboard =====================
@@ -87,30 +85,16 @@ def agents_list(request):
     search = request.GET.get('search', '')
     status_filter = request.GET.get('status', '')
 
-    agents_qs = User.objects.filter(role='AGENT')
-
-    if search:
-        agents_qs = agents_qs.filter(username__icontains=search)
-
-    if status_filter == 'active':
-        agents_qs = agents_qs.filter(is_active=True)
-    elif status_filter == 'suspended':
-        agents_qs = agents_qs.filter(is_active=False)
-
-    paginator = Paginator(agents_qs.order_by('username'), 10)
-    page_obj = paginator.get_page(request.GET.get('page'))
-
-    data = []
-    for agent in page_obj:
-        balance = AgentBalance.objects.filter(agent=agent).first()
-        data.append({
-            'agent': agent,
-            'balance': balance.balance if balance else 0
-        })
+    page = get_agent_directory_page(
+        search,
+        status_filter,
+        after=request.GET.get('after') or None,
+        before=request.GET.get('before') or None,
+    )
 
     return render(request, 'accounts/agents.html', {
-        'agents': data,
-        'page_obj': page_obj,
+        'agents': page.agents,
+        'page_obj': page,
         'search': search,
         'status_filter': status_filter
     })
@@ -202,16 +186,18 @@ def adjust_agent_balance(request, agent_id):
         ui_message(request, 'INVALID_AMOUNT', 'error')
         return redirect('admin-agents')
 
-    balance_obj, _ = AgentBalance.objects.get_or_create(agent=agent)
-    new_balance = balance_obj.balance + amount
-
-    if new_balance < 0:
+    try:
+        apply_balance_delta(
+            agent,
+            amount,
+            reason=BalanceLedgerEntry.Reason.ADJUSTMENT,
+            actor=request.user,
+            create_missing=True,
+        )
+    except InsufficientBalance:
         ui_message(request, 'NEGATIVE_BALANCE_NOT_ALLOWED', 'error')
         return redirect('admin-agents')
 
-    balance_obj.balance = new_balance
-    balance_obj.save()
-
     ui_message(request, 'BALANCE_UPDATED', 'success')
     return redirect('admin-agents')
 # ===================== Export Excel =====================
@@ -227,31 +213,22 @@ def export_agent_transactions_excel(request, agent_id):
 
     transactions_qs = filter_transactions(agent, status_filter, date_from, date_to)
 
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Agent Transactions"
-
-    ws.append(["Username", "Date", "Amount", "Status"])
-
-    for t in transactions_qs:
-        ws.append([
-            agent.username,
-            t.created_at.strftime("%Y-%m-%d %H:%M"),
-            float(t.price),
-            t.status
-        ])
-
     total_amount = transactions_qs.aggregate(total=Sum('price'))['total'] or 0
-    ws.append([])
-    ws.append(["", "TOTAL", float(total_amount), ""])
-
-    response = HttpResponse(
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    rows = (
+        transactions_qs.values_list('created_at', 'price', 'status')
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
     )
-    response["Content-Disposition"] = f'attachment; filename="agent_{agent.username}_report.xlsx"'
 
-    wb.save(response)
-    return response
+    return xlsx_response(
+        f"agent_{agent.username}_report.xlsx",
+        ["Username", "Date", "Amount", "Status"],
+        (
+            [agent.username, created_at.strftime("%Y-%m-%d %H:%M"), float(price), tx_status]
+            for created_at, price, tx_status in rows
+        ),
+        title="Agent Transactions",
+        footer=[[], ["", "TOTAL", float(total_amount), ""]],
+    )
 
 
 # ===================== Export PDF =====================
@@ -8,15 +8,16 @@ from decimal import Decimal, InvalidOperation
 
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required, user_passes_test
-from django.core.paginator import Paginator
 from django.shortcuts import get_object_or_404, redirect, render
 from django.views.decorators.http import require_POST
 from django.utils.crypto import get_random_string
 
 from apps.accounts.models import User, AuditLog, AdminPermission
 from apps.accounts.permissions import is_admin, is_super_admin
+from apps.accounts.services.agent_directory import get_agent_directory_page
 from apps.accounts.services.permissions import get_admin_ui_permissions
-from apps.billing.models import AgentBalance
+from apps.billing.models import AgentBalance, BalanceLedgerEntry
+from apps.billing.services import InsufficientBalance, apply_balance_delta
 from apps.accounts.utils import get_system_setting, set_system_setting
 from django.contrib import messages
 
@@ -32,35 +33,21 @@ def agents_list_view(request):
     search = request.GET.get("search", "")
     status = request.GET.get("status", "")
 
-    qs = User.objects.filter(role="AGENT").order_by("username")
-
-    if search:
-        qs = qs.filter(username__icontains=search)
-
-    if status == "active":
-        qs = qs.filter(is_active=True)
-    elif status == "suspended":
-        qs = qs.filter(is_active=False)
-
-    balances = (
-        AgentBalance.objects
-        .filter(agent__in=qs)
-        .select_related("agent")
+    page = get_agent_directory_page(
+        search,
+        status,
+        after=request.GET.get("after") or None,
+        before=request.GET.get("before") or None,
     )
 
-    data = [{"agent": b.agent, "balance": b.balance} for b in balances]
-
-    paginator = Paginator(data, 10)
-    page_obj = paginator.get_page(request.GET.get("page"))
-
     perms = get_admin_ui_permissions(request.user)
 
     return render(request, "accounts/agents.html", {
-        "agents": page_obj,
+        "agents": page.agents,
         "perms": perms,
         "search": search,
         "status_filter": status,
-        "page_obj": page_obj,
+        "page_obj": page,
     })
 
 
@@ -143,17 +130,23 @@ def adjust_agent_balance(request, agent_id):
         messages.error(request, "قيمة غير صالحة")
         return redirect("admin_agent_detail", agent_id=agent.id)
 
-    balance_obj, _ = AgentBalance.objects.get_or_create(agent=agent)
-
-    old_balance = balance_obj.balance
-    balance_obj.balance += amount
-    balance_obj.save(update_fields=["balance"])
+    try:
+        new_balance = apply_balance_delta(
+            agent,
+            amount,
+            reason=BalanceLedgerEntry.Reason.ADJUSTMENT,
+            actor=request.user,
+            create_missing=True,
+        )
+    except InsufficientBalance:
+        messages.error(request, "لا يمكن أن يصبح رصيد الوكيل سالبًا")
+        return redirect("admin_agent_detail", agent_id=agent.id)
 
     AuditLog.objects.create(
         actor=request.user,
         action="ADJUST_BALANCE",
         target_user=agent,
-        message=f"تعديل رصيد الوكيل {agent.username} من {old_balance} إلى {balance_obj.balance}",
+        message=f"تعديل رصيد الوكيل {agent.username} من {new_balance - amount} إلى {new_balance}",
     )
 
     messages.success(request, "تم تعديل الرصيد بنجاح")
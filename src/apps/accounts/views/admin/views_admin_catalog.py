@@ -2,8 +2,10 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
 
-from apps.accounts.permissions import is_admin
-from apps.sales.models import TelecomCompany, RechargeDenomination
+from apps.accounts.permissions import is_admin, is_super_admin
+from apps.sales.models import InventoryImportJob, TelecomCompany, RechargeDenomination
+from apps.sales.services.inventory import stock_levels
+from apps.sales.services.inventory_import import ImportFileError, start_import_job
 from django.conf import settings
 from apps.core.utils.uploads import validate_uploaded_image
 from apps.accounts.permissions import has_perm
@@ -145,3 +147,44 @@ def admin_denomination_edit(request, denom_id):
         "denomination": denom,
         "companies": companies
     })
+
+
+# =========================
+# Recharge code inventory
+# =========================
+@login_required
+@user_passes_test(is_super_admin)
+def admin_inventory_import(request):
+    """رفع ملف أكواد (CSV / XLSX) من المشغل إلى مخزون الأكواد"""
+    denoms = (
+        RechargeDenomination.objects
+        .select_related("company")
+        .order_by("company__name_ar", "value")
+    )
+
+    if request.method == "POST":
+        upload = request.FILES.get("file")
+        denom = denoms.filter(id=request.POST.get("denomination_id") or 0).first()
+        if not upload or denom is None:
+            messages.error(request, "اختر الفئة وملف الأكواد")
+            return redirect("admin_inventory_import")
+
+        batch_ref = (request.POST.get("batch_ref") or "").strip() or upload.name
+        try:
+            # ملفات 500k سطر تتجاوز مهلة الطلب: يُحفظ الملف ويُستورد في الخلفية
+            job = start_import_job(denom, upload, batch_ref=batch_ref, user=request.user)
+        except ImportFileError as exc:
+            messages.error(request, str(exc))
+            return redirect("admin_inventory_import")
+
+        messages.success(request, f"بدأ استيراد الملف {job.file_name} في الخلفية، تابع التقدم أدناه")
+        return redirect("admin_inventory_import")
+
+    stock = stock_levels()
+    rows = [{"denomination": d, "available": stock.get(d.id, 0)} for d in denoms]
+    jobs = list(InventoryImportJob.objects.select_related("denomination__company")[:20])
+    return render(request, "admin/catalog/inventory_import.html", {
+        "rows": rows,
+        "jobs": jobs,
+        "jobs_active": any(job.is_active and not job.is_stalled for job in jobs),
+    })
@@ -1,11 +1,11 @@
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required, user_passes_test
-from django.core.paginator import Paginator
 from django.utils.dateparse import parse_date
 
 from apps.accounts.models import AuditLog, User
+from apps.core.api.pagination import InvalidCursor, cursor_paginate, estimated_count, filter_local_dates
 from django.http import HttpResponse
-from openpyxl import Workbook
+from apps.core.utils.exports import EXPORT_CHUNK_SIZE, xlsx_response
 from django.utils.dateparse import parse_date
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph
 from reportlab.lib.pagesizes import A4
@@ -55,7 +55,7 @@ def audit_logs_list(request):
 
     logs_qs = AuditLog.objects.select_related(
         'actor', 'target_user'
-    ).order_by('-created_at')
+    )
 
     # 🔹 فلترة حسب نوع العملية
     if action_filter:
@@ -65,21 +65,21 @@ def audit_logs_list(request):
     if user_filter and user_filter.isdigit():
         logs_qs = logs_qs.filter(actor__id=int(user_filter))
 
-    # 🔹 فلترة حسب التاريخ (من)
-    if date_from:
-        from_date = parse_date(date_from)
-        if from_date:
-            logs_qs = logs_qs.filter(created_at__date__gte=from_date)
+    # 🔹 فلترة حسب التاريخ (من / إلى) كنطاق على created_at ليستخدم الفهرس
+    logs_qs = filter_local_dates(
+        logs_qs,
+        parse_date(date_from) if date_from else None,
+        parse_date(date_to) if date_to else None,
+    )
 
-    # 🔹 فلترة حسب التاريخ (إلى)
-    if date_to:
-        to_date = parse_date(date_to)
-        if to_date:
-            logs_qs = logs_qs.filter(created_at__date__lte=to_date)
+    # 🔹 Keyset pagination على (created_at, id): بدون COUNT(*) و OFFSET
+    try:
+        page_obj = cursor_paginate(logs_qs, (request.GET.get('cursor') or '').strip() or None, 20)
+    except InvalidCursor:
+        page_obj = cursor_paginate(logs_qs, None, 20)
 
-    paginator = Paginator(logs_qs, 20)
-    page_number = (request.GET.get('page') or '').strip()
-    page_obj = paginator.get_page(page_number)
+    # العدد الكلي: دقيق حتى حد معين ثم تقدير المخطط (PostgreSQL)
+    total_count, total_is_estimate = estimated_count(logs_qs)
 
     # Build actions list for filter select using Arabic labels
     actions_list = [
@@ -96,6 +96,8 @@ def audit_logs_list(request):
 
     return render(request, 'accounts/audit_logs.html', {
         'page_obj': page_obj,
+        'total_count': total_count,
+        'total_is_estimate': total_is_estimate,
         'action_filter': action_filter,
         'user_filter': user_filter,
         'date_from': date_from,
@@ -127,46 +129,54 @@ def export_audit_logs_excel(request):
     if user_filter and user_filter.isdigit():
         logs_qs = logs_qs.filter(actor__id=int(user_filter))
 
-    if date_from:
-        from_date = parse_date(date_from)
-        if from_date:
-            logs_qs = logs_qs.filter(created_at__date__gte=from_date)
-
-    if date_to:
-        to_date = parse_date(date_to)
-        if to_date:
-            logs_qs = logs_qs.filter(created_at__date__lte=to_date)
-
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Audit Logs"
-
-    ws.append([
-        "التاريخ",
-        "المستخدم",
-        "العملية",
-        "المستهدف",
-        "العملية المرتبطة",
-        "التفاصيل"
-    ])
-
-    for log in logs_qs:
-        ws.append([
-            log.created_at.strftime("%Y-%m-%d %H:%M"),
-            str(log.actor) if log.actor else "-",
-            ACTION_LABELS.get(log.action, log.get_action_display()),
-            str(log.target_user) if log.target_user else "-",
-            str(log.transaction_id) if log.transaction_id else "-",
-            log.message
-        ])
-
-    response = HttpResponse(
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    # نفس فلترة شاشة السجل (نطاق أيام محلية على created_at)
+    logs_qs = filter_local_dates(
+        logs_qs,
+        parse_date(date_from) if date_from else None,
+        parse_date(date_to) if date_to else None,
     )
-    response["Content-Disposition"] = 'attachment; filename="audit_logs.xlsx"'
-    wb.save(response)
 
-    return response
+    action_labels = dict(AuditLog.Action.choices)
+    action_labels.update(ACTION_LABELS)
+
+    rows = logs_qs.values_list(
+        'created_at',
+        'actor__username',
+        'actor__role',
+        'action',
+        'target_user__username',
+        'target_user__role',
+        'transaction_id',
+        'message',
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+    def _user(username, role):
+        # Same text as str(User)
+        return f"{username} ({role})" if username else "-"
+
+    return xlsx_response(
+        "audit_logs.xlsx",
+        [
+            "التاريخ",
+            "المستخدم",
+            "العملية",
+            "المستهدف",
+            "العملية المرتبطة",
+            "التفاصيل"
+        ],
+        (
+            [
+                created_at.strftime("%Y-%m-%d %H:%M"),
+                _user(actor, actor_role),
+                action_labels.get(action, action),
+                _user(target, target_role),
+                str(transaction_id) if transaction_id else "-",
+                message,
+            ]
+            for created_at, actor, actor_role, action, target, target_role, transaction_id, message in rows
+        ),
+        title="Audit Logs",
+    )
 
 
 
@@ -189,15 +199,12 @@ def export_audit_logs_pdf(request):
     if user_filter and user_filter.isdigit():
         logs_qs = logs_qs.filter(actor__id=int(user_filter))
 
-    if date_from:
-        from_date = parse_date(date_from)
-        if from_date:
-            logs_qs = logs_qs.filter(created_at__date__gte=from_date)
-
-    if date_to:
-        to_date = parse_date(date_to)
-        if to_date:
-            logs_qs = logs_qs.filter(created_at__date__lte=to_date)
+    # نفس فلترة شاشة السجل (نطاق أيام محلية على created_at)
+    logs_qs = filter_local_dates(
+        logs_qs,
+        parse_date(date_from) if date_from else None,
+        parse_date(date_to) if date_to else None,
+    )
 
     response = HttpResponse(content_type='application/pdf')
     response['Content-Disposition'] = 'attachment; filename="audit_logs.pdf"'
@@ -1,34 +1,48 @@
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.db.models import Sum
+from django.utils import timezone
 from django.utils.dateparse import parse_date
 
-from apps.sales.models import Transaction
+from apps.core.api.pagination import filter_local_dates
+from apps.sales.models import DailySalesRollup, Transaction
 
 def is_admin(user):
     return user.is_authenticated and user.role == 'ADMIN'
 
 
+# All profit views count a sale on its sale day (local date of created_at),
+# the day DailySalesRollup files it under, so the dashboard and the exports
+# agree for sales confirmed on a later day.
+def _confirmed_sales(date_from, date_to):
+    return filter_local_dates(
+        Transaction.objects.filter(status='CONFIRMED'),
+        parse_date(date_from) if date_from else None,
+        parse_date(date_to) if date_to else None,
+    )
+
+
 @login_required
 @user_passes_test(is_admin)
 def profit_dashboard(request):
     date_from = request.GET.get('from', '')
     date_to = request.GET.get('to', '')
 
-    qs = Transaction.objects.filter(status='CONFIRMED')
+    # From the daily rollup: days are sale days (Transaction.created_at).
+    rollups = DailySalesRollup.objects.filter(status='CONFIRMED')
 
     if date_from:
         from_date = parse_date(date_from)
         if from_date:
-            qs = qs.filter(confirmed_at__date__gte=from_date)
+            rollups = rollups.filter(date__gte=from_date)
 
     if date_to:
         to_date = parse_date(date_to)
         if to_date:
-            qs = qs.filter(confirmed_at__date__lte=to_date)
+            rollups = rollups.filter(date__lte=to_date)
 
-    total_profit = qs.aggregate(
-        total=Sum('commission_amount')
+    total_profit = rollups.aggregate(
+        total=Sum('total_commission')
     )['total'] or 0
 
     return render(request, 'accounts/profit_dashboard.html', {
@@ -37,50 +51,34 @@ def profit_dashboard(request):
         'date_to': date_to,
     })
 
-from openpyxl import Workbook
 from django.http import HttpResponse
 
+from apps.core.utils.exports import EXPORT_CHUNK_SIZE, xlsx_response
+
 @login_required
 @user_passes_test(is_admin)
 def export_profit_excel(request):
     date_from = request.GET.get('from', '')
     date_to = request.GET.get('to', '')
 
-    qs = Transaction.objects.filter(status='CONFIRMED')
-
-    if date_from:
-        from_date = parse_date(date_from)
-        if from_date:
-            qs = qs.filter(confirmed_at__date__gte=from_date)
-
-    if date_to:
-        to_date = parse_date(date_to)
-        if to_date:
-            qs = qs.filter(confirmed_at__date__lte=to_date)
-
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Profit Report"
-
-    ws.append(["Date", "Commission (IQD)"])
-
-    for t in qs:
-        ws.append([
-            t.confirmed_at.strftime("%Y-%m-%d %H:%M"),
-            float(t.commission_amount)
-        ])
+    qs = _confirmed_sales(date_from, date_to)
 
     total_profit = qs.aggregate(total=Sum('commission_amount'))['total'] or 0
-    ws.append([])
-    ws.append(["TOTAL", float(total_profit)])
-
-    response = HttpResponse(
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    rows = (
+        qs.values_list('created_at', 'commission_amount')
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
     )
-    response["Content-Disposition"] = 'attachment; filename="profit_report.xlsx"'
 
-    wb.save(response)
-    return response
+    return xlsx_response(
+        "profit_report.xlsx",
+        ["Sale date", "Commission (IQD)"],
+        (
+            [timezone.localtime(created_at).strftime("%Y-%m-%d %H:%M"), float(commission)]
+            for created_at, commission in rows
+        ),
+        title="Profit Report",
+        footer=[[], ["TOTAL", float(total_profit)]],
+    )
 
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Table, TableStyle, Spacer
 from reportlab.lib.pagesizes import A4
@@ -93,17 +91,7 @@ def export_profit_pdf(request):
     date_from = request.GET.get('from', '')
     date_to = request.GET.get('to', '')
 
-    qs = Transaction.objects.filter(status='CONFIRMED')
-
-    if date_from:
-        from_date = parse_date(date_from)
-        if from_date:
-            qs = qs.filter(confirmed_at__date__gte=from_date)
-
-    if date_to:
-        to_date = parse_date(date_to)
-        if to_date:
-            qs = qs.filter(confirmed_at__date__lte=to_date)
+    qs = _confirmed_sales(date_from, date_to)
 
     total_profit = qs.aggregate(total=Sum('commission_amount'))['total'] or 0
 
@@ -117,11 +105,11 @@ def export_profit_pdf(request):
     elements.append(Paragraph("<b>Profit Report</b>", styles['Title']))
     elements.append(Spacer(1, 12))
 
-    table_data = [["Date", "Commission (IQD)"]]
+    table_data = [["Sale date", "Commission (IQD)"]]
 
-    for t in qs:
+    for t in qs.defer('code'):
         table_data.append([
-            t.confirmed_at.strftime("%Y-%m-%d %H:%M"),
+            timezone.localtime(t.created_at).strftime("%Y-%m-%d %H:%M"),
             f"{int(t.commission_amount):,}"
         ])
 
@@ -6,21 +6,14 @@ from django.utils import timezone
 from apps.sales.models import Transaction
 from apps.billing.models import AgentBalance
 from apps.accounts.models import AuditLog
-from apps.accounts.utils import get_system_setting
+from apps.accounts.services.audit import record_audit
+from apps.accounts.services.system_settings import get_int as get_int_setting
+from apps.sales.services.receipt_render import CUSTOMER, evict_receipt_on_commit, receipt_response
 import uuid
 from datetime import timedelta
 from django.shortcuts import redirect
 from django.contrib import messages
 
-try:
-    import qrcode
-    import base64
-    from io import BytesIO
-except ImportError:
-    qrcode = None
-    base64 = None
-    BytesIO = None
-
 
 @login_required
 def agent_dashboard(request):
@@ -34,7 +27,7 @@ def agent_dashboard(request):
 
     transactions_qs = Transaction.objects.filter(
         agent=agent
-    ).order_by('-created_at')
+    ).defer('code').order_by('-created_at')
 
     total_transactions = transactions_qs.count()
 
@@ -120,26 +113,8 @@ def agent_print_transaction(request, transaction_id):
 
 
 def customer_receipt_view(request, token):
-    transaction = get_object_or_404(
-        Transaction,
-        public_token=token,
-        status='CONFIRMED'
-    )
-
-    if transaction.receipt_expires_at and timezone.now() > transaction.receipt_expires_at:
-        return render(request, 'errors/receipt_expired.html')
-
-    receipt_url = request.build_absolute_uri()
-
-    qr = qrcode.make(receipt_url)
-    buffer = BytesIO()
-    qr.save(buffer, format='PNG')
-    qr_base64 = base64.b64encode(buffer.getvalue()).decode()
-
-    return render(request, 'accounts/customer_receipt.html', {
-        'transaction': transaction,
-        'qr_code': qr_base64,
-    })
+    # الصفحة (مع QR) تُبنى مرة لكل token/عدد إعادة الإصدار وتُخدم من الكاش
+    return receipt_response(request, token, CUSTOMER)
 
 
 @login_required
@@ -162,7 +137,7 @@ def agent_reissue_receipt(request, transaction_id):
             'errors/receipt_expired.html'
         )
 
-    max_limit = int(get_system_setting('MAX_RECEIPT_REISSUE', 3))
+    max_limit = get_int_setting('MAX_RECEIPT_REISSUE', 3)
 
     reissue_count = AuditLog.objects.filter(
         action='REISSUE_RECEIPT',
@@ -186,9 +161,13 @@ def agent_reissue_receipt(request, transaction_id):
 
     transaction.save()
 
-    AuditLog.objects.create(
+    evict_receipt_on_commit(old_token)
+
+    # durable: يُقرأ هذا السجل لاحتساب حد إعادة الإصدار
+    record_audit(
+        'REISSUE_RECEIPT',
+        durable=True,
         actor=agent,
-        action='REISSUE_RECEIPT',
         target_user=agent,
         transaction_id=transaction.public_token,
         message=(
@@ -220,7 +199,7 @@ def agent_reprint_receipt(request, transaction_id):
     transaction.receipt_reissue_count += 1
     transaction.save(update_fields=['receipt_reissue_count'])
 
-    AuditLog.objects.create(
+    record_audit(
         actor=request.user,
         action='REISSUE_RECEIPT',
         transaction_id=transaction.id,
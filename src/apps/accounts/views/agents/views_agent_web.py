@@ -2,18 +2,16 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.utils import timezone
-from django.db.models import Sum
+from django.db import transaction as db_transaction
 
 from apps.billing.models import AgentBalance
 from apps.sales.models import Transaction
 from apps.sales.models import RechargeDenomination
-from apps.accounts.models import AuditLog
+from apps.accounts.services.audit import record_audit
 from apps.commissions.services import get_commission_amount
-from apps.sales.services.receipt import build_receipt_payload, sign_receipt_payload
-from django.db import transaction as db_transaction
-from decimal import Decimal
+from apps.sales.services.rollup import agent_day_summary, record_confirmation
+from apps.sales.services.selling import SaleError, sell_one
 from django.utils import timezone
-import uuid
 from apps.sales.models import TelecomCompany
 
 
@@ -25,21 +23,16 @@ def agent_dashboard_view(request):
     balance_obj = AgentBalance.objects.filter(agent=agent).first()
     balance = balance_obj.balance if balance_obj else 0
 
-    # today's summary
-    now = timezone.now()
-    start_of_day = now.replace(hour=0, minute=0, second=0, microsecond=0)
-
-    summary_qs = Transaction.objects.filter(
-        agent=agent,
-        created_at__gte=start_of_day
-    )
+    # today's summary (from the daily rollup)
+    today = timezone.localdate()
+    day = agent_day_summary(agent, today)
 
     summary = {
-        'date': start_of_day.date(),
-        'total_amount': summary_qs.aggregate(total=Sum('price')).get('total') or 0,
-        'total_transactions': summary_qs.count(),
-        'confirmed_count': summary_qs.filter(status='CONFIRMED').count(),
-        'printed_count': summary_qs.filter(status='PRINTED').count(),
+        'date': today,
+        'total_amount': day['total_amount'],
+        'total_transactions': day['total_transactions'],
+        'confirmed_count': day['confirmed_count'],
+        'printed_count': day['printed_count'],
     }
 
     return render(
@@ -60,6 +53,7 @@ def agent_transactions_view(request):
         Transaction.objects
         .filter(agent=agent)
         .select_related('company', 'denomination')
+        .defer('code')
         .order_by('-created_at')
     )
 
@@ -90,46 +84,14 @@ def agent_sell_view(request):
             messages.error(request, 'فئة الشحن غير موجودة')
             return redirect('agent_sell')
 
-        price = Decimal(denom.price_to_agent)
-
-        with db_transaction.atomic():
-            try:
-                balance = AgentBalance.objects.select_for_update().get(agent=agent)
-            except AgentBalance.DoesNotExist:
+        try:
+            sell_one(agent, denom)
+        except SaleError as exc:
+            if exc.code == 'BALANCE_NOT_FOUND':
                 messages.error(request, 'رصيدك غير متوفر')
-                return redirect('agent_sell')
-
-            if balance.balance < price:
-                messages.error(request, 'رصيدك غير كافٍ')
-                return redirect('agent_sell')
-
-            balance.balance -= price
-            balance.save(update_fields=['balance'])
-
-            recharge_code = f"{denom.company.code}-{uuid.uuid4().hex[:12]}"
-
-            tx = Transaction.objects.create(
-                agent=agent,
-                company=denom.company,
-                denomination=denom,
-                price=price,
-                code=recharge_code,
-                status='PRINTED',
-                commission_amount=Decimal('0.00')
-            )
-
-            payload = build_receipt_payload(tx)
-            tx.receipt_payload = payload
-            tx.receipt_hmac = sign_receipt_payload(tx, payload)
-            tx.receipt_hmac_created_at = timezone.now()
-            tx.save(update_fields=['receipt_payload', 'receipt_hmac', 'receipt_hmac_created_at'])
-
-            AuditLog.objects.create(
-                actor=agent,
-                action='SELL',
-                transaction_id=tx.id,
-                message=f"تم بيع {denom.company.name_ar} فئة {denom.value}"
-            )
+            else:
+                messages.error(request, exc.message)
+            return redirect('agent_sell')
 
         messages.success(request, 'تمت عملية البيع')
         return redirect('agent_transactions')
@@ -170,33 +132,35 @@ def agent_sell_view(request):
 def agent_confirm_transaction(request, transaction_id):
     agent = request.user
 
-    try:
-        tx = Transaction.objects.get(id=transaction_id, agent=agent)
-    except Transaction.DoesNotExist:
-        messages.error(request, "العملية غير موجودة")
-        return redirect('agent-transactions')
-
-    if tx.status != 'PRINTED':
-        messages.error(request, 'لا يمكن تأكيد هذه العملية')
-        return redirect('agent-transactions')
-
-    commission = get_commission_amount(
-        agent=agent,
-        company=tx.company,
-        denomination=tx.denomination,
-    )
-
-    tx.commission_amount = commission
-    tx.status = 'CONFIRMED'
-    tx.confirmed_at = timezone.now()
-    tx.save()
-
-    AuditLog.objects.create(
-        actor=agent,
-        action='CONFIRM',
-        transaction_id=tx.id,
-        message='تم تأكيد العملية عبر واجهة الويب'
-    )
+    with db_transaction.atomic():
+        try:
+            tx = Transaction.objects.select_for_update().get(id=transaction_id, agent=agent)
+        except Transaction.DoesNotExist:
+            messages.error(request, "العملية غير موجودة")
+            return redirect('agent-transactions')
+
+        if tx.status != 'PRINTED':
+            messages.error(request, 'لا يمكن تأكيد هذه العملية')
+            return redirect('agent-transactions')
+
+        commission = get_commission_amount(
+            agent=agent,
+            company=tx.company,
+            denomination=tx.denomination,
+        )
+
+        tx.commission_amount = commission
+        tx.status = 'CONFIRMED'
+        tx.confirmed_at = timezone.now()
+        tx.save()
+        record_confirmation(tx)
+
+        record_audit(
+            actor=agent,
+            action='CONFIRM',
+            transaction_id=tx.id,
+            message='تم تأكيد العملية عبر واجهة الويب'
+        )
 
     messages.success(request, 'تم تأكيد العملية بنجاح')
     return redirect('agent-transactions')
@@ -215,7 +179,7 @@ def agent_reprint_transaction(request, transaction_id):
     tx.receipt_reissue_count += 1
     tx.save(update_fields=['receipt_reissue_count'])
 
-    AuditLog.objects.create(
+    record_audit(
         actor=agent,
         action='REISSUE_RECEIPT',
         transaction_id=tx.id,
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Price, AgentBalance
+from .models import Price, AgentBalance, BalanceLedgerEntry
 
 @admin.register(Price)
 class PriceAdmin(admin.ModelAdmin):
@@ -11,3 +11,20 @@ class PriceAdmin(admin.ModelAdmin):
 class AgentBalanceAdmin(admin.ModelAdmin):
     list_display = ('agent', 'balance', 'updated_at')
     search_fields = ('agent__username',)
+    # Balance changes go through apps.billing.services (ledger).
+    readonly_fields = ('balance', 'updated_at')
+
+
+@admin.register(BalanceLedgerEntry)
+class BalanceLedgerEntryAdmin(admin.ModelAdmin):
+    list_display = ('agent', 'delta', 'reason', 'transaction', 'actor', 'created_at')
+    list_filter = ('reason',)
+    search_fields = ('agent__username',)
+    raw_id_fields = ('agent', 'transaction', 'actor')
+
+    # سجل إضافة فقط
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -5,7 +5,8 @@ from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
 
-from apps.billing.models import AgentBalance
+from apps.billing.models import AgentBalance, BalanceLedgerEntry
+from apps.billing.services import InsufficientBalance, apply_balance_delta
 from apps.accounts.models import User
 from apps.accounts.permissions import IsAdmin
 
@@ -44,26 +45,28 @@ class AdjustAgentBalanceAPIView(APIView):
                 status.HTTP_404_NOT_FOUND
             )
 
-        balance_obj, _ = AgentBalance.objects.get_or_create(agent=agent)
-        new_balance = balance_obj.balance + amount
-
-        if new_balance < 0:
+        try:
+            new_balance = apply_balance_delta(
+                agent,
+                amount,
+                reason=BalanceLedgerEntry.Reason.ADJUSTMENT,
+                actor=request.user,
+                create_missing=True,
+            )
+        except InsufficientBalance:
             return api_response(
                 'NEGATIVE_BALANCE_NOT_ALLOWED',
                 MESSAGES['NEGATIVE_BALANCE_NOT_ALLOWED'],
                 status.HTTP_400_BAD_REQUEST
             )
 
-        balance_obj.balance = new_balance
-        balance_obj.save()
-
         return api_response(
             'BALANCE_UPDATED',
             MESSAGES['BALANCE_UPDATED'],
             status.HTTP_200_OK,
             data={
                 'agent': agent.username,
-                'new_balance': str(balance_obj.balance)
+                'new_balance': str(new_balance)
             }
         )
 class AgentBalanceDetailAPIView(APIView):
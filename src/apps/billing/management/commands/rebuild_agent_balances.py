@@ -0,0 +1,104 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from apps.billing.models import AgentBalance, BalanceLedgerEntry
+
+
+class Command(BaseCommand):
+    help = (
+        "إعادة بناء AgentBalance من سجل الحركات (BalanceLedgerEntry). "
+        "Run while sales are paused: balances changed during the rebuild are overwritten."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--agent", type=int, action="append", help="Agent id (repeatable)")
+        parser.add_argument("--batch-size", type=int, default=5000, help="Ledger rows per fetch")
+        parser.add_argument("--dry-run", action="store_true", help="Only report mismatches")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        dry_run = options["dry_run"]
+
+        entries = BalanceLedgerEntry.objects.order_by("agent_id", "id")
+        balances = AgentBalance.objects.all()
+        if options["agent"]:
+            entries = entries.filter(agent_id__in=options["agent"])
+            balances = balances.filter(agent_id__in=options["agent"])
+
+        # Streams the ledger once, ordered by agent, holding one running total at a time.
+        totals = {}
+        pending = {}
+        current_agent, running = None, Decimal("0")
+
+        for agent_id, delta in entries.values_list("agent_id", "delta").iterator(chunk_size=batch_size):
+            if agent_id != current_agent:
+                if current_agent is not None:
+                    pending[current_agent] = running
+                current_agent, running = agent_id, Decimal("0")
+            running += delta
+
+            if len(pending) >= batch_size:
+                totals.update(self._flush(pending, dry_run))
+                pending = {}
+
+        if current_agent is not None:
+            pending[current_agent] = running
+        totals.update(self._flush(pending, dry_run))
+
+        # Agents with a balance row but no ledger history rebuild to zero.
+        # (NOT EXISTS subquery: no IN list of every agent id seen above.)
+        orphans = (
+            balances
+            .exclude(Exists(BalanceLedgerEntry.objects.filter(agent_id=OuterRef("agent_id"))))
+            .values_list("agent_id", flat=True)
+        )
+        pending = {}
+        for agent_id in orphans.iterator(chunk_size=batch_size):
+            pending[agent_id] = Decimal("0")
+            if len(pending) >= batch_size:
+                totals.update(self._flush(pending, dry_run))
+                pending = {}
+        totals.update(self._flush(pending, dry_run))
+
+        changed = sum(1 for was_changed in totals.values() if was_changed)
+        prefix = "[dry-run] " if dry_run else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}Rebuilt {len(totals)} agent balance(s), {changed} changed."
+        ))
+
+    def _flush(self, rebuilt, dry_run):
+        """Write one batch of {agent_id: balance}; returns {agent_id: changed}."""
+        if not rebuilt:
+            return {}
+
+        current = {
+            agent_id: (pk, balance)
+            for pk, agent_id, balance in AgentBalance.objects
+            .filter(agent_id__in=list(rebuilt))
+            .values_list("id", "agent_id", "balance")
+        }
+        result = {}
+        to_update, to_create = [], []
+        now = timezone.now()
+
+        for agent_id, balance in rebuilt.items():
+            pk, old = current.get(agent_id, (None, None))
+            result[agent_id] = old != balance
+            if old == balance:
+                continue
+            if pk is None:
+                to_create.append(AgentBalance(agent_id=agent_id, balance=balance))
+            else:
+                self.stdout.write(f"agent {agent_id}: {old} -> {balance}")
+                to_update.append(AgentBalance(id=pk, balance=balance, updated_at=now))
+
+        if not dry_run and (to_update or to_create):
+            with transaction.atomic():
+                AgentBalance.objects.bulk_update(to_update, ["balance", "updated_at"])
+                AgentBalance.objects.bulk_create(to_create)
+
+        return result
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from apps.billing.services import take_balance_snapshots
+
+
+class Command(BaseCommand):
+    help = "حفظ لقطة لرصيد كل وكيل تغيّر رصيده منذ آخر لقطة (يُشغَّل دوريًا عبر cron)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--agent", type=int, action="append", help="Agent id (repeatable)")
+        parser.add_argument(
+            "--settle-seconds",
+            type=int,
+            default=60,
+            help="Skip ledger entries younger than this (default: 60)",
+        )
+
+    def handle(self, *args, **options):
+        written = take_balance_snapshots(
+            agent_ids=options["agent"],
+            settle_seconds=options["settle_seconds"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} balance snapshot(s)."))
@@ -0,0 +1,74 @@
+# Generated by Django 5.2.10 on 2026-10-18 07:52
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_opening_entries(apps, schema_editor):
+    """Seed the ledger with each agent's current balance so sum(delta) == balance."""
+    AgentBalance = apps.get_model("billing", "AgentBalance")
+    BalanceLedgerEntry = apps.get_model("billing", "BalanceLedgerEntry")
+
+    batch = []
+    for agent_id, balance in AgentBalance.objects.exclude(balance=0).values_list("agent_id", "balance").iterator():
+        batch.append(BalanceLedgerEntry(agent_id=agent_id, delta=balance, reason="OPENING", note="Opening balance"))
+        if len(batch) >= 1000:
+            BalanceLedgerEntry.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        BalanceLedgerEntry.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('billing', '0001_initial'),
+        ('sales', '0004_transaction_receipt_hmac'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BalanceLedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('delta', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('reason', models.CharField(choices=[('OPENING', 'Opening Balance'), ('SALE', 'Sale'), ('REFUND', 'Refund'), ('ADJUSTMENT', 'Admin Adjustment')], max_length=20)),
+                ('note', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+                ('actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='balance_ledger_actions', to=settings.AUTH_USER_MODEL)),
+                ('agent', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_ledger', to=settings.AUTH_USER_MODEL)),
+                ('transaction', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ledger_entries', to='sales.transaction')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='BalanceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('as_of', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('agent', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_snapshots', to=settings.AUTH_USER_MODEL)),
+                ('last_entry', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='billing.balanceledgerentry')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='balanceledgerentry',
+            index=models.Index(fields=['agent', 'id'], name='billing_bal_agent_i_650e2a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='balanceledgerentry',
+            index=models.Index(fields=['agent', 'created_at'], name='billing_bal_agent_i_2a1ba8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='balancesnapshot',
+            index=models.Index(fields=['agent', 'as_of'], name='billing_bal_agent_i_b882a8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='balancesnapshot',
+            index=models.Index(fields=['agent', 'last_entry'], name='billing_bal_agent_i_d17da4_idx'),
+        ),
+        migrations.RunPython(create_opening_entries, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 class Price(models.Model):
     COMPANY_CHOICES = (
@@ -34,6 +35,83 @@ class AgentBalance(models.Model):
     def __str__(self):
         return f"{self.agent.username} - Balance: {self.balance}"
 
+
+class BalanceLedgerEntry(models.Model):
+    """
+    سجل حركات الرصيد (إضافة فقط - لا تعديل ولا حذف)
+    Written by apps.billing.services for every balance change.
+    """
+
+    class Reason(models.TextChoices):
+        OPENING = "OPENING", "Opening Balance"
+        SALE = "SALE", "Sale"
+        REFUND = "REFUND", "Refund"
+        ADJUSTMENT = "ADJUSTMENT", "Admin Adjustment"
+
+    agent = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='balance_ledger'
+    )
+    delta = models.DecimalField(max_digits=15, decimal_places=2)
+    reason = models.CharField(max_length=20, choices=Reason.choices)
+    transaction = models.ForeignKey(
+        'sales.Transaction',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='ledger_entries'
+    )
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='balance_ledger_actions'
+    )
+    note = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["agent", "id"]),
+            models.Index(fields=["agent", "created_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.agent_id} {self.reason} {self.delta}"
+
+
+class BalanceSnapshot(models.Model):
+    """
+    رصيد الوكيل بعد حركة معيّنة في السجل (لتسريع حساب الرصيد في أي لحظة)
+    balance = sum(delta) of the agent's ledger entries up to and including last_entry.
+    """
+
+    agent = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='balance_snapshots'
+    )
+    balance = models.DecimalField(max_digits=15, decimal_places=2)
+    last_entry = models.ForeignKey(
+        BalanceLedgerEntry,
+        on_delete=models.PROTECT,
+        related_name='+'
+    )
+    # created_at of last_entry: the point in time this balance is valid from.
+    as_of = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["agent", "as_of"]),
+            models.Index(fields=["agent", "last_entry"]),
+        ]
+
+    def __str__(self):
+        return f"{self.agent_id} @ {self.as_of}: {self.balance}"
+
 class Company(models.Model):
     name = models.CharField(max_length=100)
     logo = models.ImageField(upload_to='companies/')
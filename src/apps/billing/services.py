@@ -0,0 +1,286 @@
+"""Agent balance service.
+
+Every balance mutation goes through `apply_balance_delta` (or the `debit` /
+`credit` helpers). Each change is one conditional UPDATE:
+
+    UPDATE billing_agentbalance
+       SET balance = balance + :delta, updated_at = :now
+     WHERE agent_id = :agent AND balance + :delta >= 0
+    RETURNING balance
+
+so there is no read-modify-write in Python (no lost updates between a sale
+and an admin top-up) and no SELECT ... FOR UPDATE round trip before it.
+Backends without UPDATE ... RETURNING fall back to a filtered
+`.update(F(...))` followed by a read inside the same transaction.
+
+Each change also appends typed BalanceLedgerEntry rows in the same DB
+transaction. `take_balance_snapshots` (run periodically by the
+`snapshot_balances` command) materializes running balances so
+`balance_at` only sums the entries after the nearest snapshot.
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+from typing import Iterable, List, Optional
+
+from django.db import connection, transaction as db_transaction
+from django.db.models import F, Max, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.billing.models import AgentBalance, BalanceLedgerEntry, BalanceSnapshot
+
+ZERO = Decimal("0")
+CENT = Decimal("0.01")
+
+
+class BalanceError(Exception):
+    """Base class for balance mutation errors; `code` matches api MESSAGES keys."""
+
+    code = "BALANCE_ERROR"
+    default_message = "تعذر تعديل الرصيد"
+
+    def __init__(self, message: Optional[str] = None):
+        self.message = message or self.default_message
+        super().__init__(self.message)
+
+
+class BalanceNotFound(BalanceError):
+    code = "BALANCE_NOT_FOUND"
+    default_message = "لا يوجد رصيد لهذا الوكيل"
+
+
+class InsufficientBalance(BalanceError):
+    code = "INSUFFICIENT_BALANCE"
+    default_message = "رصيدك غير كافٍ"
+
+
+def _supports_update_returning() -> bool:
+    # PostgreSQL and SQLite >= 3.35 support UPDATE ... RETURNING (MySQL/MariaDB don't).
+    return connection.vendor in ("postgresql", "sqlite") and connection.features.can_return_columns_from_insert
+
+
+def _to_decimal(value) -> Decimal:
+    if isinstance(value, Decimal):
+        return value
+    return Decimal(str(value)).quantize(CENT)
+
+
+def _update_returning(agent_id, delta: Decimal, now) -> Optional[Decimal]:
+    meta = AgentBalance._meta
+    qn = connection.ops.quote_name
+    table = qn(meta.db_table)
+    balance = qn(meta.get_field("balance").column)
+    updated_at = qn(meta.get_field("updated_at").column)
+    agent = qn(meta.get_field("agent").column)
+
+    sql = (
+        f"UPDATE {table} SET {balance} = {balance} + %s, {updated_at} = %s "
+        f"WHERE {agent} = %s AND {balance} + %s >= 0 "
+        f"RETURNING {balance}"
+    )
+    params = [
+        connection.ops.adapt_decimalfield_value(delta),
+        connection.ops.adapt_datetimefield_value(now),
+        agent_id,
+        connection.ops.adapt_decimalfield_value(delta),
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+    return _to_decimal(row[0]) if row else None
+
+
+def _update_fallback(agent_id, delta: Decimal, now) -> Optional[Decimal]:
+    qs = AgentBalance.objects.filter(agent_id=agent_id)
+    if delta < 0:
+        qs = qs.filter(balance__gte=-delta)
+
+    with db_transaction.atomic():
+        if not qs.update(balance=F("balance") + delta, updated_at=now):
+            return None
+        # The row is locked by our UPDATE until commit, so this read is ours.
+        return AgentBalance.objects.filter(agent_id=agent_id).values_list("balance", flat=True).get()
+
+
+def _apply(agent_id, delta: Decimal) -> Optional[Decimal]:
+    now = timezone.now()
+    if _supports_update_returning():
+        return _update_returning(agent_id, delta, now)
+    return _update_fallback(agent_id, delta, now)
+
+
+def _apply_and_record(agent_id, delta: Decimal, entries: List[BalanceLedgerEntry]) -> Optional[Decimal]:
+    # savepoint=False: nothing in here raises on the business-failure path.
+    with db_transaction.atomic(savepoint=False):
+        new_balance = _apply(agent_id, delta)
+        if new_balance is not None:
+            BalanceLedgerEntry.objects.bulk_create(entries)
+    return new_balance
+
+
+def _change_balance(agent, delta: Decimal, entries: List[BalanceLedgerEntry], *, create_missing: bool) -> Decimal:
+    agent_id = getattr(agent, "pk", agent)
+
+    new_balance = _apply_and_record(agent_id, delta, entries)
+    if new_balance is not None:
+        return new_balance
+
+    # Slow path (failure or first top-up): find out why nothing was updated.
+    if AgentBalance.objects.filter(agent_id=agent_id).exists():
+        raise InsufficientBalance()
+    if not create_missing:
+        raise BalanceNotFound()
+    if delta < ZERO:
+        raise InsufficientBalance()
+
+    AgentBalance.objects.get_or_create(agent_id=agent_id)
+    new_balance = _apply_and_record(agent_id, delta, entries)
+    if new_balance is None:
+        raise InsufficientBalance()
+    return new_balance
+
+
+def apply_balance_delta(
+    agent,
+    delta,
+    *,
+    reason: str,
+    actor=None,
+    transaction=None,
+    note: str = "",
+    create_missing: bool = False,
+) -> Decimal:
+    """Add `delta` (may be negative) to the agent's balance; return the new balance.
+
+    Raises InsufficientBalance if the result would go below zero, and
+    BalanceNotFound if the agent has no balance row (unless `create_missing`).
+    """
+    delta = Decimal(delta)
+    entry = BalanceLedgerEntry(
+        agent_id=getattr(agent, "pk", agent),
+        delta=delta,
+        reason=reason,
+        transaction=transaction,
+        actor=actor,
+        note=note[:255],
+    )
+    return _change_balance(agent, delta, [entry], create_missing=create_missing)
+
+
+def debit(agent, amount, *, reason: str = BalanceLedgerEntry.Reason.SALE, transaction=None, actor=None, note: str = "") -> Decimal:
+    """Take `amount` from the agent's balance, only if it is covered."""
+    return apply_balance_delta(
+        agent, -Decimal(amount), reason=reason, transaction=transaction, actor=actor, note=note
+    )
+
+
+def credit(agent, amount, *, reason: str = BalanceLedgerEntry.Reason.ADJUSTMENT, transaction=None, actor=None, note: str = "") -> Decimal:
+    """Add `amount` to the agent's balance, creating the balance row if needed."""
+    return apply_balance_delta(
+        agent, Decimal(amount), reason=reason, transaction=transaction, actor=actor, note=note,
+        create_missing=True,
+    )
+
+
+def debit_transactions(agent, transactions: Iterable) -> Decimal:
+    """Debit the total price of saved `transactions` in one UPDATE, one ledger entry per sale."""
+    agent_id = getattr(agent, "pk", agent)
+    entries = [
+        BalanceLedgerEntry(
+            agent_id=agent_id,
+            delta=-Decimal(tx.price),
+            reason=BalanceLedgerEntry.Reason.SALE,
+            transaction=tx,
+            actor_id=agent_id,
+        )
+        for tx in transactions
+    ]
+    total = sum((entry.delta for entry in entries), ZERO)
+    return _change_balance(agent, total, entries, create_missing=False)
+
+
+# ==========================
+# 📒 Snapshots / point-in-time balance
+# ==========================
+
+def take_balance_snapshots(*, agent_ids=None, settle_seconds: int = 60) -> int:
+    """Write a BalanceSnapshot for every agent with ledger entries since its last snapshot.
+
+    Entries younger than `settle_seconds` are left for the next run: ids are
+    allocated before COMMIT, so a very recent id range may still have gaps
+    that an in-flight transaction is about to fill.
+    Returns the number of snapshots written.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settle_seconds)
+    latest = (
+        BalanceSnapshot.objects
+        .filter(agent_id=OuterRef("agent_id"))
+        .order_by("-last_entry_id")
+    )
+    settled = (
+        BalanceLedgerEntry.objects
+        .filter(agent_id=OuterRef("agent_id"), created_at__lte=cutoff)
+        .order_by("-id")
+    )
+    # One grouped query: per agent, the entries in (latest snapshot, newest
+    # settled entry], their sum and the newest one's created_at. Agents with
+    # nothing new are not returned.
+    agents = (
+        BalanceLedgerEntry.objects
+        .alias(
+            snap_entry=Coalesce(Subquery(latest.values("last_entry_id")[:1]), 0),
+            settled_id=Subquery(settled.values("id")[:1]),
+        )
+        .filter(id__gt=F("snap_entry"), id__lte=F("settled_id"))
+        .values("agent_id")
+        .annotate(
+            last_id=Max("id"),
+            tail=Sum("delta"),
+            snap_balance=Subquery(latest.values("balance")[:1]),
+            # last_id is the newest settled entry itself
+            as_of=Subquery(settled.values("created_at")[:1]),
+        )
+        .order_by("agent_id")
+    )
+    if agent_ids is not None:
+        agents = agents.filter(agent_id__in=agent_ids)
+
+    written = 0
+    batch = []
+    for row in agents.iterator(chunk_size=500):
+        batch.append(BalanceSnapshot(
+            agent_id=row["agent_id"],
+            balance=(row["snap_balance"] or ZERO) + row["tail"],
+            last_entry_id=row["last_id"],
+            as_of=row["as_of"],
+        ))
+        if len(batch) >= 500:
+            BalanceSnapshot.objects.bulk_create(batch)
+            written += len(batch)
+            batch = []
+
+    if batch:
+        BalanceSnapshot.objects.bulk_create(batch)
+        written += len(batch)
+    return written
+
+
+def balance_at(agent, at) -> Decimal:
+    """Agent balance at time `at`: nearest snapshot + entries after it (up to `at`)."""
+    agent_id = getattr(agent, "pk", agent)
+
+    snapshot = (
+        BalanceSnapshot.objects
+        .filter(agent_id=agent_id, as_of__lte=at)
+        .order_by("-last_entry_id")
+        .values("balance", "last_entry_id")
+        .first()
+    )
+    entries = BalanceLedgerEntry.objects.filter(agent_id=agent_id, created_at__lte=at)
+    base = ZERO
+    if snapshot:
+        base = snapshot["balance"]
+        entries = entries.filter(id__gt=snapshot["last_entry_id"])
+
+    return base + (entries.aggregate(total=Sum("delta"))["total"] or ZERO)
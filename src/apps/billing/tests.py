@@ -1,3 +1,104 @@
-from django.test import TestCase
+import threading
+from decimal import Decimal
+from unittest import skipIf
 
-# Create your tests here.
+from django.db import close_old_connections, connection
+from django.test import TestCase, TransactionTestCase
+
+from apps.accounts.models import User
+from apps.billing.models import AgentBalance, BalanceLedgerEntry
+from apps.billing.services import BalanceNotFound, InsufficientBalance, credit, debit
+
+
+def _agent(username="agent1"):
+    # post_save على User ينشئ AgentBalance للوكيل
+    return User.objects.create(username=username, role=User.Role.AGENT)
+
+
+def _balance(agent) -> Decimal:
+    return AgentBalance.objects.get(agent=agent).balance
+
+
+class BalanceDebitTests(TestCase):
+    def setUp(self):
+        self.agent = _agent()
+        credit(self.agent, "100.00")
+
+    def test_debit_returns_new_balance_and_records_entry(self):
+        self.assertEqual(debit(self.agent, "30.00"), Decimal("70.00"))
+        self.assertEqual(_balance(self.agent), Decimal("70.00"))
+        self.assertEqual(
+            list(BalanceLedgerEntry.objects.filter(agent=self.agent).order_by("id").values_list("delta", "reason")),
+            [
+                (Decimal("100.00"), BalanceLedgerEntry.Reason.ADJUSTMENT),
+                (Decimal("-30.00"), BalanceLedgerEntry.Reason.SALE),
+            ],
+        )
+
+    def test_debit_of_whole_balance_is_allowed(self):
+        self.assertEqual(debit(self.agent, "100.00"), Decimal("0.00"))
+
+    def test_insufficient_balance_changes_nothing(self):
+        with self.assertRaises(InsufficientBalance) as ctx:
+            debit(self.agent, "100.01")
+
+        self.assertEqual(ctx.exception.code, "INSUFFICIENT_BALANCE")
+        self.assertEqual(_balance(self.agent), Decimal("100.00"))
+        self.assertEqual(BalanceLedgerEntry.objects.filter(agent=self.agent).count(), 1)
+
+    def test_second_debit_sees_first_one(self):
+        # بدون قراءة ثم كتابة في Python: الخصم الثاني يُقارن بالرصيد بعد الأول
+        debit(self.agent, "70.00")
+        with self.assertRaises(InsufficientBalance):
+            debit(self.agent, "70.00")
+        self.assertEqual(_balance(self.agent), Decimal("30.00"))
+
+    def test_debit_without_balance_row(self):
+        agent = _agent("agent2")
+        AgentBalance.objects.filter(agent=agent).delete()
+
+        with self.assertRaises(BalanceNotFound):
+            debit(agent, "1.00")
+        self.assertFalse(BalanceLedgerEntry.objects.filter(agent=agent).exists())
+
+    def test_credit_creates_missing_balance_row(self):
+        agent = _agent("agent2")
+        AgentBalance.objects.filter(agent=agent).delete()
+
+        self.assertEqual(credit(agent, "5.00"), Decimal("5.00"))
+        self.assertEqual(_balance(agent), Decimal("5.00"))
+
+
+@skipIf(connection.vendor == "sqlite", "the SQLite test database fails concurrent writers (table locked) instead of queueing them")
+class BalanceDebitRaceTests(TransactionTestCase):
+    def test_concurrent_debits_never_overdraw(self):
+        agent = _agent()
+        credit(agent, "100.00")
+
+        workers = 8
+        barrier = threading.Barrier(workers)
+        results = []
+
+        def worker():
+            try:
+                barrier.wait()
+                debit(agent.pk, "30.00")
+                results.append("ok")
+            except InsufficientBalance:
+                results.append("insufficient")
+            finally:
+                close_old_connections()
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results.count("ok"), 3)
+        self.assertEqual(results.count("insufficient"), workers - 3)
+        self.assertEqual(_balance(agent), Decimal("10.00"))
+        self.assertEqual(
+            BalanceLedgerEntry.objects.filter(agent=agent, reason=BalanceLedgerEntry.Reason.SALE).count(), 3
+        )
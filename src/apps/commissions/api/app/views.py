@@ -4,7 +4,6 @@ from rest_framework import status
 
 from apps.accounts.permissions import IsAgent
 from apps.commissions.services import get_commission_amount
-from apps.commissions.models import Company
 from apps.core.api.utils import api_response
 
 
@@ -25,9 +24,6 @@ class AppEffectiveCommissionAPIView(APIView):
 
         agent = request.user
 
-        # Resolve company code to Company record used by commissions app
-        company, _ = Company.objects.get_or_create(code=company_code)
-
-        amount = get_commission_amount(agent, company, denom_value)
+        amount = get_commission_amount(agent, company_code, denom_value)
 
         return api_response("SUCCESS", "OK", status.HTTP_200_OK, data={"amount": str(amount)})
@@ -3,7 +3,8 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
 
 from apps.accounts.permissions import IsAdmin, IsAdminOrAgent
-from apps.commissions.models import DefaultCommission, AgentCommission, Company
+from apps.commissions.models import DefaultCommission, AgentCommission
+from apps.commissions.services import get_commission_matrix
 from apps.core.api.utils import api_response
 
 
@@ -43,20 +44,12 @@ class WebEffectiveCommissionAPIView(APIView):
         except (TypeError, ValueError):
             return api_response("INVALID_INPUT", "denomination must be integer", status.HTTP_400_BAD_REQUEST)
 
-        company, _ = Company.objects.get_or_create(code=company_code)
-
-        # Find agent-specific first
         agent = request.user if getattr(request.user, "is_authenticated", False) and getattr(request.user, "role", None) == "AGENT" else None
 
-        # Try agent override
-        if agent:
-            ac = AgentCommission.objects.filter(agent=agent, company=company, denomination=denom_value, is_active=True).first()
-            if ac:
-                return api_response("SUCCESS", "OK", status.HTTP_200_OK, data={"amount": str(ac.amount)})
-
-        dc = DefaultCommission.objects.filter(company=company, denomination=denom_value, is_active=True).first()
-        if dc:
-            return api_response("SUCCESS", "OK", status.HTTP_200_OK, data={"amount": str(dc.amount)})
+        # Agent override first, then default
+        amount = get_commission_matrix().lookup(agent.pk if agent else None, company_code, denom_value)
+        if amount is not None:
+            return api_response("SUCCESS", "OK", status.HTTP_200_OK, data={"amount": str(amount)})
 
         return api_response("NOT_FOUND", "No commission found", status.HTTP_404_NOT_FOUND)
 
@@ -0,0 +1,76 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.commissions.services import resolve_commissions
+from apps.sales.models import Transaction
+from apps.sales.services.rollup import rebuild_rollup
+
+
+class Command(BaseCommand):
+    help = "إعادة احتساب عمولات العمليات المؤكدة حسب جدول العمولات الحالي"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from", dest="date_from", help="YYYY-MM-DD")
+        parser.add_argument("--to", dest="date_to", help="YYYY-MM-DD")
+        parser.add_argument("--agent", type=int, help="Agent id")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--dry-run", action="store_true")
+
+    def _parse_date(self, value):
+        try:
+            return datetime.strptime(value, "%Y-%m-%d").date()
+        except ValueError:
+            raise CommandError(f"Invalid date: {value}")
+
+    def handle(self, *args, **options):
+        qs = Transaction.objects.filter(status="CONFIRMED")
+
+        if options["date_from"]:
+            qs = qs.filter(created_at__date__gte=self._parse_date(options["date_from"]))
+        if options["date_to"]:
+            qs = qs.filter(created_at__date__lte=self._parse_date(options["date_to"]))
+        if options["agent"]:
+            qs = qs.filter(agent_id=options["agent"])
+
+        batch_size = options["batch_size"]
+        rows = qs.order_by("id").values("id", "agent_id", "company_id", "denomination_id", "commission_amount")
+
+        scanned = changed = 0
+        batch = []
+
+        def flush(batch):
+            amounts = resolve_commissions(batch)
+            updates = [
+                Transaction(id=row["id"], commission_amount=amounts[row["id"]])
+                for row in batch
+                if amounts[row["id"]] != row["commission_amount"]
+            ]
+            if updates and not options["dry_run"]:
+                with transaction.atomic():
+                    Transaction.objects.bulk_update(updates, ["commission_amount"])
+            return len(updates)
+
+        for row in rows.iterator(chunk_size=batch_size):
+            batch.append(row)
+            scanned += 1
+            if len(batch) >= batch_size:
+                changed += flush(batch)
+                batch = []
+
+        if batch:
+            changed += flush(batch)
+
+        if changed and not options["dry_run"]:
+            # Commission sums in the daily rollup are now stale for this range.
+            rebuild_rollup(
+                self._parse_date(options["date_from"]) if options["date_from"] else None,
+                self._parse_date(options["date_to"]) if options["date_to"] else None,
+                agent_id=options["agent"] or None,
+            )
+
+        prefix = "[dry-run] " if options["dry_run"] else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}Scanned {scanned} transactions, {changed} commission(s) changed."
+        ))
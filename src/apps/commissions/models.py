@@ -1,7 +1,9 @@
-from django.db import models
+from django.db import models, transaction as db_transaction
 from django.conf import settings
 from django.utils import timezone
 from django.db.models import Q
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 
 
 class Company(models.Model):
@@ -110,20 +112,31 @@ class AgentCommission(models.Model):
 
 
 def get_effective_commission(agent, company, denomination):
-    agent_commission = AgentCommission.objects.filter(
-        agent=agent,
-        company=company,
-        denomination=denomination,
-        is_active=True
-    ).first()
-
-    if agent_commission:
-        return agent_commission.amount
-
-    default_commission = DefaultCommission.objects.filter(
-        company=company,
-        denomination=denomination,
-        is_active=True
-    ).first()
-
-    return default_commission.amount if default_commission else 0
+    """Kept for existing imports; resolved by the shared commission matrix."""
+    from apps.commissions.services import get_commission_amount
+
+    return get_commission_amount(agent, company, denomination)
+
+
+# ==========================
+# 🔄 إبطال مصفوفة العمولات عند أي تعديل
+# ==========================
+@receiver(post_save, sender=Company)
+@receiver(post_delete, sender=Company)
+@receiver(post_save, sender=DefaultCommission)
+@receiver(post_delete, sender=DefaultCommission)
+@receiver(post_save, sender=AgentCommission)
+@receiver(post_delete, sender=AgentCommission)
+def invalidate_commissions_on_change(sender, **kwargs):
+    from apps.commissions.services import invalidate_commission_matrix
+
+    db_transaction.on_commit(invalidate_commission_matrix)
+
+
+# ==========================
+# 🔗 ربط شركات المبيعات بشركات العمولات (حسب code)
+# ==========================
+@receiver(post_save, sender="sales.TelecomCompany")
+def ensure_commission_company(sender, instance, **kwargs):
+    """The resolver no longer creates Company rows lazily; create them with the telecom company."""
+    Company.objects.get_or_create(code=instance.code, defaults={"name": instance.name_ar})
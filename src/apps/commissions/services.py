@@ -3,12 +3,134 @@
 This project has a newer Sales domain model (TelecomCompany / RechargeDenomination)
 while the commissions app historically used its own Company model + int denomination.
 
-To keep the project working without a risky migration, we bridge the two:
-- If `company` is a TelecomCompany, we match/create commissions.Company by `code`.
-- If `denomination` is a RechargeDenomination, we use `denomination.value`.
+To keep the project working without a risky migration, we bridge the two by
+`company.code` and `denomination.value`.
+
+All active DefaultCommission / AgentCommission rows are loaded once into an
+in-memory matrix keyed by (agent_id, company_code, value); default commissions
+use agent_id=None. The matrix is rebuilt when the commissions version is
+bumped (see the signal receivers in `apps.commissions.models`) and at least
+every COMMISSION_MATRIX_CACHE_TIMEOUT seconds, so resolving a commission
+costs two dict lookups and no queries. The version stamp only reaches other
+workers through a shared cache backend (see CACHES); the max age bounds how
+long a worker can confirm sales at an old commission without one.
 """
 
-from apps.commissions.models import DefaultCommission, AgentCommission, Company
+import threading
+import time
+from decimal import Decimal
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.conf import settings
+
+from apps.commissions.models import DefaultCommission, AgentCommission
+from apps.core.cache import bump_version, get_version
+
+COMMISSIONS_VERSION_NAME = "commissions.matrix"
+
+ZERO = Decimal("0")
+
+MatrixKey = Tuple[Optional[int], str, int]
+
+
+class CommissionMatrix:
+    """Immutable lookup table of active commissions."""
+
+    def __init__(self, version: str, entries: Dict[MatrixKey, Decimal]):
+        self.version = version
+        self.built_at = time.monotonic()
+        self._entries = entries
+
+    def is_current(self, version: str) -> bool:
+        return self.version == version and time.monotonic() - self.built_at < _timeout()
+
+    def lookup(self, agent_id, company_code, value) -> Optional[Decimal]:
+        """Return the effective amount, or None when no commission is configured.
+
+        Priority:
+        1. AgentCommission (override)
+        2. DefaultCommission
+        """
+        entries = self._entries
+        key_value = int(value)
+        if agent_id is not None:
+            amount = entries.get((agent_id, company_code, key_value))
+            if amount is not None:
+                return amount
+        return entries.get((None, company_code, key_value))
+
+    def resolve(self, agent_id, company_code, value) -> Decimal:
+        amount = self.lookup(agent_id, company_code, value)
+        return ZERO if amount is None else amount
+
+
+_matrix: Optional[CommissionMatrix] = None
+_lock = threading.Lock()
+
+
+def _timeout() -> int:
+    return int(getattr(settings, "COMMISSION_MATRIX_CACHE_TIMEOUT", 60))
+
+
+def _load_matrix(version: str) -> CommissionMatrix:
+    entries: Dict[MatrixKey, Decimal] = {}
+
+    # `.first()` semantics of the old lookups: lowest pk wins on duplicates.
+    defaults = (
+        DefaultCommission.objects
+        .filter(is_active=True)
+        .order_by("id")
+        .values_list("company__code", "denomination", "amount")
+    )
+    for code, value, amount in defaults:
+        entries.setdefault((None, code, value), amount)
+
+    overrides = (
+        AgentCommission.objects
+        .filter(is_active=True)
+        .order_by("id")
+        .values_list("agent_id", "company__code", "denomination", "amount")
+    )
+    for agent_id, code, value, amount in overrides:
+        entries.setdefault((agent_id, code, value), amount)
+
+    return CommissionMatrix(version, entries)
+
+
+def get_commission_matrix() -> CommissionMatrix:
+    """Return the current matrix, rebuilding it if the version moved or it is too old."""
+    global _matrix
+
+    version = get_version(COMMISSIONS_VERSION_NAME)
+    matrix = _matrix
+    if matrix is not None and matrix.is_current(version):
+        return matrix
+
+    with _lock:
+        if _matrix is None or not _matrix.is_current(version):
+            _matrix = _load_matrix(version)
+        return _matrix
+
+
+def invalidate_commission_matrix() -> None:
+    global _matrix
+
+    with _lock:
+        _matrix = None
+    bump_version(COMMISSIONS_VERSION_NAME)
+
+
+def _company_code(company) -> Optional[str]:
+    if isinstance(company, str):
+        return company
+    return getattr(company, "code", None)
+
+
+def _denomination_value(denomination):
+    # denomination: RechargeDenomination or int
+    value = getattr(denomination, "value", None)
+    return denomination if value is None else value
+
 
 def get_commission_amount(agent, company, denomination):
     """
@@ -16,45 +138,51 @@ def get_commission_amount(agent, company, denomination):
     Priority:
     1. AgentCommission (override)
     2. DefaultCommission
+
+    `company` may be a TelecomCompany, a commissions.Company or a company code;
+    `denomination` may be a RechargeDenomination or its integer value.
     """
+    company_code = _company_code(company)
+    if not company_code:
+        return ZERO
 
-    # 1️⃣ عمولة مخصصة للوكيل
-    # --- Bridge new Sales models -> commissions schema ---
-    # company: TelecomCompany or commissions.Company
-    if not isinstance(company, Company):
-        company_code = getattr(company, "code", None)
-        company_name = getattr(company, "name_ar", None) or getattr(company, "name", None) or (company_code or "")
-        if company_code:
-            company, _ = Company.objects.get_or_create(
-                code=company_code,
-                defaults={"name": str(company_name)[:100] or company_code},
-            )
+    agent_id = getattr(agent, "pk", agent)
+    return get_commission_matrix().resolve(agent_id, company_code, _denomination_value(denomination))
 
-    # denomination: RechargeDenomination or int
-    denom_value = getattr(denomination, "value", None)
-    if denom_value is None:
-        denom_value = denomination
-
-    # 1️⃣ عمولة مخصصة للوكيل
-    agent_commission = AgentCommission.objects.filter(
-        agent=agent,
-        company=company,
-        denomination=denom_value,
-        is_active=True,
-    ).first()
-
-    if agent_commission:
-        return agent_commission.amount
-
-    # 2️⃣ عمولة افتراضية
-    default_commission = DefaultCommission.objects.filter(
-        company=company,
-        denomination=denom_value,
-        is_active=True,
-    ).first()
-
-    if default_commission:
-        return default_commission.amount
-
-    # 3️⃣ إذا ماكو شي
-    return 0
+
+def resolve_commissions(transactions: Iterable) -> Dict[int, Decimal]:
+    """Resolve commissions for many transactions in one pass.
+
+    Accepts Transaction instances or dicts with `id`, `agent_id`, `company_id`
+    and `denomination_id` (e.g. from `.values()`). Costs at most two queries
+    (company codes + denomination values) regardless of the number of rows.
+    Returns {transaction_id: amount}.
+    """
+    from apps.sales.models import TelecomCompany, RechargeDenomination
+
+    rows = []
+    for tx in transactions:
+        if isinstance(tx, dict):
+            rows.append((tx["id"], tx["agent_id"], tx["company_id"], tx["denomination_id"]))
+        else:
+            rows.append((tx.id, tx.agent_id, tx.company_id, tx.denomination_id))
+
+    if not rows:
+        return {}
+
+    company_ids = {r[2] for r in rows}
+    denomination_ids = {r[3] for r in rows}
+
+    codes = dict(TelecomCompany.objects.filter(id__in=company_ids).values_list("id", "code"))
+    values = dict(RechargeDenomination.objects.filter(id__in=denomination_ids).values_list("id", "value"))
+
+    matrix = get_commission_matrix()
+    result = {}
+    for tx_id, agent_id, company_id, denomination_id in rows:
+        code = codes.get(company_id)
+        value = values.get(denomination_id)
+        if code is None or value is None:
+            result[tx_id] = ZERO
+            continue
+        result[tx_id] = matrix.resolve(agent_id, code, value)
+    return result
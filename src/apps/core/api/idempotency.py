@@ -0,0 +1,193 @@
+# src/apps/core/api/idempotency.py
+"""Idempotency-Key support for DRF views.
+
+Mobile/POS clients retry on timeouts. With `IdempotentAPIMixin` a request
+that carries an `Idempotency-Key` header is executed once per (user, key);
+retries get the stored response back (header `Idempotent-Replayed: true`)
+without reaching the view, so nothing touches AgentBalance or Transaction.
+
+- Results live in Django's cache for IDEMPOTENCY_TTL seconds. Use a shared
+  cache backend (see CACHES) so retries landing on another worker replay too.
+- A retry that arrives while the first request is still running gets 409.
+- Reusing a key with a different method/path/body gets 422.
+- 5xx responses are not stored, so the client can retry them; the lock is
+  released however the request ends (including uncaught exceptions).
+- Hits/misses are counted in the cache; see `get_idempotency_stats`.
+- Views can keep secrets out of the stored response: `idempotency_stored_data`
+  runs before it is stored and `idempotency_replayed_data` before a replay
+  (see `apps.sales.api.replay`, which re-reads recharge codes).
+"""
+
+import hashlib
+from typing import Any, Dict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http.request import RawPostDataException
+from rest_framework import status
+from rest_framework.response import Response
+
+from apps.core.api.utils import api_response
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+KEY_PREFIX = "riadda:idempotency:"
+STATS_PREFIX = f"{KEY_PREFIX}stats:"
+STATS_COUNTERS = ("hits", "misses", "in_progress", "mismatches")
+
+MAX_KEY_LENGTH = 255
+
+
+def _ttl() -> int:
+    return int(getattr(settings, "IDEMPOTENCY_TTL", 24 * 60 * 60))
+
+
+def _lock_timeout() -> int:
+    return int(getattr(settings, "IDEMPOTENCY_LOCK_TIMEOUT", 30))
+
+
+def _bump(counter: str) -> None:
+    key = f"{STATS_PREFIX}{counter}"
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Counter missing (first use or evicted).
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def get_idempotency_stats() -> Dict[str, Any]:
+    values = cache.get_many([f"{STATS_PREFIX}{name}" for name in STATS_COUNTERS])
+    stats = {name: int(values.get(f"{STATS_PREFIX}{name}") or 0) for name in STATS_COUNTERS}
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+    return stats
+
+
+def reset_idempotency_stats() -> None:
+    cache.delete_many([f"{STATS_PREFIX}{name}" for name in STATS_COUNTERS])
+
+
+class _ShortCircuit(Exception):
+    """Raised from `initial()` to answer without running the handler."""
+
+    def __init__(self, response: Response):
+        super().__init__()
+        self.response = response
+
+
+class _Entry:
+    def __init__(self, user_id, key: str, fingerprint: str):
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        self.result_key = f"{KEY_PREFIX}{user_id}:{digest}"
+        self.lock_key = f"{self.result_key}:lock"
+        self.fingerprint = fingerprint
+
+
+def _fingerprint(request) -> str:
+    try:
+        body = request._request.body
+    except RawPostDataException:
+        body = repr(sorted(request.data.items())).encode("utf-8") if hasattr(request.data, "items") else b""
+    h = hashlib.sha256()
+    h.update(request.method.encode("utf-8"))
+    h.update(request.path.encode("utf-8"))
+    h.update(body or b"")
+    return h.hexdigest()
+
+
+class IdempotentAPIMixin:
+    """Honour `Idempotency-Key` on unsafe methods. Put it before APIView in the bases."""
+
+    idempotent_methods = ("POST",)
+
+    def initial(self, request, *args, **kwargs):
+        # Authentication / permissions / throttles first: keys are per user.
+        super().initial(request, *args, **kwargs)
+        self._idempotency_entry = None
+
+        key = (request.headers.get(IDEMPOTENCY_HEADER) or "").strip()
+        if not key or request.method not in self.idempotent_methods:
+            return
+
+        if len(key) > MAX_KEY_LENGTH:
+            raise _ShortCircuit(api_response(
+                "INVALID_IDEMPOTENCY_KEY",
+                "مفتاح Idempotency-Key طويل جدًا",
+                status.HTTP_400_BAD_REQUEST,
+            ))
+
+        entry = _Entry(request.user.pk, key, _fingerprint(request))
+
+        stored = cache.get(entry.result_key)
+        if stored is not None:
+            if stored["fingerprint"] != entry.fingerprint:
+                _bump("mismatches")
+                raise _ShortCircuit(api_response(
+                    "IDEMPOTENCY_KEY_REUSED",
+                    "تم استخدام مفتاح Idempotency-Key مع طلب مختلف",
+                    status.HTTP_422_UNPROCESSABLE_ENTITY,
+                ))
+            _bump("hits")
+            response = Response(self.idempotency_replayed_data(request, stored["data"]), status=stored["status"])
+            response[REPLAYED_HEADER] = "true"
+            raise _ShortCircuit(response)
+
+        if not cache.add(entry.lock_key, 1, timeout=_lock_timeout()):
+            _bump("in_progress")
+            raise _ShortCircuit(api_response(
+                "IDEMPOTENCY_IN_PROGRESS",
+                "الطلب قيد التنفيذ، أعد المحاولة بعد قليل",
+                status.HTTP_409_CONFLICT,
+            ))
+
+        _bump("misses")
+        self._idempotency_entry = entry
+
+    def idempotency_stored_data(self, data):
+        """What is kept of a response's data for replays (default: all of it)."""
+        return data
+
+    def idempotency_replayed_data(self, request, data):
+        """Data of a replayed response, from what `idempotency_stored_data` kept."""
+        return data
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            # An exception DRF re-raises skips finalize_response: release
+            # the lock here so retries are not answered 409 until it expires.
+            entry = getattr(self, "_idempotency_entry", None)
+            if entry is not None:
+                self._idempotency_entry = None
+                cache.delete(entry.lock_key)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, _ShortCircuit):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+
+        entry = getattr(self, "_idempotency_entry", None)
+        if entry is None:
+            return response
+
+        self._idempotency_entry = None
+        try:
+            if response.status_code < 500 and isinstance(response, Response):
+                cache.set(
+                    entry.result_key,
+                    {
+                        "fingerprint": entry.fingerprint,
+                        "status": response.status_code,
+                        "data": self.idempotency_stored_data(response.data),
+                    },
+                    timeout=_ttl(),
+                )
+        finally:
+            cache.delete(entry.lock_key)
+        return response
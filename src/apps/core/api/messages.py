@@ -5,4 +5,20 @@ MESSAGES = {
     "INVALID_REQUEST": "الطلب غير صالح",
     "UNAUTHORIZED": "غير مصرح لك تنفيذ هذا الإجراء",
     "NOT_FOUND": "العنصر غير موجود",
+
+    # Balance
+    "AGENT_NOT_FOUND": "الوكيل غير موجود",
+    "INVALID_AMOUNT": "قيمة المبلغ غير صالحة",
+    "BALANCE_NOT_FOUND": "لا يوجد رصيد لهذا الوكيل",
+    "BALANCE_FETCH_SUCCESS": "تم جلب الرصيد بنجاح",
+    "BALANCE_UPDATED": "تم تعديل الرصيد بنجاح",
+    "INSUFFICIENT_BALANCE": "رصيدك غير كافٍ",
+    "NEGATIVE_BALANCE_NOT_ALLOWED": "لا يمكن أن يصبح الرصيد سالبًا",
+
+    # Sales
+    "AGENT_SUSPENDED": "الحساب موقوف",
+    "SALE_CREATED": "تمت عملية البيع",
+    "DENOMINATION_NOT_FOUND": "فئة غير موجودة أو غير مفعّلة",
+    "BULK_QUANTITY_LIMIT": "الحد الأقصى {max_quantity} بطاقة في الطلب الواحد",
+    "DENOMINATION_REQUIRED": "يرجى إرسال denomination_id أو company_code و value",
 }
@@ -0,0 +1,249 @@
+"""Keyset (cursor) pagination on (created_at, id).
+
+`Paginator` runs COUNT(*) and then reads OFFSET rows to skip them, so deep
+pages of large tables (an agent's transactions, AuditLog) get linearly
+slower. Here a page is "the next N rows older (or newer) than this row":
+
+    WHERE created_at <= :ts AND (created_at < :ts OR id < :id)
+    ORDER BY created_at DESC, id DESC LIMIT N + 1
+
+which is a range scan on any index that ends with created_at, e.g.
+Transaction (agent, created_at). Cursors are opaque url-safe strings; the
+caller passes `next_cursor` / `previous_cursor` back as `?cursor=`.
+
+There is no exact total. Views that need one use `estimated_count` (exact
+up to a bound, then the PostgreSQL planner estimate) or a rollup table.
+APIs whose clients predate the cursors pass that total to
+`CursorPage.as_dict(total=...)`, which keeps the old `page` /
+`total_pages` / `total_items` keys in the response.
+
+`page_paginate` keeps the old numbered pages (`?page=N`, COUNT(*) + OFFSET)
+for clients written before the cursors; APIs use it only when a request
+sends `page` and no `cursor`.
+"""
+
+import base64
+import json
+from dataclasses import dataclass, field
+from datetime import datetime, time, timedelta
+from typing import List, Optional, Tuple
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 50
+
+# `estimated_count` counts exactly up to this many rows.
+EXACT_COUNT_LIMIT = 1000
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+@dataclass
+class CursorPage:
+    items: List = field(default_factory=list)
+    next_cursor: Optional[str] = None
+    previous_cursor: Optional[str] = None
+    page_size: int = DEFAULT_PAGE_SIZE
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+    @property
+    def has_other_pages(self) -> bool:
+        return self.has_next or self.has_previous
+
+    def as_dict(self, total: Optional[int] = None) -> dict:
+        """Cursor fields; with `total`, also the pre-cursor page / total_pages / total_items.
+
+        `page` is 1 on the first page and None once the client follows a
+        cursor (a cursor page has no number).
+        """
+        data = {
+            "page_size": self.page_size,
+            "next_cursor": self.next_cursor,
+            "previous_cursor": self.previous_cursor,
+            "has_next": self.has_next,
+            "has_previous": self.has_previous,
+        }
+        if total is not None:
+            data.update({
+                "page": None if self.has_previous else 1,
+                # كما في Paginator: صفحة واحدة على الأقل حتى بدون نتائج
+                "total_pages": max(1, -(-total // self.page_size)),
+                "total_items": total,
+            })
+        return data
+
+
+@dataclass
+class NumberedPage:
+    """A `?page=N` page with the fields the pre-cursor responses had."""
+
+    items: List
+    number: int
+    page_size: int
+    total_pages: int
+    total_items: int
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    @property
+    def has_next(self) -> bool:
+        return self.number < self.total_pages
+
+    @property
+    def has_previous(self) -> bool:
+        return self.number > 1
+
+    def as_dict(self) -> dict:
+        return {
+            "page": self.number,
+            "page_size": self.page_size,
+            "total_pages": self.total_pages,
+            "total_items": self.total_items,
+            "has_next": self.has_next,
+            "has_previous": self.has_previous,
+        }
+
+
+def encode_cursor(created_at: datetime, pk, *, backwards: bool = False) -> str:
+    raw = json.dumps([created_at.isoformat(), pk, int(backwards)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(value: str) -> Tuple[datetime, int, bool]:
+    """(created_at, pk, backwards) from a cursor; InvalidCursor if it was not made by encode_cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+        created_at, pk, backwards = json.loads(raw)
+        created_at = parse_datetime(created_at)
+        pk = int(pk)
+    except (TypeError, ValueError):
+        raise InvalidCursor(value)
+    if created_at is None:
+        raise InvalidCursor(value)
+    return created_at, pk, bool(backwards)
+
+
+def parse_page_size(value, default: int = DEFAULT_PAGE_SIZE, maximum: int = MAX_PAGE_SIZE) -> int:
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, maximum))
+
+
+def filter_local_dates(qs, date_from=None, date_to=None, field: str = "created_at"):
+    """`field__date` range as a plain range on `field` (local days), so indexes on it apply."""
+    if date_from:
+        start = timezone.make_aware(datetime.combine(date_from, time.min))
+        qs = qs.filter(**{f"{field}__gte": start})
+    if date_to:
+        end = timezone.make_aware(datetime.combine(date_to + timedelta(days=1), time.min))
+        qs = qs.filter(**{f"{field}__lt": end})
+    return qs
+
+
+def cursor_paginate(qs, cursor: Optional[str] = None, page_size: int = DEFAULT_PAGE_SIZE, *, field: str = "created_at") -> CursorPage:
+    """Newest-first page of `qs` after (or, for a previous_cursor, before) `cursor`.
+
+    `qs` may be a `.values()` queryset as long as it includes `field` and "id".
+    Raises InvalidCursor for a malformed cursor.
+    """
+    backwards = False
+    if cursor:
+        ts, pk, backwards = decode_cursor(cursor)
+        if backwards:
+            qs = qs.filter(Q(**{f"{field}__gt": ts}) | Q(**{field: ts, "pk__gt": pk}), **{f"{field}__gte": ts})
+        else:
+            qs = qs.filter(Q(**{f"{field}__lt": ts}) | Q(**{field: ts, "pk__lt": pk}), **{f"{field}__lte": ts})
+
+    if backwards:
+        rows = list(qs.order_by(field, "pk")[:page_size + 1])
+        more = len(rows) > page_size
+        items = rows[:page_size][::-1]
+    else:
+        rows = list(qs.order_by(f"-{field}", "-pk")[:page_size + 1])
+        more = len(rows) > page_size
+        items = rows[:page_size]
+
+    if not items:
+        return CursorPage(items=[], page_size=page_size)
+
+    first, last = _row_key(items[0], field), _row_key(items[-1], field)
+    has_next = more if not backwards else True
+    has_previous = more if backwards else bool(cursor)
+    return CursorPage(
+        items=items,
+        next_cursor=encode_cursor(*last) if has_next else None,
+        previous_cursor=encode_cursor(*first, backwards=True) if has_previous else None,
+        page_size=page_size,
+    )
+
+
+def page_paginate(qs, page, page_size: int = DEFAULT_PAGE_SIZE, *, field: str = "created_at") -> NumberedPage:
+    """Newest-first numbered page of `qs` (legacy `?page=`); out of range or malformed pages clamp like Paginator.get_page."""
+    paginator = Paginator(qs.order_by(f"-{field}", "-pk"), page_size)
+    page_obj = paginator.get_page(page)
+    return NumberedPage(
+        items=list(page_obj.object_list),
+        number=page_obj.number,
+        page_size=page_size,
+        total_pages=paginator.num_pages,
+        total_items=paginator.count,
+    )
+
+
+def _row_key(row, field: str):
+    # Model instances, or dicts from `.values(field, "id", ...)`.
+    if isinstance(row, dict):
+        return row[field], row["id"]
+    return getattr(row, field), row.pk
+
+
+def _planner_estimate(qs) -> Optional[int]:
+    connection = connections[qs.db]
+    if connection.vendor != "postgresql":
+        return None
+    sql, params = qs.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def estimated_count(qs, exact_limit: int = EXACT_COUNT_LIMIT) -> Tuple[int, bool]:
+    """(count, is_estimate): exact when at most `exact_limit` rows match.
+
+    Beyond that the PostgreSQL planner estimate is returned (never below
+    the limit); other backends return `exact_limit + 1` as a lower bound.
+    """
+    exact = qs.order_by()[:exact_limit + 1].count()
+    if exact <= exact_limit:
+        return exact, False
+    estimate = _planner_estimate(qs)
+    return max(estimate or 0, exact), True
@@ -0,0 +1,47 @@
+"""JSON rendering with orjson when installed.
+
+`FastJSONRenderer` produces the same JSON as DRF's `JSONRenderer` with the
+project's REST_FRAMEWORK defaults (compact, UTF-8, Decimal as number,
+aware UTC datetimes with a "Z" suffix) but encodes with orjson, which is
+several times faster on pages of small dicts. Without orjson, or for a
+value orjson cannot encode (e.g. an int beyond 64 bits), it falls back to
+DRF's stdlib encoder.
+"""
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+_encoder = JSONEncoder()
+
+if orjson is not None:
+    _OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj):
+    # Decimal, lazy strings, QuerySets, ... : same conversions as DRF's encoder.
+    return _encoder.default(obj)
+
+
+def dumps(data, *, indent: bool = False) -> bytes:
+    """Encode `data` to JSON bytes (orjson if available, else DRF's encoder)."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, default=_default, option=_OPTIONS | (orjson.OPT_INDENT_2 if indent else 0))
+        except orjson.JSONEncodeError:
+            pass
+    return JSONRenderer().render(data, renderer_context={"indent": 2 if indent else None})
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if orjson is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        return dumps(data, indent=bool(indent))
@@ -1,21 +1,14 @@
 # src/apps/core/api/utils.py
 
+from django.http import HttpResponse
 from rest_framework.response import Response
 from typing import Any
 
+from apps.core.api.renderers import dumps
 
-def api_response(*args: Any, **kwargs: Any) -> Response:
-    """Flexible API response helper.
 
-    Supports legacy positional calls used across the codebase:
-        api_response(code, message, status_code=200, data=None)
-    And new keyword style:
-        api_response(success=True, message="...", data=..., status_code=200)
-
-    The returned JSON will include at least `message` and optional `data`.
-    If a legacy `code` string is provided as the first positional arg, it will
-    be returned as `code` for compatibility with existing clients.
-    """
+def _envelope(args, kwargs):
+    """(payload, status_code) for the api_response call forms below."""
 
     # Legacy positional form: (code, message, status_code=200, data=None)
     code = None
@@ -45,4 +38,32 @@ def api_response(*args: Any, **kwargs: Any) -> Response:
     if data is not None:
         payload["data"] = data
 
+    return payload, status_code
+
+
+def api_response(*args: Any, **kwargs: Any) -> Response:
+    """Flexible API response helper.
+
+    Supports legacy positional calls used across the codebase:
+        api_response(code, message, status_code=200, data=None)
+    And new keyword style:
+        api_response(success=True, message="...", data=..., status_code=200)
+
+    The returned JSON will include at least `message` and optional `data`.
+    If a legacy `code` string is provided as the first positional arg, it will
+    be returned as `code` for compatibility with existing clients.
+    """
+    payload, status_code = _envelope(args, kwargs)
     return Response(payload, status=status_code)
+
+
+def api_json_response(*args: Any, **kwargs: Any) -> HttpResponse:
+    """`api_response` for hot endpoints: same arguments and JSON, encoded here.
+
+    The envelope goes straight to bytes (orjson when installed, see
+    `apps.core.api.renderers.dumps`), skipping DRF content negotiation and
+    the renderer. Always JSON (no browsable API), so use it only where
+    `data` is plain JSON-able values.
+    """
+    payload, status_code = _envelope(args, kwargs)
+    return HttpResponse(dumps(payload), status=status_code, content_type="application/json")
@@ -0,0 +1,54 @@
+"""Shared cache helpers.
+
+Version stamps let every gunicorn worker agree on when a process-local
+snapshot is stale: writers bump the stamp, readers compare it with the
+version their snapshot was built from. With the default LocMemCache the
+stamp is per-process; configure a shared backend (see CACHES in settings)
+so invalidations reach all workers.
+
+Every read of a stamp would be a round trip to that backend (a query with
+DatabaseCache), on each hot request. Stamps are therefore also kept in a
+process-local tier for VERSION_STAMP_LOCAL_TTL seconds: another worker's
+bump is seen at most that late, and a bump in this process is seen at
+once.
+"""
+
+import time
+import uuid
+from typing import Dict, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+VERSION_KEY_PREFIX = "riadda:version:"
+
+# name -> (version, time.monotonic() when read from the shared cache)
+_local: Dict[str, Tuple[str, float]] = {}
+
+
+def _local_ttl() -> float:
+    return float(getattr(settings, "VERSION_STAMP_LOCAL_TTL", 2))
+
+
+def get_version(name: str) -> str:
+    """Return the current version stamp for `name`, creating one if missing."""
+    local = _local.get(name)
+    if local is not None and time.monotonic() - local[1] < _local_ttl():
+        return local[0]
+
+    key = f"{VERSION_KEY_PREFIX}{name}"
+    version = cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key) or version
+    _local[name] = (version, time.monotonic())
+    return version
+
+
+def bump_version(name: str) -> str:
+    """Replace the version stamp for `name` so existing snapshots become stale."""
+    version = uuid.uuid4().hex
+    cache.set(f"{VERSION_KEY_PREFIX}{name}", version, timeout=None)
+    _local[name] = (version, time.monotonic())
+    return version
@@ -0,0 +1,128 @@
+"""Encrypted model fields.
+
+`EncryptedTextField` stores values as ``enc1:<base64(nonce | ciphertext+tag)>``
+using AES-256-GCM (`cryptography`). The AES key is derived once per process
+from FIELD_ENCRYPTION_KEY with HKDF-SHA256; every value gets a random
+96-bit nonce.
+
+- Values are decrypted in `from_db_value`, i.e. only for rows and columns
+  actually loaded. Listing pages that do not show the value must leave it
+  out of the query (`.defer(...)` / `.only(...)` / `values(...)`) instead
+  of paying one decryption per row.
+- Encryption is not deterministic, so the column cannot be filtered or
+  searched by value; keep a keyed hash next to it when lookups are needed
+  (see RechargeCodeInventory.code_hash). Lookups that would silently never
+  match raise FieldError: only `isnull`, and `exact` / `startswith` against
+  the stored text ("" or an ``enc1:`` value / prefix) are allowed.
+- A value that does not decrypt under the current key raises
+  ImproperlyConfigured: FIELD_ENCRYPTION_KEY must stay the same for as long
+  as encrypted rows exist.
+- Values without the ``enc1:`` prefix are returned as stored. This keeps
+  rows written before the field was introduced readable until
+  `manage.py encrypt_fields` has converted them.
+"""
+
+import base64
+import functools
+import os
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from django.conf import settings
+from django.core.exceptions import FieldError, ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.db import models
+from django.db.models.lookups import Exact, StartsWith
+from django.dispatch import receiver
+
+ENCRYPTED_PREFIX = "enc1:"
+
+_NONCE_BYTES = 12
+_HKDF_INFO = b"riadda:field-encryption:v1"
+
+
+@functools.lru_cache(maxsize=None)
+def _cipher() -> AESGCM:
+    secret = (getattr(settings, "FIELD_ENCRYPTION_KEY", None) or settings.SECRET_KEY).encode("utf-8")
+    key = HKDF(algorithm=hashes.SHA256(), length=32, salt=None, info=_HKDF_INFO).derive(secret)
+    return AESGCM(key)
+
+
+@receiver(setting_changed)
+def _reset_cipher(setting, **kwargs):
+    if setting in ("FIELD_ENCRYPTION_KEY", "SECRET_KEY"):
+        _cipher.cache_clear()
+
+
+def is_encrypted(value) -> bool:
+    return isinstance(value, str) and value.startswith(ENCRYPTED_PREFIX)
+
+
+def encrypt_value(value: str) -> str:
+    nonce = os.urandom(_NONCE_BYTES)
+    sealed = _cipher().encrypt(nonce, value.encode("utf-8"), None)
+    return ENCRYPTED_PREFIX + base64.b64encode(nonce + sealed).decode("ascii")
+
+
+def decrypt_value(value: str) -> str:
+    if not is_encrypted(value):
+        return value
+    raw = base64.b64decode(value[len(ENCRYPTED_PREFIX):])
+    try:
+        return _cipher().decrypt(raw[:_NONCE_BYTES], raw[_NONCE_BYTES:], None).decode("utf-8")
+    except InvalidTag:
+        raise ImproperlyConfigured(
+            "An encrypted field value cannot be decrypted with the current "
+            "FIELD_ENCRYPTION_KEY (DJANGO_FIELD_ENCRYPTION_KEY). The key must not "
+            "change while encrypted rows exist; restore the key they were written with."
+        ) from None
+
+
+class _StoredTextLookup:
+    """Lookup on the stored text: only "" or ``enc1:`` values can ever match."""
+
+    def get_prep_lookup(self):
+        if self.rhs_is_direct_value() and self.rhs and not is_encrypted(self.rhs):
+            raise FieldError(
+                f"{self.lhs.output_field.name}: encrypted values cannot be filtered by "
+                f"plaintext ({self.lookup_name}); filter on a keyed hash column instead."
+            )
+        return super().get_prep_lookup()
+
+
+class _EncryptedExact(_StoredTextLookup, Exact):
+    pass
+
+
+class _EncryptedStartsWith(_StoredTextLookup, StartsWith):
+    pass
+
+
+class EncryptedTextField(models.TextField):
+    """TextField encrypted at rest with AES-GCM (see module docstring)."""
+
+    def get_lookup(self, lookup_name):
+        if lookup_name == "isnull":
+            return super().get_lookup(lookup_name)
+        if lookup_name == "exact":
+            return _EncryptedExact
+        if lookup_name == "startswith":
+            return _EncryptedStartsWith
+        raise FieldError(
+            f"{self.name}: unsupported lookup '{lookup_name}' on an encrypted field; "
+            "filter on a keyed hash column instead."
+        )
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return decrypt_value(value)
+
+    def get_prep_value(self, value):
+        value = super().get_prep_value(value)
+        # Empty values stay empty (nothing to hide, and `exclude(code="")` keeps working).
+        if not value or is_encrypted(value):
+            return value
+        return encrypt_value(value)
@@ -0,0 +1,83 @@
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, router, transaction as db_transaction
+
+from apps.core.fields import ENCRYPTED_PREFIX, EncryptedTextField, encrypt_value
+
+
+def _encrypted_fields(label=None):
+    if label:
+        try:
+            models = [apps.get_model(label)]
+        except (LookupError, ValueError):
+            raise CommandError(f"Unknown model: {label}")
+    else:
+        models = apps.get_models()
+    for model in models:
+        for field in model._meta.concrete_fields:
+            if isinstance(field, EncryptedTextField):
+                yield model, field
+
+
+class Command(BaseCommand):
+    help = "تشفير القيم القديمة (نص صريح) في حقول EncryptedTextField على دفعات"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--model", help="app_label.Model (default: every model with encrypted fields)")
+        parser.add_argument(
+            "--chunk-size", type=int, default=1000,
+            help="Rows read and updated per DB transaction",
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Only count plaintext rows")
+
+    def handle(self, *args, **options):
+        chunk_size = max(1, options["chunk_size"])
+        found = False
+        for model, field in _encrypted_fields(options["model"]):
+            found = True
+            self._encrypt(model, field, chunk_size, options["dry_run"])
+        if not found:
+            raise CommandError("No EncryptedTextField found")
+
+    def _encrypt(self, model, field, chunk_size, dry_run):
+        label = f"{model._meta.label}.{field.name}"
+        plaintext = (
+            model._default_manager
+            .exclude(**{f"{field.name}__isnull": True})
+            .exclude(**{field.name: ""})
+            .exclude(**{f"{field.name}__startswith": ENCRYPTED_PREFIX})
+        )
+        if dry_run:
+            self.stdout.write(f"{label}: {plaintext.count()} plaintext row(s)")
+            return
+
+        connection = connections[router.db_for_write(model)]
+        qn = connection.ops.quote_name
+        # Conditional on the old value: a row changed meanwhile is left for the next run.
+        sql = (
+            f"UPDATE {qn(model._meta.db_table)} SET {qn(field.column)} = %s "
+            f"WHERE {qn(model._meta.pk.column)} = %s AND {qn(field.column)} = %s"
+        )
+
+        started = time.monotonic()
+        done = 0
+        last_pk = None
+        while True:
+            # Keyset over the primary key: each chunk is an index range scan.
+            chunk = plaintext.order_by("pk")
+            if last_pk is not None:
+                chunk = chunk.filter(pk__gt=last_pk)
+            rows = list(chunk.values_list("pk", field.attname)[:chunk_size])
+            if not rows:
+                break
+            last_pk = rows[-1][0]
+
+            with db_transaction.atomic(using=connection.alias):
+                with connection.cursor() as cursor:
+                    cursor.executemany(sql, [(encrypt_value(value), pk, value) for pk, value in rows])
+            done += len(rows)
+            self.stdout.write(f"  {label}: {done} row(s) ({time.monotonic() - started:.1f}s)")
+
+        self.stdout.write(self.style.SUCCESS(f"{label}: encrypted {done} row(s)."))
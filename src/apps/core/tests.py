@@ -0,0 +1,154 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.exceptions import FieldError, ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.accounts.models import AuditLog
+from apps.core.api.pagination import InvalidCursor, cursor_paginate
+from apps.core.fields import decrypt_value, encrypt_value, is_encrypted
+from apps.sales.models import RechargeCodeInventory, RechargeDenomination, TelecomCompany
+
+
+def _stored(model, pk, column="code"):
+    """Raw column value, as written to the database (no from_db_value)."""
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT {qn(column)} FROM {qn(model._meta.db_table)} WHERE {qn(model._meta.pk.column)} = %s", [pk]
+        )
+        return cursor.fetchone()[0]
+
+
+class EncryptValueTests(TestCase):
+    def test_round_trip(self):
+        for value in ("1234-5678-9012", "كود عربي", "x" * 150):
+            sealed = encrypt_value(value)
+            self.assertTrue(is_encrypted(sealed))
+            self.assertNotIn(value, sealed)
+            self.assertEqual(decrypt_value(sealed), value)
+
+    def test_random_nonce(self):
+        self.assertNotEqual(encrypt_value("1234"), encrypt_value("1234"))
+
+    def test_plaintext_is_returned_as_stored(self):
+        self.assertEqual(decrypt_value("1234"), "1234")
+
+    def test_other_key_is_refused(self):
+        with override_settings(FIELD_ENCRYPTION_KEY="key-a"):
+            sealed = encrypt_value("1234")
+        with override_settings(FIELD_ENCRYPTION_KEY="key-b"):
+            with self.assertRaises(ImproperlyConfigured):
+                decrypt_value(sealed)
+
+
+class EncryptedTextFieldTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        company = TelecomCompany.objects.create(code="jawwal", name_ar="جوال")
+        cls.denomination = RechargeDenomination.objects.create(company=company, product_type="MOBILE", value=10)
+
+    def _card(self, code):
+        return RechargeCodeInventory.objects.create(denomination=self.denomination, code=code)
+
+    def test_stored_encrypted_and_read_back(self):
+        card = self._card("1111-2222")
+
+        self.assertTrue(is_encrypted(_stored(RechargeCodeInventory, card.pk)))
+        self.assertEqual(RechargeCodeInventory.objects.get(pk=card.pk).code, "1111-2222")
+        self.assertEqual(
+            RechargeCodeInventory.objects.filter(pk=card.pk).values_list("code", flat=True).get(), "1111-2222"
+        )
+
+    def test_plaintext_lookup_is_refused(self):
+        with self.assertRaises(FieldError):
+            RechargeCodeInventory.objects.filter(code="1111-2222").exists()
+
+    def test_encrypt_fields_command_converts_plaintext_rows(self):
+        cards = [self._card(f"3333-{i}") for i in range(3)]
+        # صفوف قديمة مكتوبة قبل التشفير (نص صريح)
+        qn = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            for card in cards[:2]:
+                cursor.execute(
+                    f"UPDATE {qn(RechargeCodeInventory._meta.db_table)} SET {qn('code')} = %s WHERE {qn('id')} = %s",
+                    [card.code, card.pk],
+                )
+        untouched = _stored(RechargeCodeInventory, cards[2].pk)
+
+        out = StringIO()
+        call_command("encrypt_fields", "--model", "sales.RechargeCodeInventory", "--dry-run", stdout=out)
+        self.assertIn("2 plaintext row(s)", out.getvalue())
+
+        call_command("encrypt_fields", "--model", "sales.RechargeCodeInventory", "--chunk-size", "1", stdout=StringIO())
+
+        for card in cards:
+            self.assertTrue(is_encrypted(_stored(RechargeCodeInventory, card.pk)))
+            self.assertEqual(RechargeCodeInventory.objects.get(pk=card.pk).code, card.code)
+        # القيم المشفّرة مسبقاً لا يُعاد تشفيرها
+        self.assertEqual(_stored(RechargeCodeInventory, cards[2].pk), untouched)
+
+
+class CursorPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        base = timezone.now()
+        # 23 صفاً، كل 3 منها بنفس created_at: الترتيب يعتمد على id عند التساوي
+        AuditLog.objects.bulk_create([
+            AuditLog(action=AuditLog.Action.SELL, message=str(i), created_at=base - timedelta(minutes=i // 3))
+            for i in range(23)
+        ])
+        cls.expected = list(AuditLog.objects.order_by("-created_at", "-id").values_list("id", flat=True))
+
+    def _walk(self, qs, page_size):
+        pages, cursor = [], None
+        while True:
+            page = cursor_paginate(qs, cursor, page_size)
+            pages.append(page)
+            if not page.has_next:
+                return pages
+            cursor = page.next_cursor
+
+    def _ids(self, page):
+        return [row["id"] if isinstance(row, dict) else row.pk for row in page]
+
+    def test_next_cursors_walk_newest_first_without_gaps(self):
+        for page_size in (1, 4, 5, 23, 50):
+            pages = self._walk(AuditLog.objects.all(), page_size)
+            ids = [pk for page in pages for pk in self._ids(page)]
+            self.assertEqual(ids, self.expected, page_size)
+            self.assertIsNone(pages[0].previous_cursor)
+            self.assertIsNone(pages[-1].next_cursor)
+
+    def test_previous_cursor_returns_the_page_before(self):
+        pages = self._walk(AuditLog.objects.all(), 5)
+        for before, page in zip(pages, pages[1:]):
+            previous = cursor_paginate(AuditLog.objects.all(), page.previous_cursor, 5)
+            self.assertEqual(self._ids(previous), self._ids(before))
+            self.assertTrue(previous.has_next)
+        # العودة إلى الصفحة الأولى: لا صفحة قبلها
+        first = cursor_paginate(AuditLog.objects.all(), pages[1].previous_cursor, 5)
+        self.assertFalse(first.has_previous)
+
+    def test_values_queryset(self):
+        pages = self._walk(AuditLog.objects.values("id", "created_at", "message"), 7)
+        self.assertEqual([pk for page in pages for pk in self._ids(page)], self.expected)
+
+    def test_invalid_cursor(self):
+        for cursor in ("not-a-cursor", "W10", "WyJ4IiwxLDBd"):
+            with self.assertRaises(InvalidCursor):
+                cursor_paginate(AuditLog.objects.all(), cursor, 5)
+
+    def test_legacy_totals(self):
+        first = cursor_paginate(AuditLog.objects.all(), None, 5)
+        self.assertEqual(
+            {k: v for k, v in first.as_dict(total=23).items() if k in ("page", "total_pages", "total_items")},
+            {"page": 1, "total_pages": 5, "total_items": 23},
+        )
+        second = cursor_paginate(AuditLog.objects.all(), first.next_cursor, 5)
+        self.assertIsNone(second.as_dict(total=23)["page"])
+        self.assertEqual(cursor_paginate(AuditLog.objects.none(), None, 5).as_dict(total=0)["total_pages"], 1)
+        self.assertNotIn("total_items", first.as_dict())
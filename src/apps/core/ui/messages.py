@@ -5,6 +5,9 @@ UI_MESSAGES = {
     "LOGIN_FAILED": "بيانات الدخول غير صحيحة",
     "LOGOUT_SUCCESS": "تم تسجيل الخروج بنجاح",
     "UNAUTHORIZED": "غير مخوّل بالدخول",
+    "INVALID_AMOUNT": "قيمة المبلغ غير صالحة",
+    "BALANCE_UPDATED": "تم تعديل الرصيد بنجاح",
+    "NEGATIVE_BALANCE_NOT_ALLOWED": "لا يمكن أن يصبح الرصيد سالبًا",
 }
 
 def ui_message(request, key: str, level: str = "info"):
@@ -1,5 +1,19 @@
 from django.contrib import admin
-from .models import Transaction, TelecomCompany, RechargeDenomination
+from django.db import transaction as db_transaction
+
+from .models import (
+    DailySalesRollup,
+    InventoryImportJob,
+    RechargeCodeInventory,
+    RechargeDenomination,
+    ReceiptVerification,
+    TelecomCompany,
+    Transaction,
+)
+from .services.rollup import forget_sales, record_admin_change
+
+# Transaction fields the daily rollup is keyed or summed on.
+ROLLUP_FIELDS = ('created_at', 'agent_id', 'company_id', 'denomination_id', 'status', 'price', 'commission_amount')
 
 @admin.register(Transaction)
 class TransactionAdmin(admin.ModelAdmin):
@@ -14,9 +28,32 @@ class TransactionAdmin(admin.ModelAdmin):
     )
 
     list_filter = ('company', 'status', 'created_at')
-    search_fields = ('agent__username', 'code')
+    # code مشفّر: لا بحث به، ولا يُحمَّل في القائمة
+    search_fields = ('agent__username',)
     ordering = ('-created_at',)
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer('code')
+
+    # التعديل والحذف من لوحة الإدارة ينعكسان على DailySalesRollup
+    def save_model(self, request, obj, form, change):
+        with db_transaction.atomic():
+            before = None
+            if change:
+                before = Transaction.objects.select_for_update().only(*ROLLUP_FIELDS).get(pk=obj.pk)
+            super().save_model(request, obj, form, change)
+            record_admin_change(before, obj)
+
+    def delete_model(self, request, obj):
+        with db_transaction.atomic():
+            forget_sales([obj])
+            super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        with db_transaction.atomic():
+            forget_sales(queryset.only(*ROLLUP_FIELDS).iterator(chunk_size=2000))
+            super().delete_queryset(request, queryset)
+
 
 @admin.register(TelecomCompany)
 class TelecomCompanyAdmin(admin.ModelAdmin):
@@ -30,3 +67,60 @@ class RechargeDenominationAdmin(admin.ModelAdmin):
     list_display = ("company", "value", "is_active")
     list_filter = ("company", "is_active")
     search_fields = ("company__name_ar", "company__code")
+
+
+@admin.register(DailySalesRollup)
+class DailySalesRollupAdmin(admin.ModelAdmin):
+    list_display = ('date', 'agent', 'company', 'denomination', 'status', 'tx_count', 'total_price', 'total_commission')
+    list_filter = ('status', 'company', 'date')
+    search_fields = ('agent__username',)
+    raw_id_fields = ('agent', 'company', 'denomination')
+
+    # بيانات مشتقة: تُبنى عبر backfill_sales_rollup فقط
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ReceiptVerification)
+class ReceiptVerificationAdmin(admin.ModelAdmin):
+    list_display = ('transaction', 'status', 'key_id', 'verified_at')
+    list_filter = ('status', 'verified_at')
+    raw_id_fields = ('transaction',)
+
+    # نتائج مشتقة: تُكتب عبر verify_receipts فقط
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(RechargeCodeInventory)
+class RechargeCodeInventoryAdmin(admin.ModelAdmin):
+    # الكود نفسه لا يظهر في القوائم
+    list_display = ('id', 'denomination', 'status', 'batch_ref', 'transaction', 'created_at', 'sold_at')
+    list_filter = ('status', 'denomination__company')
+    search_fields = ('batch_ref',)
+    raw_id_fields = ('denomination', 'transaction')
+    readonly_fields = ('transaction', 'reservation', 'sold_at', 'created_at')
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer('code')
+
+
+@admin.register(InventoryImportJob)
+class InventoryImportJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'file_name', 'denomination', 'status', 'rows_read', 'codes_created', 'duplicates', 'invalid', 'created_at', 'updated_at')
+    list_filter = ('status',)
+    search_fields = ('file_name', 'batch_ref')
+    raw_id_fields = ('denomination', 'created_by')
+
+    # تُنشأ من صفحة الاستيراد وتُحدَّث من مهمة الخلفية فقط
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -1,11 +1,12 @@
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
-from django.core.paginator import Paginator
 
 from apps.accounts.permissions import IsAgent
 from apps.sales.models import Transaction
-from apps.core.api.utils import api_response
+from apps.core.api.pagination import InvalidCursor, NumberedPage, cursor_paginate, page_paginate, parse_page_size
+from apps.core.api.utils import api_json_response, api_response
+from apps.sales.services.rollup import agent_transaction_count
 
 
 class AgentTransactionsAPIView(APIView):
@@ -13,7 +14,11 @@ class AgentTransactionsAPIView(APIView):
     Agent Transactions API
     - List transactions
     - Filter by status
-    - Pagination
+    - Cursor pagination: ?cursor=<next_cursor|previous_cursor>&per_page=
+    - Cursor responses keep the pre-cursor page / total_pages / total_count
+      keys; the total comes from the daily sales rollup (no COUNT(*))
+    - Legacy ?page=N (without cursor): numbered pages with page / total_pages /
+      total_count, as before the cursors (COUNT(*) + OFFSET)
     """
     permission_classes = [IsAuthenticated, IsAgent]
 
@@ -21,32 +26,38 @@ class AgentTransactionsAPIView(APIView):
         agent = request.user
         status_filter = request.GET.get("status")  # PRINTED / CONFIRMED
 
-        # Validate pagination params
-        try:
-            page = int(request.GET.get("page", 1))
-        except (TypeError, ValueError):
-            page = 1
-
-        try:
-            per_page = int(request.GET.get("per_page", 20))
-        except (TypeError, ValueError):
-            per_page = 20
+        cursor = request.GET.get("cursor") or None
+        page = request.GET.get("page")
+        per_page = parse_page_size(request.GET.get("per_page"), maximum=100)
 
-        # Clamp per_page to reasonable bounds
-        per_page = max(1, min(per_page, 100))
+        qs = Transaction.objects.filter(agent=agent).select_related("company", "denomination__company").defer("code")
 
-        qs = Transaction.objects.filter(agent=agent).order_by("-created_at")
-
-        if status_filter in ["PRINTED", "CONFIRMED"]:
+        if status_filter not in ["PRINTED", "CONFIRMED"]:
+            status_filter = None
+        if status_filter:
             qs = qs.filter(status=status_filter)
 
-        paginator = Paginator(qs, per_page)
-        page_obj = paginator.get_page(page)
+        try:
+            if page is not None and not cursor:
+                page_obj = page_paginate(qs, page, per_page)
+            else:
+                page_obj = cursor_paginate(qs, cursor, per_page)
+        except InvalidCursor:
+            return api_response(
+                "INVALID_CURSOR",
+                "مؤشر الصفحة غير صالح",
+                status.HTTP_400_BAD_REQUEST,
+            )
+
+        if isinstance(page_obj, NumberedPage):
+            pagination = page_obj.as_dict()
+        else:
+            # total_pages / total_count تبقى لعملاء التطبيق القدامى (من rollup، بدون COUNT(*))
+            pagination = page_obj.as_dict(total=agent_transaction_count(agent, status_filter))
+        pagination["total_count"] = pagination.pop("total_items")
 
         data = {
-            "page": page_obj.number,
-            "total_pages": paginator.num_pages,
-            "total_count": paginator.count,
+            **pagination,
             "results": [
                 {
                     "id": t.id,
@@ -67,7 +78,7 @@ class AgentTransactionsAPIView(APIView):
         serializer = TransactionListSerializer(data=data)
         serializer.is_valid(raise_exception=True)
 
-        return api_response(
+        return api_json_response(
             "SUCCESS",
             "تم جلب العمليات بنجاح",
             status.HTTP_200_OK,
@@ -2,6 +2,7 @@ from django.urls import path
 
 from .catalog_views import PublicCatalogAPIView, AgentCatalogAPIView
 from .sell_views import SellRechargeAPIView
+from apps.sales.api.bulk_sell_views import BulkSellRechargeAPIView
 from .agent_transactions_views import AgentTransactionsAPIView
 from .confirm_views import ConfirmRechargeAPIView
 from .receipt_views import ReceiptAPIView, ReissueReceiptAPIView
@@ -11,6 +12,7 @@ urlpatterns = [
     path("public/catalog/", PublicCatalogAPIView.as_view(), name="app-public-catalog"),
 
     path("sell/", SellRechargeAPIView.as_view(), name="app-sell"),
+    path("sell/bulk/", BulkSellRechargeAPIView.as_view(), name="app-sell-bulk"),
     path("transactions/", AgentTransactionsAPIView.as_view(), name="app-transactions"),
 
     path("confirm/", ConfirmRechargeAPIView.as_view(), name="app-confirm"),
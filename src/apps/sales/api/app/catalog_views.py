@@ -1,7 +1,7 @@
 from rest_framework.views import APIView
 from rest_framework.permissions import AllowAny
 from apps.sales.models import RechargeDenomination
-from apps.core.api.utils import api_response
+from apps.core.api.utils import api_json_response
 
 
 class PublicCatalogAPIView(APIView):
@@ -13,7 +13,7 @@ class PublicCatalogAPIView(APIView):
                 "id", "value", "price_to_agent", "company__code", "company__name_ar"
             )
         )
-        return api_response("SUCCESS", "OK", data={"items": items})
+        return api_json_response("SUCCESS", "OK", data={"items": items})
 
 
 class AgentCatalogAPIView(APIView):
@@ -26,4 +26,4 @@ class AgentCatalogAPIView(APIView):
                 "id", "value", "price_to_agent", "company__code", "company__name_ar"
             )
         )
-        return api_response("SUCCESS", "OK", data={"items": items})
+        return api_json_response("SUCCESS", "OK", data={"items": items})
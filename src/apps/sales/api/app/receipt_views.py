@@ -3,9 +3,10 @@ from rest_framework.views import APIView
 from rest_framework import status
 from apps.sales.models import Transaction
 from apps.core.api.utils import api_response
+from apps.core.api.idempotency import IdempotentAPIMixin
 from rest_framework.permissions import IsAuthenticated
 from apps.accounts.permissions import IsAgent
-from apps.accounts.models import AuditLog
+from apps.accounts.services.audit import record_audit
 from apps.core.api.messages import MESSAGES
 
 
@@ -20,7 +21,7 @@ class ReceiptAPIView(APIView):
 
     def get(self, request, token):
         try:
-            tx = Transaction.objects.get(
+            tx = Transaction.objects.defer("code").get(
                 public_token=token,
                 status="CONFIRMED"
             )
@@ -59,7 +60,7 @@ class ReceiptAPIView(APIView):
         )
 
 
-class ReissueReceiptAPIView(APIView):
+class ReissueReceiptAPIView(IdempotentAPIMixin, APIView):
     """
     Reissue Receipt API (POS)
     """
@@ -92,7 +93,7 @@ class ReissueReceiptAPIView(APIView):
         transaction.save(update_fields=['receipt_reissue_count'])
 
         # Audit Log
-        AuditLog.objects.create(
+        record_audit(
             actor=request.user,
             action='REISSUE_RECEIPT',
             transaction_id=transaction.id,
@@ -0,0 +1,92 @@
+from rest_framework.views import APIView
+from rest_framework.permissions import IsAuthenticated
+from rest_framework import status
+
+from apps.accounts.permissions import IsAgent
+from apps.sales.models import RechargeDenomination
+from apps.sales.api.serializers import BulkSellInputSerializer
+from apps.sales.services.selling import SaleError, sell_bulk
+from apps.core.api.messages import MESSAGES
+from apps.core.api.utils import api_response
+from apps.sales.api.replay import SaleIdempotencyMixin
+
+
+class BulkSellRechargeAPIView(SaleIdempotencyMixin, APIView):
+    """
+    Bulk Sell API
+    - N cards of one denomination in one atomic request
+    - One balance lock, one insert, one audit row
+    """
+    permission_classes = [IsAuthenticated, IsAgent]
+    sale_source = "WEB"
+
+    def post(self, request):
+        agent = request.user
+
+        if not agent.is_active:
+            return api_response(
+                'AGENT_SUSPENDED',
+                MESSAGES['AGENT_SUSPENDED'],
+                status.HTTP_403_FORBIDDEN
+            )
+
+        serializer_in = BulkSellInputSerializer(data=request.data)
+        serializer_in.is_valid(raise_exception=True)
+        data = serializer_in.validated_data
+
+        denominations = RechargeDenomination.objects.select_related("company").filter(
+            is_active=True,
+            company__is_active=True,
+        )
+        if data.get("denomination_id"):
+            denominations = denominations.filter(id=data["denomination_id"])
+        else:
+            denominations = denominations.filter(
+                company__code=data["company_code"].strip(),
+                product_type=data["product_type"].strip().upper(),
+                value=data["value"],
+            )
+
+        denom = denominations.first()
+        if denom is None:
+            return api_response(
+                "DENOMINATION_NOT_FOUND",
+                MESSAGES["DENOMINATION_NOT_FOUND"],
+                status.HTTP_404_NOT_FOUND,
+            )
+
+        device_id = (request.headers.get("X-DEVICE-ID") or "").strip() or None
+
+        try:
+            transactions = sell_bulk(
+                agent,
+                denom,
+                data["quantity"],
+                source=self.sale_source,
+                device_id=device_id,
+            )
+        except SaleError as exc:
+            return api_response(exc.code, exc.message, exc.status_code)
+
+        return api_response(
+            'SALE_CREATED',
+            MESSAGES['SALE_CREATED'],
+            status.HTTP_201_CREATED,
+            data={
+                'company_code': denom.company.code,
+                'company_name': denom.company.name_ar,
+                'product_type': denom.product_type,
+                'value': denom.value,
+                'price': str(denom.price_to_agent),
+                'quantity': len(transactions),
+                'total': str(sum(tx.price for tx in transactions)),
+                'items': [
+                    {
+                        'transaction_id': tx.id,
+                        'code': tx.code,
+                        'receipt_token': str(tx.public_token),
+                    }
+                    for tx in transactions
+                ],
+            }
+        )
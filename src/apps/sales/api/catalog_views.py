@@ -1,11 +1,26 @@
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+
 from rest_framework.views import APIView
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework import status
 
-from apps.sales.models import TelecomCompany
 from apps.accounts.permissions import IsAgent
-from apps.core.api.utils import api_response
-from apps.core.api.messages import MESSAGES
+from apps.sales.services.catalog import AGENT, PUBLIC, get_catalog_snapshot
+
+
+def catalog_response(request, kind, cache_control):
+    """Serve a pre-serialized catalog snapshot, honouring If-None-Match."""
+    snapshot = get_catalog_snapshot(kind, request)
+
+    if_none_match = parse_etags(request.headers.get("If-None-Match", ""))
+    if snapshot.etag in if_none_match or "*" in if_none_match:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(snapshot.body, content_type="application/json")
+
+    response["ETag"] = snapshot.etag
+    response["Cache-Control"] = cache_control
+    return response
 
 
 # ============================================================
@@ -21,48 +36,7 @@ class PublicCatalogAPIView(APIView):
     permission_classes = [AllowAny]
 
     def get(self, request):
-        companies = (
-            TelecomCompany.objects
-            .filter(is_active=True)
-            .prefetch_related("denominations")
-            .order_by("display_order", "name_ar")
-        )
-
-        result = []
-
-        for company in companies:
-            products = {}
-
-            for d in company.denominations.all():
-                if not d.is_active:
-                    continue
-
-                products.setdefault(d.product_type, []).append({
-                    "id": d.id,
-                    "value": d.value
-                })
-
-            if not products:
-                continue
-
-            result.append({
-                "company_id": company.id,
-                "company_code": company.code,
-                "company_name": company.name_ar,
-                "company_type": company.company_type,
-                "logo": (
-                    request.build_absolute_uri(company.logo.url)
-                    if company.logo else None
-                ),
-                "products": products
-            })
-
-        return api_response(
-            "SUCCESS",
-            MESSAGES.get("SUCCESS", "تم بنجاح"),
-            status.HTTP_200_OK,
-            data=result
-        )
+        return catalog_response(request, PUBLIC, "public, no-cache")
 
 
 # ============================================================
@@ -78,47 +52,4 @@ class AgentCatalogAPIView(APIView):
     permission_classes = [IsAuthenticated, IsAgent]
 
     def get(self, request):
-        companies = (
-            TelecomCompany.objects
-            .filter(is_active=True)
-            .prefetch_related("denominations")
-            .order_by("display_order", "name_ar")
-        )
-
-        result = []
-
-        for company in companies:
-            denominations = []
-
-            for d in company.denominations.all():
-                if not d.is_active:
-                    continue
-
-                denominations.append({
-                    "id": d.id,
-                    "value": d.value,
-                    "price_to_agent": str(d.price_to_agent),
-                    "product_type": d.product_type
-                })
-
-            if not denominations:
-                continue
-
-            result.append({
-                "company_id": company.id,
-                "company_code": company.code,
-                "company_name": company.name_ar,
-                "company_type": company.company_type,
-                "logo": (
-                    request.build_absolute_uri(company.logo.url)
-                    if company.logo else None
-                ),
-                "denominations": denominations
-            })
-
-        return api_response(
-            "SUCCESS",
-            MESSAGES.get("SUCCESS", "تم بنجاح"),
-            status.HTTP_200_OK,
-            data=result
-        )
+        return catalog_response(request, AGENT, "private, no-cache")
@@ -9,13 +9,15 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
 
 from apps.accounts.permissions import IsAgent
-from apps.accounts.models import AuditLog
+from apps.accounts.services.audit import record_audit
 from apps.commissions.models import get_effective_commission
 from apps.sales.models import Transaction
+from apps.sales.services.rollup import record_confirmation
 from apps.core.api.utils import api_response
+from apps.core.api.idempotency import IdempotentAPIMixin
 
 
-class ConfirmRechargeAPIView(APIView):
+class ConfirmRechargeAPIView(IdempotentAPIMixin, APIView):
     """
     Confirm Recharge API
     - CONFIRMED
@@ -28,27 +30,27 @@ class ConfirmRechargeAPIView(APIView):
     def post(self, request, transaction_id):
         agent = request.user
 
-        # ======================
-        # Fetch Transaction
-        # ======================
-        try:
-            transaction_obj = Transaction.objects.select_for_update().get(
-                id=transaction_id,
-                agent=agent,
-                status="PRINTED"
-            )
-        except Transaction.DoesNotExist:
-            return api_response(
-                "TRANSACTION_NOT_FOUND",
-                "العملية غير موجودة أو مؤكدة مسبقًا",
-                status.HTTP_404_NOT_FOUND
-            )
-
         # ======================
         # Atomic Confirm
         # ======================
         with db_transaction.atomic():
 
+            # ======================
+            # Fetch Transaction (row lock held until commit)
+            # ======================
+            try:
+                transaction_obj = Transaction.objects.select_for_update().get(
+                    id=transaction_id,
+                    agent=agent,
+                    status="PRINTED"
+                )
+            except Transaction.DoesNotExist:
+                return api_response(
+                    "TRANSACTION_NOT_FOUND",
+                    "العملية غير موجودة أو مؤكدة مسبقًا",
+                    status.HTTP_404_NOT_FOUND
+                )
+
             # ======================
             # Calculate Commission
             # ======================
@@ -78,13 +80,18 @@ class ConfirmRechargeAPIView(APIView):
             # ======================
             # Audit Log
             # ======================
-            AuditLog.objects.create(
+            record_audit(
                 actor=agent,
                 action="CONFIRM",
                 transaction_id=transaction_obj.id,
                 message=f"تم تأكيد عملية الشحن رقم {transaction_obj.id}"
             )
 
+            # ======================
+            # Daily rollup (PRINTED -> CONFIRMED)
+            # ======================
+            record_confirmation(transaction_obj)
+
         # ======================
         # Build Receipt URL
         # ======================
@@ -5,6 +5,7 @@ from apps.accounts.permissions import IsPosAgent
 # Reuse existing sales endpoints but enforce POS-only permission.
 from apps.sales.api.catalog_views import AgentCatalogAPIView
 from apps.sales.api.sell_views import SellRechargeAPIView
+from apps.sales.api.bulk_sell_views import BulkSellRechargeAPIView
 from apps.sales.api.agent_transactions_views import AgentTransactionsAPIView
 from apps.sales.api.confirm_views import ConfirmRechargeAPIView
 from apps.sales.api.receipt_views import ReceiptAPIView
@@ -19,6 +20,11 @@ class PosSellRechargeAPIView(SellRechargeAPIView):
     permission_classes = [IsAuthenticated, IsPosAgent]
 
 
+class PosBulkSellRechargeAPIView(BulkSellRechargeAPIView):
+    permission_classes = [IsAuthenticated, IsPosAgent]
+    sale_source = "POS"
+
+
 class PosAgentSalesTransactionsAPIView(AgentTransactionsAPIView):
     permission_classes = [IsAuthenticated, IsPosAgent]
 
@@ -37,6 +43,7 @@ class PosReceiptPreviewAPIView(AgentReceiptPreviewAPIView):
 __all__ = [
     "PosAgentCatalogAPIView",
     "PosSellRechargeAPIView",
+    "PosBulkSellRechargeAPIView",
     "PosAgentSalesTransactionsAPIView",
     "PosConfirmRechargeAPIView",
     "PosReceiptAPIView",
@@ -0,0 +1,50 @@
+from rest_framework.views import APIView
+from rest_framework.permissions import IsAuthenticated
+from rest_framework import status
+
+from apps.accounts.permissions import IsPosAgent
+from apps.sales.api.serializers import OfflineSyncInputSerializer
+from apps.sales.services.selling import SYNC_CREATED, SYNC_DUPLICATE, SaleError, sync_offline_sales
+from apps.core.api.utils import api_response
+
+
+class PosOfflineSyncAPIView(APIView):
+    """
+    POS Offline Sync API
+    - Batch of sales captured offline, keyed by offline_uuid
+    - Safe to retry: already-synced items come back as DUPLICATE without writes
+    """
+    permission_classes = [IsAuthenticated, IsPosAgent]
+
+    def post(self, request):
+        serializer_in = OfflineSyncInputSerializer(data=request.data)
+        serializer_in.is_valid(raise_exception=True)
+
+        device_id = (request.headers.get("X-DEVICE-ID") or "").strip() or None
+
+        try:
+            results = sync_offline_sales(
+                request.user,
+                serializer_in.validated_data["items"],
+                device_id=device_id,
+            )
+        except SaleError as exc:
+            return api_response(exc.code, exc.message, exc.status_code)
+
+        created = sum(1 for r in results if r["status"] == SYNC_CREATED)
+        duplicates = sum(1 for r in results if r["status"] == SYNC_DUPLICATE)
+
+        return api_response(
+            "SUCCESS",
+            "تمت المزامنة",
+            status.HTTP_200_OK,
+            data={
+                "created": created,
+                "duplicates": duplicates,
+                "failed": len(results) - created - duplicates,
+                "results": results,
+            }
+        )
+
+
+__all__ = ["PosOfflineSyncAPIView"]
@@ -3,15 +3,19 @@ from django.urls import path
 from apps.sales.api.pos.pos_views import (
     PosAgentCatalogAPIView,
     PosSellRechargeAPIView,
+    PosBulkSellRechargeAPIView,
     PosAgentSalesTransactionsAPIView,
     PosConfirmRechargeAPIView,
     PosReceiptAPIView,
     PosReceiptPreviewAPIView,
 )
+from apps.sales.api.pos.sync_views import PosOfflineSyncAPIView
 
 urlpatterns = [
     path("catalog/", PosAgentCatalogAPIView.as_view(), name="pos-catalog"),
     path("sell/", PosSellRechargeAPIView.as_view(), name="pos-sell"),
+    path("sell/bulk/", PosBulkSellRechargeAPIView.as_view(), name="pos-sell-bulk"),
+    path("sync/", PosOfflineSyncAPIView.as_view(), name="pos-sync"),
     path("transactions/", PosAgentSalesTransactionsAPIView.as_view(), name="pos-transactions"),
 
     # Optional flow endpoints used by POS UI
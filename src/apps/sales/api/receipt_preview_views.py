@@ -1,3 +1,4 @@
+from django.http import HttpResponse
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
@@ -5,7 +6,8 @@ from rest_framework import status
 from apps.core.api.utils import api_response
 from apps.accounts.permissions import IsAdmin, IsAgent
 from apps.sales.models import Transaction
-from apps.sales.services.receipt import verify_receipt_payload
+from apps.sales.services.receipt import expand_receipt_payload, receipt_escpos
+from apps.sales.services.receipt_verification import receipt_verified
 
 
 class AdminReceiptPreviewAPIView(APIView):
@@ -14,11 +16,11 @@ class AdminReceiptPreviewAPIView(APIView):
 
     def get(self, request, transaction_id: int):
         try:
-            tx = Transaction.objects.select_related("agent", "company", "denomination").get(id=transaction_id)
+            tx = Transaction.objects.select_related("agent", "company", "denomination", "receipt", "receipt_verification").get(id=transaction_id)
         except Transaction.DoesNotExist:
             return api_response("NOT_FOUND", "العملية غير موجودة", status.HTTP_404_NOT_FOUND)
 
-        payload = tx.receipt_payload
+        payload = expand_receipt_payload(tx.receipt_payload)
         if not payload:
             return api_response("NO_RECEIPT_PAYLOAD", "لا يوجد Snapshot للوصل لهذه العملية", status.HTTP_404_NOT_FOUND)
 
@@ -28,32 +30,38 @@ class AdminReceiptPreviewAPIView(APIView):
             "status": tx.status,
             "receipt": payload,
             "integrity": {
-                "verified": verify_receipt_payload(tx),
+                "verified": receipt_verified(tx),
                 "algo": getattr(tx, "receipt_hmac_algo", None),
             },
         })
 
 
 class AgentReceiptPreviewAPIView(APIView):
-    """Agent can preview their own receipt payload."""
+    """Agent can preview their own receipt payload.
+
+    `?output=escpos` returns the receipt as ESC/POS bytes for direct printing.
+    """
     permission_classes = [IsAuthenticated, IsAgent]
 
     def get(self, request, transaction_id: int):
         try:
-            tx = Transaction.objects.select_related("agent").get(id=transaction_id, agent=request.user)
+            tx = Transaction.objects.select_related("agent", "receipt", "receipt_verification").get(id=transaction_id, agent=request.user)
         except Transaction.DoesNotExist:
             return api_response("NOT_FOUND", "العملية غير موجودة", status.HTTP_404_NOT_FOUND)
 
-        payload = tx.receipt_payload
+        payload = expand_receipt_payload(tx.receipt_payload)
         if not payload:
             return api_response("NO_RECEIPT_PAYLOAD", "لا يوجد Snapshot للوصل لهذه العملية", status.HTTP_404_NOT_FOUND)
 
+        if request.query_params.get("output") == "escpos":
+            return HttpResponse(receipt_escpos(payload), content_type="application/octet-stream")
+
         return api_response("SUCCESS", "تم جلب معاينة الوصل", status.HTTP_200_OK, data={
             "transaction_id": tx.id,
             "status": tx.status,
             "receipt": payload,
             "integrity": {
-                "verified": verify_receipt_payload(tx),
+                "verified": receipt_verified(tx),
                 "algo": getattr(tx, "receipt_hmac_algo", None),
             },
         })
\ No newline at end of file
@@ -0,0 +1,68 @@
+from rest_framework.views import APIView
+from rest_framework.permissions import IsAuthenticated
+from rest_framework import status
+
+from apps.core.api.utils import api_response
+from apps.accounts.permissions import IsAdmin
+from apps.sales.models import ReceiptVerification
+from apps.sales.services.receipt_verification import (
+    month_bounds,
+    receipts_between,
+    request_limit,
+    unverified_receipts,
+    verification_summary,
+    verify_pending_receipts,
+)
+
+# Invalid receipts listed per response; the full list is in ReceiptVerification.
+INVALID_LIST_LIMIT = 100
+
+
+class AdminReceiptVerificationAPIView(APIView):
+    """Receipt integrity for one month.
+
+    GET  ?month=YYYY-MM : stored results (no recomputation).
+    POST {"month": "YYYY-MM"} : verify up to RECEIPT_VERIFY_REQUEST_LIMIT of
+        that month's not yet verified receipts, then return the results;
+        `remaining` says how many are left (POST again until it is 0).
+    Whole months at volume belong to `manage.py verify_receipts --month ... --workers N`.
+    """
+    permission_classes = [IsAuthenticated, IsAdmin]
+
+    def _month_receipts(self, month):
+        try:
+            start, end = month_bounds(month or "")
+        except ValueError:
+            return None
+        return receipts_between(start, end)
+
+    def _result(self, month, qs, verified=None, remaining=None):
+        invalid = list(
+            ReceiptVerification.objects
+            .filter(transaction__in=qs.order_by().values("pk"), status=ReceiptVerification.STATUS_INVALID)
+            .order_by("transaction_id")
+            .values_list("transaction_id", flat=True)[:INVALID_LIST_LIMIT]
+        )
+        return api_response("SUCCESS", "تم جلب نتيجة التحقق من الوصولات", status.HTTP_200_OK, data={
+            "month": month,
+            "verified_now": verified,
+            "remaining": remaining,
+            "summary": verification_summary(qs),
+            "invalid_transaction_ids": invalid,
+        })
+
+    def get(self, request):
+        month = request.query_params.get("month")
+        qs = self._month_receipts(month)
+        if qs is None:
+            return api_response("INVALID_MONTH", "صيغة الشهر غير صحيحة (YYYY-MM)", status.HTTP_400_BAD_REQUEST)
+        return self._result(month, qs)
+
+    def post(self, request):
+        month = request.data.get("month")
+        qs = self._month_receipts(month)
+        if qs is None:
+            return api_response("INVALID_MONTH", "صيغة الشهر غير صحيحة (YYYY-MM)", status.HTTP_400_BAD_REQUEST)
+        # Bounded per request: a month at real volume would outlast the request/proxy timeout.
+        verified = verify_pending_receipts(qs, request_limit())
+        return self._result(month, qs, verified=verified, remaining=unverified_receipts(qs).count())
@@ -9,12 +9,14 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
 
 from apps.accounts.permissions import IsAgent
-from apps.accounts.models import AuditLog
+from apps.accounts.services.audit import record_audit
 from apps.sales.models import Transaction
+from apps.sales.services.receipt_render import evict_receipt_on_commit
 from apps.core.api.utils import api_response
+from apps.core.api.idempotency import IdempotentAPIMixin
 
 
-class ReissueReceiptAPIView(APIView):
+class ReissueReceiptAPIView(IdempotentAPIMixin, APIView):
     """
     Reissue Receipt API
     - Agent only
@@ -57,6 +59,7 @@ class ReissueReceiptAPIView(APIView):
         # ======================
         with db_transaction.atomic():
 
+            evict_receipt_on_commit(tx.public_token)
             tx.public_token = uuid.uuid4()
             tx.receipt_reissue_count += 1
             tx.receipt_expires_at = timezone.now() + timedelta(hours=24)
@@ -72,7 +75,7 @@ class ReissueReceiptAPIView(APIView):
             # ======================
             # Audit Log
             # ======================
-            AuditLog.objects.create(
+            record_audit(
                 actor=agent,
                 action="REISSUE_RECEIPT",
                 transaction_id=tx.id,
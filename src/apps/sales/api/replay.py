@@ -0,0 +1,58 @@
+"""Idempotent replays of sell responses without the recharge codes.
+
+Sell responses carry the card code next to its `transaction_id` (the
+legacy sell API, and every item of a bulk sell). Stored replays live in the
+shared cache (the DatabaseCache table in production) for IDEMPOTENCY_TTL,
+so the code is dropped before storing and read back from the (encrypted)
+Transaction when the response is replayed.
+"""
+
+from apps.core.api.idempotency import IdempotentAPIMixin
+from apps.sales.models import Transaction
+
+
+def _sale_entries(data):
+    """Dicts of `data` that hold a sale's code (have both transaction_id and code)."""
+    payload = data.get("data") if isinstance(data, dict) else None
+    if not isinstance(payload, dict):
+        return []
+    entries = [payload] + [item for item in payload.get("items") or () if isinstance(item, dict)]
+    return [entry for entry in entries if "transaction_id" in entry and "code" in entry]
+
+
+def strip_codes(data):
+    """Copy of a sell response's data with every sale code set to None."""
+    if not _sale_entries(data):
+        return data
+    stripped = {**data, "data": dict(data["data"])}
+    payload = stripped["data"]
+    if "items" in payload:
+        payload["items"] = [dict(item) if isinstance(item, dict) else item for item in payload["items"]]
+    for entry in _sale_entries(stripped):
+        entry["code"] = None
+    return stripped
+
+
+def fill_codes(data, agent):
+    """Put the codes of `agent`'s transactions back into data from `strip_codes` (one query)."""
+    entries = _sale_entries(data)
+    if not entries:
+        return data
+    codes = dict(
+        Transaction.objects
+        .filter(agent=agent, id__in=[entry["transaction_id"] for entry in entries])
+        .values_list("id", "code")
+    )
+    for entry in entries:
+        entry["code"] = codes.get(entry["transaction_id"])
+    return data
+
+
+class SaleIdempotencyMixin(IdempotentAPIMixin):
+    """IdempotentAPIMixin for sell APIs: replays never store the recharge code."""
+
+    def idempotency_stored_data(self, data):
+        return strip_codes(data)
+
+    def idempotency_replayed_data(self, request, data):
+        return fill_codes(data, request.user)
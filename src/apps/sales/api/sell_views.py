@@ -1,17 +1,16 @@
-from decimal import Decimal
-from django.db import transaction as db_transaction
-
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
 
 from apps.accounts.permissions import IsAgent
-from apps.sales.models import Transaction, RechargeDenomination
+from apps.sales.models import RechargeDenomination
+from apps.sales.services.selling import SaleError, sell_one
 from apps.core.api.utils import api_response
+from apps.core.api.idempotency import IdempotentAPIMixin
 from apps.sales.api.serializers import SellResponseSerializer, SellInputSerializer
 
 
-class SellRechargeAPIView(APIView):
+class SellRechargeAPIView(IdempotentAPIMixin, APIView):
     """
     Sell API (FK-based)
     """
@@ -36,30 +35,15 @@ class SellRechargeAPIView(APIView):
                 status.HTTP_404_NOT_FOUND
             )
 
-        price = denom.price_to_agent
-
-        with db_transaction.atomic():
-            balance = agent.agent_balance
-
-            if balance.balance < price:
-                return api_response(
-                    "INSUFFICIENT_BALANCE",
-                    "رصيدك غير كافٍ",
-                    status.HTTP_400_BAD_REQUEST
-                )
-
-            balance.balance -= price
-            balance.save(update_fields=["balance"])
-
-            tx = Transaction.objects.create(
-                agent=agent,
-                company=denom.company,
-                denomination=denom,
-                price=price,
-                commission_amount=Decimal("0.00"),
-                code="PENDING",      # لاحقًا: كود حقيقي
-                source="POS"
+        try:
+            tx = sell_one(
+                agent,
+                denom,
+                source="POS",
+                device_id=(request.headers.get("X-DEVICE-ID") or "").strip() or None,
             )
+        except SaleError as exc:
+            return api_response(exc.code, exc.message, exc.status_code)
 
         data = {
             "transaction_id": tx.id,
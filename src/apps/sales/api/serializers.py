@@ -1,5 +1,7 @@
 from rest_framework import serializers
 
+from apps.core.api.messages import MESSAGES
+
 class ReceiptSerializer(serializers.Serializer):
 	transaction_id = serializers.IntegerField()
 	company = serializers.CharField()
@@ -30,9 +32,16 @@ class TransactionItemSerializer(serializers.Serializer):
 
 
 class TransactionListSerializer(serializers.Serializer):
-	page = serializers.IntegerField()
-	total_pages = serializers.IntegerField()
-	total_count = serializers.IntegerField()
+	# page / total_pages / total_count: every response (page is null on cursor pages after the first);
+	# next/previous_cursor: cursor responses
+	page = serializers.IntegerField(allow_null=True, required=False)
+	total_pages = serializers.IntegerField(required=False)
+	page_size = serializers.IntegerField()
+	next_cursor = serializers.CharField(allow_null=True, required=False)
+	previous_cursor = serializers.CharField(allow_null=True, required=False)
+	has_next = serializers.BooleanField()
+	has_previous = serializers.BooleanField()
+	total_count = serializers.IntegerField(allow_null=True)
 	results = TransactionItemSerializer(many=True)
 
 
@@ -43,3 +52,44 @@ class ReissueResponseSerializer(serializers.Serializer):
 	reissue_count = serializers.IntegerField()
 	reissue_limit = serializers.IntegerField()
 
+
+
+class BulkSellInputSerializer(serializers.Serializer):
+	"""denomination_id, or company_code + product_type + value (same as the single sell APIs)."""
+	denomination_id = serializers.IntegerField(required=False)
+	company_code = serializers.CharField(required=False, allow_blank=True)
+	product_type = serializers.CharField(required=False, default="MOBILE")
+	value = serializers.IntegerField(required=False)
+	quantity = serializers.IntegerField(min_value=1)
+
+	def validate_quantity(self, value):
+		from apps.sales.services.selling import bulk_sell_max_quantity
+
+		max_quantity = bulk_sell_max_quantity()
+		if value > max_quantity:
+			raise serializers.ValidationError(MESSAGES["BULK_QUANTITY_LIMIT"].format(max_quantity=max_quantity))
+		return value
+
+	def validate(self, attrs):
+		if not attrs.get("denomination_id") and not (attrs.get("company_code") and attrs.get("value")):
+			raise serializers.ValidationError(MESSAGES["DENOMINATION_REQUIRED"])
+		return attrs
+
+
+class OfflineSaleItemSerializer(serializers.Serializer):
+	offline_uuid = serializers.UUIDField()
+	denomination_id = serializers.IntegerField()
+	sold_at = serializers.DateTimeField(required=False)
+	code = serializers.CharField(required=False, allow_blank=True, max_length=150)
+
+
+class OfflineSyncInputSerializer(serializers.Serializer):
+	items = OfflineSaleItemSerializer(many=True, allow_empty=False)
+
+	def validate_items(self, value):
+		from apps.sales.services.selling import pos_sync_max_items
+
+		max_items = pos_sync_max_items()
+		if len(value) > max_items:
+			raise serializers.ValidationError(f"الحد الأقصى {max_items} عملية في الطلب الواحد")
+		return value
@@ -1,16 +1,19 @@
 from django.urls import path
 
 from .views import SellRechargeAPIView, ConfirmRechargeAPIView
+from .bulk_sell_views import BulkSellRechargeAPIView
 from .receipt_views import ReceiptAPIView
 from .reissue_views import ReissueReceiptAPIView
 from .agent_transactions_views import AgentTransactionsAPIView
 from .catalog_views import PublicCatalogAPIView, AgentCatalogAPIView
 from .receipt_preview_views import AdminReceiptPreviewAPIView, AgentReceiptPreviewAPIView
+from .receipt_verification_views import AdminReceiptVerificationAPIView
 
 
 urlpatterns = [
     # Core sale flow
     path("sell/", SellRechargeAPIView.as_view(), name="api-sell"),
+    path("sell/bulk/", BulkSellRechargeAPIView.as_view(), name="api-sell-bulk"),
     path("confirm/<int:transaction_id>/", ConfirmRechargeAPIView.as_view(), name="api-confirm"),
 
     # Receipt API
@@ -23,6 +26,7 @@ urlpatterns = [
     # Receipt preview
     path("agent/transactions/<int:transaction_id>/receipt-preview/", AgentReceiptPreviewAPIView.as_view(), name="api-agent-receipt-preview"),
     path("admin/transactions/<int:transaction_id>/receipt-preview/", AdminReceiptPreviewAPIView.as_view(), name="api-admin-receipt-preview"),
+    path("admin/receipts/verification/", AdminReceiptVerificationAPIView.as_view(), name="api-admin-receipt-verification"),
 
     # Catalog
     path("public/catalog/", PublicCatalogAPIView.as_view(), name="api-public-catalog"),
@@ -1,4 +1,3 @@
-import uuid
 from decimal import Decimal
 
 from django.db import transaction as db_transaction
@@ -9,19 +8,21 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
 
 from apps.accounts.permissions import IsAgent
-from apps.accounts.models import AuditLog
-from apps.billing.models import AgentBalance
+from apps.accounts.services.audit import record_audit
 from apps.sales.models import Transaction, TelecomCompany, RechargeDenomination
-from apps.sales.services.receipt import build_receipt_payload, sign_receipt_payload
+from apps.sales.services.rollup import record_confirmation
+from apps.sales.services.selling import SaleError, sell_one
 from apps.commissions.services import get_commission_amount
 
 from apps.core.api.messages import MESSAGES
 from apps.core.api.utils import api_response
+from apps.core.api.idempotency import IdempotentAPIMixin
+from apps.sales.api.replay import SaleIdempotencyMixin
 from django.urls import reverse
 
 
 
-class SellRechargeAPIView(APIView):
+class SellRechargeAPIView(SaleIdempotencyMixin, APIView):
     permission_classes = [IsAuthenticated, IsAgent]
 
     def post(self, request):
@@ -30,7 +31,7 @@ class SellRechargeAPIView(APIView):
         if not agent.is_active:
             return api_response(
                 'AGENT_SUSPENDED',
-                MESSAGES['AGENT_SUSPENDED'],
+                MESSAGES.get('AGENT_SUSPENDED', "الحساب موقوف"),
                 status.HTTP_403_FORBIDDEN
             )
 
@@ -44,7 +45,7 @@ class SellRechargeAPIView(APIView):
         except (TypeError, ValueError):
             return api_response(
                 "INVALID_DENOMINATION_FORMAT",
-                MESSAGES["INVALID_DENOMINATION_FORMAT"],
+                MESSAGES.get("INVALID_DENOMINATION_FORMAT", "قيمة الفئة غير صالحة"),
                 status.HTTP_400_BAD_REQUEST,
             )
 
@@ -65,7 +66,7 @@ class SellRechargeAPIView(APIView):
             )
 
         try:
-            denom = RechargeDenomination.objects.get(
+            denom = RechargeDenomination.objects.select_related("company").get(
                 company=company,
                 product_type=product_type,
                 value=value,
@@ -80,56 +81,18 @@ class SellRechargeAPIView(APIView):
 
         price = Decimal(denom.price_to_agent)
 
-        with db_transaction.atomic():
-            try:
-                agent_balance = AgentBalance.objects.select_for_update().get(agent=agent)
-            except AgentBalance.DoesNotExist:
-                return api_response(
-                    'BALANCE_NOT_FOUND',
-                    MESSAGES['BALANCE_NOT_FOUND'],
-                    status.HTTP_404_NOT_FOUND
-                )
-
-            if agent_balance.balance < price:
-                return api_response(
-                    'INSUFFICIENT_BALANCE',
-                    MESSAGES['INSUFFICIENT_BALANCE'],
-                    status.HTTP_400_BAD_REQUEST
-                )
-
-            agent_balance.balance -= price
-            agent_balance.save()
-
-            # NOTE: replace this with a real inventory code pull.
-            recharge_code = f"{company.code}-{uuid.uuid4().hex[:12]}"
-
-            transaction_obj = Transaction.objects.create(
-                agent=agent,
-                company=company,
-                denomination=denom,
-                price=price,
-                code=recharge_code,
-                status='PRINTED',
-                commission_amount=0
-            )
-
-            # Snapshot what was printed/shown on the POS for later admin review
-            payload = build_receipt_payload(transaction_obj)
-            transaction_obj.receipt_payload = payload
-            transaction_obj.receipt_hmac = sign_receipt_payload(transaction_obj, payload)
-            transaction_obj.receipt_hmac_created_at = timezone.now()
-            transaction_obj.save(update_fields=["receipt_payload", "receipt_hmac", "receipt_hmac_created_at"])
-
-            AuditLog.objects.create(
-                actor=agent,
-                action='SELL',
-                transaction_id=transaction_obj.id,
-                message=f"تم بيع {company.name_ar} فئة {value} ({product_type})"
+        try:
+            transaction_obj = sell_one(
+                agent,
+                denom,
+                audit_message=f"تم بيع {company.name_ar} فئة {value} ({product_type})",
             )
+        except SaleError as exc:
+            return api_response(exc.code, exc.message, exc.status_code)
 
         return api_response(
             'SALE_CREATED',
-            MESSAGES['SALE_CREATED'],
+            MESSAGES.get('SALE_CREATED', "تمت عملية البيع"),
             status.HTTP_201_CREATED,
             data={
                 'transaction_id': transaction_obj.id,
@@ -138,7 +101,7 @@ class SellRechargeAPIView(APIView):
                 'product_type': product_type,
                 'value': value,
                 'price': str(price),
-                'code': recharge_code,
+                'code': transaction_obj.code,
                 'status': 'تمت الطباعة'
             }
         )
@@ -146,51 +109,53 @@ class SellRechargeAPIView(APIView):
 
 from django.urls import reverse
 
-class ConfirmRechargeAPIView(APIView):
+class ConfirmRechargeAPIView(IdempotentAPIMixin, APIView):
     permission_classes = [IsAuthenticated, IsAgent]
 
     def post(self, request, transaction_id):
         agent = request.user
 
-        try:
-            transaction_obj = Transaction.objects.get(
-                id=transaction_id,
-                agent=agent
-            )
-        except Transaction.DoesNotExist:
-            return api_response(
-                'TRANSACTION_NOT_FOUND',
-                MESSAGES['TRANSACTION_NOT_FOUND'],
-                status.HTTP_404_NOT_FOUND
-            )
+        with db_transaction.atomic():
+            try:
+                transaction_obj = Transaction.objects.select_for_update().get(
+                    id=transaction_id,
+                    agent=agent
+                )
+            except Transaction.DoesNotExist:
+                return api_response(
+                    'TRANSACTION_NOT_FOUND',
+                    MESSAGES.get('TRANSACTION_NOT_FOUND', "العملية غير موجودة"),
+                    status.HTTP_404_NOT_FOUND
+                )
 
-        if transaction_obj.status != 'PRINTED':
-            return api_response(
-                'INVALID_TRANSACTION_STATUS',
-                MESSAGES['INVALID_TRANSACTION_STATUS'],
-                status.HTTP_400_BAD_REQUEST
-            )
+            if transaction_obj.status != 'PRINTED':
+                return api_response(
+                    'INVALID_TRANSACTION_STATUS',
+                    MESSAGES.get('INVALID_TRANSACTION_STATUS', "لا يمكن تأكيد هذه العملية"),
+                    status.HTTP_400_BAD_REQUEST
+                )
 
-        commission = get_commission_amount(
-            agent=agent,
-            company=transaction_obj.company,
-            denomination=transaction_obj.denomination,
-        )
+            commission = get_commission_amount(
+                agent=agent,
+                company=transaction_obj.company,
+                denomination=transaction_obj.denomination,
+            )
 
-        transaction_obj.commission_amount = commission
-        transaction_obj.status = 'CONFIRMED'
-        transaction_obj.confirmed_at = timezone.now()
-        transaction_obj.save()
+            transaction_obj.commission_amount = commission
+            transaction_obj.status = 'CONFIRMED'
+            transaction_obj.confirmed_at = timezone.now()
+            transaction_obj.save()
+            record_confirmation(transaction_obj)
 
         # 🔗 رابط الإيصال العام
         receipt_url = request.build_absolute_uri(
             reverse(
-                'customer-receipt',
+                'receipt-html',
                 args=[transaction_obj.public_token]
             )
         )
 
-        AuditLog.objects.create(
+        record_audit(
             actor=agent,
             action='CONFIRM',
             transaction_id=transaction_obj.id,
@@ -199,7 +164,7 @@ class ConfirmRechargeAPIView(APIView):
 
         return api_response(
             'CONFIRM_SUCCESS',
-            MESSAGES['CONFIRM_SUCCESS'],
+            MESSAGES.get('CONFIRM_SUCCESS', "تم تأكيد العملية بنجاح"),
             status.HTTP_200_OK,
             data={
                 'transaction_id': transaction_obj.id,
@@ -2,6 +2,7 @@ from django.urls import path
 
 from apps.sales.api.web.web_views import (
     WebSellRechargeAPIView,
+    WebBulkSellRechargeAPIView,
     WebConfirmRechargeAPIView,
     WebReceiptAPIView,
     WebReissueReceiptAPIView,
@@ -14,6 +15,7 @@ from apps.sales.api.web.web_views import (
 
 urlpatterns = [
     path("sell/", WebSellRechargeAPIView.as_view(), name="web-api-sell"),
+    path("sell/bulk/", WebBulkSellRechargeAPIView.as_view(), name="web-api-sell-bulk"),
     path("confirm/<int:transaction_id>/", WebConfirmRechargeAPIView.as_view(), name="web-api-confirm"),
 
     path("receipt/<uuid:token>/", WebReceiptAPIView.as_view(), name="web-api-receipt"),
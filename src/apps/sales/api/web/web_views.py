@@ -6,6 +6,7 @@ from apps.sales.api.views import (
     SellRechargeAPIView,
     ConfirmRechargeAPIView,
 )
+from apps.sales.api.bulk_sell_views import BulkSellRechargeAPIView
 from apps.sales.api.receipt_views import ReceiptAPIView
 from apps.sales.api.reissue_views import ReissueReceiptAPIView
 from apps.sales.api.agent_transactions_views import AgentTransactionsAPIView
@@ -17,6 +18,10 @@ class WebSellRechargeAPIView(SellRechargeAPIView):
     permission_classes = [IsAuthenticated, IsAdminOrAgent]
 
 
+class WebBulkSellRechargeAPIView(BulkSellRechargeAPIView):
+    permission_classes = [IsAuthenticated, IsAdminOrAgent]
+
+
 class WebConfirmRechargeAPIView(ConfirmRechargeAPIView):
     permission_classes = [IsAuthenticated, IsAdminOrAgent]
 
@@ -50,6 +55,7 @@ class WebAgentCatalogAPIView(AgentCatalogAPIView):
 
 __all__ = [
     "WebSellRechargeAPIView",
+    "WebBulkSellRechargeAPIView",
     "WebConfirmRechargeAPIView",
     "WebReceiptAPIView",
     "WebReissueReceiptAPIView",
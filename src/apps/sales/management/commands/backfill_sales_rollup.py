@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from apps.sales.models import Transaction
+from apps.sales.services.rollup import rebuild_rollup
+
+
+class Command(BaseCommand):
+    help = "إعادة بناء جدول الملخص اليومي للمبيعات (DailySalesRollup) من العمليات"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from", dest="date_from", help="YYYY-MM-DD (default: first sale)")
+        parser.add_argument("--to", dest="date_to", help="YYYY-MM-DD (default: today)")
+        parser.add_argument("--agent", type=int, help="Agent id")
+        parser.add_argument(
+            "--batch-days", type=int, default=31,
+            help="Days rebuilt per DB transaction",
+        )
+
+    def _parse_date(self, value):
+        try:
+            return datetime.strptime(value, "%Y-%m-%d").date()
+        except ValueError:
+            raise CommandError(f"Invalid date: {value}")
+
+    def handle(self, *args, **options):
+        bounds = Transaction.objects.aggregate(first=Min("created_at"), last=Max("created_at"))
+        if bounds["first"] is None and not options["date_from"]:
+            self.stdout.write("No transactions.")
+            return
+
+        if options["date_from"]:
+            start = self._parse_date(options["date_from"])
+        else:
+            start = timezone.localdate(bounds["first"])
+        if options["date_to"]:
+            end = self._parse_date(options["date_to"])
+        else:
+            end = max(timezone.localdate(), timezone.localdate(bounds["last"])) if bounds["last"] else timezone.localdate()
+        if start > end:
+            raise CommandError("--from is after --to")
+
+        step = timedelta(days=max(1, options["batch_days"]))
+        written = 0
+        chunk_start = start
+        while chunk_start <= end:
+            chunk_end = min(chunk_start + step - timedelta(days=1), end)
+            written += rebuild_rollup(chunk_start, chunk_end, agent_id=options["agent"])
+            chunk_start = chunk_end + timedelta(days=1)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {written} rollup row(s) for {start} .. {end}."
+        ))
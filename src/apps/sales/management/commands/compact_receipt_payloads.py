@@ -0,0 +1,78 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.db import transaction as db_transaction
+
+from apps.sales.models import TransactionReceipt
+from apps.sales.services.receipt import compact_receipt_payload, expand_receipt_payload, seal_receipt_payload
+from apps.sales.services.receipt_templates import is_compact
+
+
+def _size(payload) -> int:
+    return len(json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+class Command(BaseCommand):
+    help = (
+        "تحويل receipt_payload المخزّن إلى الصيغة المختصرة (أو إعادته كاملاً بـ --expand) على دفعات. "
+        "Either way the recharge code in the payload is stored encrypted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows per DB transaction")
+        parser.add_argument("--expand", action="store_true", help="Convert compact payloads back to full ones")
+        parser.add_argument("--dry-run", action="store_true", help="Report the saving without writing")
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options["batch_size"])
+        if options["expand"]:
+            def convert(payload):
+                if is_compact(payload):
+                    payload = expand_receipt_payload(payload)
+                return seal_receipt_payload(payload)
+        else:
+            convert = compact_receipt_payload
+
+        last_pk = 0
+        scanned = converted = skipped = 0
+        bytes_before = bytes_after = 0
+        while True:
+            rows = list(
+                TransactionReceipt.objects
+                .filter(pk__gt=last_pk, payload__isnull=False)
+                .order_by("pk")
+                .values_list("pk", "payload")[:batch_size]
+            )
+            if not rows:
+                break
+            last_pk = rows[-1][0]
+
+            changed = []
+            for pk, payload in rows:
+                scanned += 1
+                new_payload = convert(payload)
+                before = _size(payload)
+                bytes_before += before
+                if new_payload is None:
+                    # Not a known layout: kept full, only its code is sealed.
+                    skipped += 1
+                    new_payload = seal_receipt_payload(payload)
+                bytes_after += _size(new_payload)
+                if new_payload != payload:
+                    changed.append(TransactionReceipt(pk=pk, payload=new_payload))
+
+            if changed and not options["dry_run"]:
+                # bulk_update: no post_save, so stored verification results stay (the HMAC is unchanged).
+                with db_transaction.atomic():
+                    TransactionReceipt.objects.bulk_update(changed, ["payload"], batch_size=batch_size)
+            converted += len(changed)
+
+        saved = bytes_before - bytes_after
+        ratio = (saved / bytes_before * 100) if bytes_before else 0
+        action = "Would convert" if options["dry_run"] else "Converted"
+        self.stdout.write(self.style.SUCCESS(
+            f"{action} {converted} of {scanned} receipt payload(s) ({skipped} in an unknown layout kept full). "
+            f"JSON size {bytes_before} -> {bytes_after} bytes ({saved:+d} saved, {ratio:.1f}%)."
+        ))
+        if saved and not options["dry_run"]:
+            self.stdout.write("PostgreSQL returns the space to the table after VACUUM (the next autovacuum).")
@@ -0,0 +1,98 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.sales.models import InventoryImportJob, RechargeDenomination
+from apps.sales.services.inventory_import import (
+    IMPORT_CHUNK_SIZE,
+    ImportFileError,
+    import_codes,
+    iter_file_codes,
+    run_import_job,
+)
+
+
+class Command(BaseCommand):
+    help = "استيراد ملف أكواد شحن (CSV / XLSX) من المشغل إلى مخزون الأكواد"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", nargs="?", help="CSV or XLSX file; codes in the first column")
+        parser.add_argument("--job", type=int, help="Run (or resume) an admin upload InventoryImportJob instead")
+        parser.add_argument("--denomination", type=int, help="RechargeDenomination id")
+        parser.add_argument("--company", help="TelecomCompany code (with --value)")
+        parser.add_argument("--value", type=int, help="Denomination value (with --company)")
+        parser.add_argument("--product-type", default="MOBILE", help="MOBILE / INTERNET (with --company)")
+        parser.add_argument("--batch-ref", help="Stored on every card (default: file name)")
+        parser.add_argument(
+            "--chunk-size", type=int, default=IMPORT_CHUNK_SIZE,
+            help="Codes per lookup / INSERT / DB transaction",
+        )
+
+    def _denomination(self, options):
+        if options["denomination"]:
+            qs = RechargeDenomination.objects.filter(id=options["denomination"])
+        elif options["company"] and options["value"] is not None:
+            qs = RechargeDenomination.objects.filter(
+                company__code=options["company"],
+                value=options["value"],
+                product_type=options["product_type"],
+            )
+        else:
+            raise CommandError("Pass --denomination, or --company and --value")
+        denomination = qs.select_related("company").first()
+        if denomination is None:
+            raise CommandError("Denomination not found")
+        return denomination
+
+    def _run_job(self, job_id, chunk_size):
+        try:
+            job = run_import_job(job_id, chunk_size=chunk_size)
+        except InventoryImportJob.DoesNotExist:
+            raise CommandError(f"Import job not found: {job_id}")
+        summary = (
+            f"Job {job.pk} {job.status}: {job.codes_created} code(s) from {job.rows_read} row(s), "
+            f"{job.duplicates} duplicate(s), {job.invalid} invalid."
+        )
+        if job.status != InventoryImportJob.Status.DONE:
+            raise CommandError(f"{summary} {job.error}")
+        self.stdout.write(self.style.SUCCESS(summary))
+
+    def handle(self, *args, **options):
+        if options["job"]:
+            return self._run_job(options["job"], options["chunk_size"])
+        path = options["path"]
+        if not path:
+            raise CommandError("Pass a file path, or --job <id>")
+        if not os.path.isfile(path):
+            raise CommandError(f"File not found: {path}")
+        denomination = self._denomination(options)
+        batch_ref = options["batch_ref"] or os.path.basename(path)
+
+        started = time.monotonic()
+
+        def progress(result):
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f"  {result.read} read, {result.created} created, "
+                f"{result.duplicates} duplicate(s), {result.invalid} invalid ({elapsed:.1f}s)"
+            )
+
+        self.stdout.write(f"Importing {path} into {denomination} (batch {batch_ref})")
+        try:
+            with open(path, "rb") as fh:
+                result = import_codes(
+                    denomination,
+                    iter_file_codes(fh, path),
+                    batch_ref=batch_ref,
+                    chunk_size=options["chunk_size"],
+                    progress=progress,
+                )
+        except ImportFileError as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result.created} code(s) from {result.read} row(s): "
+            f"{result.duplicates} duplicate(s), {result.invalid} invalid, "
+            f"{time.monotonic() - started:.1f}s."
+        ))
@@ -0,0 +1,56 @@
+from datetime import datetime, time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.sales.services.receipt_verification import (
+    default_workers,
+    month_bounds,
+    receipts_between,
+    verify_receipts,
+)
+
+
+class Command(BaseCommand):
+    help = "التحقق من توقيع (HMAC) الوصولات دفعةً واحدة وحفظ النتائج في ReceiptVerification"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--month", help="YYYY-MM (local month of created_at)")
+        parser.add_argument("--from", dest="date_from", help="YYYY-MM-DD")
+        parser.add_argument("--to", dest="date_to", help="YYYY-MM-DD (inclusive)")
+        parser.add_argument(
+            "--workers", type=int, default=None,
+            help="Verifier processes (default: RECEIPT_VERIFY_WORKERS or CPU count; 1 = in-process)",
+        )
+        parser.add_argument("--chunk-size", type=int, default=None, help="Receipts per worker task")
+
+    def _parse_date(self, value):
+        try:
+            return datetime.strptime(value, "%Y-%m-%d").date()
+        except ValueError:
+            raise CommandError(f"Invalid date: {value}")
+
+    def handle(self, *args, **options):
+        start = end = None
+        if options["month"]:
+            if options["date_from"] or options["date_to"]:
+                raise CommandError("Use either --month or --from/--to")
+            try:
+                start, end = month_bounds(options["month"])
+            except ValueError:
+                raise CommandError(f"Invalid month: {options['month']}")
+        if options["date_from"]:
+            start = timezone.make_aware(datetime.combine(self._parse_date(options["date_from"]), time.min))
+        if options["date_to"]:
+            end = timezone.make_aware(
+                datetime.combine(self._parse_date(options["date_to"]) + timedelta(days=1), time.min)
+            )
+        if start and end and start >= end:
+            raise CommandError("--from is after --to")
+
+        workers = options["workers"] or default_workers()
+        counts = verify_receipts(receipts_between(start, end), workers=workers, chunk_size=options["chunk_size"])
+
+        summary = ", ".join(f"{status}: {n}" for status, n in counts.items())
+        style = self.style.SUCCESS if not counts["INVALID"] else self.style.WARNING
+        self.stdout.write(style(f"Verified {sum(counts.values())} receipt(s) with {workers} worker(s) — {summary}."))
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.10 on 2026-10-18 07:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_rollup(apps, schema_editor):
+    """Aggregate existing transactions into DailySalesRollup."""
+    Transaction = apps.get_model("sales", "Transaction")
+    DailySalesRollup = apps.get_model("sales", "DailySalesRollup")
+
+    grouped = (
+        Transaction.objects
+        .order_by()
+        .annotate(day=TruncDate("created_at"))
+        .values("day", "agent_id", "company_id", "denomination_id", "status")
+        .annotate(tx_count=Count("id"), total_price=Sum("price"), total_commission=Sum("commission_amount"))
+    )
+    batch = []
+    for row in grouped.iterator(chunk_size=2000):
+        batch.append(DailySalesRollup(
+            date=row["day"],
+            agent_id=row["agent_id"],
+            company_id=row["company_id"],
+            denomination_id=row["denomination_id"],
+            status=row["status"],
+            tx_count=row["tx_count"],
+            total_price=row["total_price"] or 0,
+            total_commission=row["total_commission"] or 0,
+        ))
+        if len(batch) >= 2000:
+            DailySalesRollup.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        DailySalesRollup.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0004_transaction_receipt_hmac'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('status', models.CharField(choices=[('PRINTED', 'Printed'), ('CONFIRMED', 'Confirmed')], max_length=20)),
+                ('tx_count', models.IntegerField(default=0)),
+                ('total_price', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('total_commission', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('agent', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sales_rollups', to=settings.AUTH_USER_MODEL)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sales_rollups', to='sales.telecomcompany')),
+                ('denomination', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sales_rollups', to='sales.rechargedenomination')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'date'], name='sales_daily_status_4a7a03_idx'), models.Index(fields=['agent', 'date'], name='sales_daily_agent_i_c6773b_idx')],
+                'constraints': [models.UniqueConstraint(fields=('date', 'agent', 'company', 'denomination', 'status'), name='sales_rollup_unique_key')],
+            },
+        ),
+        migrations.RunPython(backfill_rollup, migrations.RunPython.noop),
+    ]
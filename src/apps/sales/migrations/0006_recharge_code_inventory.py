@@ -0,0 +1,32 @@
+# Generated by Django 5.2.10 on 2026-10-18 08:05
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0005_daily_sales_rollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RechargeCodeInventory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=150)),
+                ('status', models.CharField(choices=[('AVAILABLE', 'Available'), ('SOLD', 'Sold'), ('VOID', 'Void')], default='AVAILABLE', max_length=20)),
+                ('batch_ref', models.CharField(blank=True, max_length=100)),
+                ('reservation', models.UUIDField(blank=True, editable=False, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+                ('sold_at', models.DateTimeField(blank=True, null=True)),
+                ('denomination', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='inventory', to='sales.rechargedenomination')),
+                ('transaction', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='inventory_card', to='sales.transaction')),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('status', 'AVAILABLE')), fields=['denomination', 'id'], name='sales_inventory_available_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.10 on 2026-10-18 08:08
+
+from django.db import migrations, models
+
+
+def hash_existing_codes(apps, schema_editor):
+    from apps.sales.services.inventory import code_digest
+
+    RechargeCodeInventory = apps.get_model('sales', 'RechargeCodeInventory')
+    seen = set()
+    batch = []
+    for card in RechargeCodeInventory.objects.only('id', 'code').order_by('id').iterator(chunk_size=2000):
+        digest = code_digest(card.code)
+        # Cards loaded twice before this migration keep code_hash = NULL
+        if digest in seen:
+            continue
+        seen.add(digest)
+        card.code_hash = digest
+        batch.append(card)
+        if len(batch) >= 2000:
+            RechargeCodeInventory.objects.bulk_update(batch, ['code_hash'])
+            batch = []
+    if batch:
+        RechargeCodeInventory.objects.bulk_update(batch, ['code_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0006_recharge_code_inventory'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rechargecodeinventory',
+            name='code_hash',
+            field=models.CharField(editable=False, max_length=64, null=True, unique=True),
+        ),
+        migrations.RunPython(hash_existing_codes, migrations.RunPython.noop),
+    ]
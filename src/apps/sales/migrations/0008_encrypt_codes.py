@@ -0,0 +1,24 @@
+# Generated by Django 5.2.10 on 2026-10-18 08:16
+
+import apps.core.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0007_inventory_code_hash'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='rechargecodeinventory',
+            name='code',
+            field=apps.core.fields.EncryptedTextField(max_length=150),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='code',
+            field=apps.core.fields.EncryptedTextField(max_length=150),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.10 on 2026-10-18 08:33
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0008_encrypt_codes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReceiptVerification',
+            fields=[
+                ('transaction', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='receipt_verification', serialize=False, to='sales.transaction')),
+                ('status', models.CharField(choices=[('VALID', 'Valid'), ('INVALID', 'Invalid'), ('MISSING', 'Missing')], max_length=10)),
+                ('receipt_hmac', models.CharField(blank=True, max_length=128, null=True)),
+                ('key_id', models.CharField(max_length=16)),
+                ('verified_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'verified_at'], name='sales_recei_status_2387f1_idx')],
+            },
+        ),
+    ]
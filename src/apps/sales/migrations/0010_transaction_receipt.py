@@ -0,0 +1,94 @@
+# Generated by Django 5.2.10 on 2026-10-18 08:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Q
+
+BATCH_SIZE = 2000
+
+
+def move_receipts(apps, schema_editor):
+    """Copy receipt snapshots to TransactionReceipt, BATCH_SIZE rows at a time (pk keyset)."""
+    Transaction = apps.get_model("sales", "Transaction")
+    TransactionReceipt = apps.get_model("sales", "TransactionReceipt")
+
+    rows = (
+        Transaction.objects
+        .filter(Q(receipt_payload__isnull=False) | Q(receipt_hmac__isnull=False))
+        .order_by("pk")
+        .values_list("pk", "receipt_payload", "receipt_hmac", "receipt_hmac_algo", "receipt_hmac_created_at")
+    )
+    last_pk = 0
+    while True:
+        batch = list(rows.filter(pk__gt=last_pk)[:BATCH_SIZE])
+        if not batch:
+            break
+        last_pk = batch[-1][0]
+        TransactionReceipt.objects.bulk_create([
+            TransactionReceipt(
+                transaction_id=pk, payload=payload, hmac=hmac, hmac_algo=algo, hmac_created_at=created_at,
+            )
+            for pk, payload, hmac, algo, created_at in batch
+        ])
+
+
+def restore_receipts(apps, schema_editor):
+    Transaction = apps.get_model("sales", "Transaction")
+    TransactionReceipt = apps.get_model("sales", "TransactionReceipt")
+
+    last_pk = 0
+    while True:
+        batch = list(TransactionReceipt.objects.filter(pk__gt=last_pk).order_by("pk")[:BATCH_SIZE])
+        if not batch:
+            break
+        last_pk = batch[-1].pk
+        Transaction.objects.bulk_update(
+            [
+                Transaction(
+                    pk=receipt.transaction_id,
+                    receipt_payload=receipt.payload,
+                    receipt_hmac=receipt.hmac,
+                    receipt_hmac_algo=receipt.hmac_algo,
+                    receipt_hmac_created_at=receipt.hmac_created_at,
+                )
+                for receipt in batch
+            ],
+            ["receipt_payload", "receipt_hmac", "receipt_hmac_algo", "receipt_hmac_created_at"],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0009_receipt_verification'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransactionReceipt',
+            fields=[
+                ('transaction', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='receipt', serialize=False, to='sales.transaction')),
+                ('payload', models.JSONField(blank=True, null=True)),
+                ('hmac', models.CharField(blank=True, db_index=True, max_length=128, null=True)),
+                ('hmac_algo', models.CharField(default='HMAC-SHA256', max_length=32)),
+                ('hmac_created_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.RunPython(move_receipts, restore_receipts),
+        migrations.RemoveField(
+            model_name='transaction',
+            name='receipt_hmac',
+        ),
+        migrations.RemoveField(
+            model_name='transaction',
+            name='receipt_hmac_algo',
+        ),
+        migrations.RemoveField(
+            model_name='transaction',
+            name='receipt_hmac_created_at',
+        ),
+        migrations.RemoveField(
+            model_name='transaction',
+            name='receipt_payload',
+        ),
+    ]
@@ -3,10 +3,14 @@
 import uuid
 from datetime import timedelta
 
-from django.db import models
+from django.db import models, transaction as db_transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.conf import settings
 from django.utils import timezone
 
+from apps.core.fields import EncryptedTextField
+
 
 # =====================================================
 # Telecom Company
@@ -126,8 +130,8 @@ class Transaction(models.Model):
         related_name='transactions'
     )
 
-    # كود الكارت (حساس – لاحقًا تشفير)
-    code = models.CharField(max_length=150)
+    # كود الكارت (حساس – مشفّر AES-GCM، انظر apps.core.fields)
+    code = EncryptedTextField(max_length=150)
 
     status = models.CharField(
         max_length=20,
@@ -153,15 +157,10 @@ class Transaction(models.Model):
     receipt_reissue_count = models.PositiveIntegerField(default=0)
     receipt_reissue_limit = models.PositiveIntegerField(default=3)
 
-    # Snapshot of exactly what the POS printed/shown (for admin preview)
-    receipt_payload = models.JSONField(null=True, blank=True)
+    # Snapshot of what the POS printed + its HMAC live in TransactionReceipt
+    # (see the receipt_payload / receipt_hmac properties below).
     receipt_payload_version = models.PositiveIntegerField(default=1)
 
-    # Tamper-evident signature for receipt_payload (HMAC over a canonical representation).
-    receipt_hmac = models.CharField(max_length=128, null=True, blank=True, db_index=True)
-    receipt_hmac_algo = models.CharField(max_length=32, default='HMAC-SHA256')
-    receipt_hmac_created_at = models.DateTimeField(null=True, blank=True)
-
     # ===== POS Metadata =====
     source = models.CharField(
         max_length=10,
@@ -195,4 +194,400 @@ class Transaction(models.Model):
     def is_receipt_expired(self) -> bool:
         if not self.receipt_expires_at:
             return False
-        return timezone.now() > self.receipt_expires_at
\ No newline at end of file
+        return timezone.now() > self.receipt_expires_at
+
+    # ===== Signed fields (see drop_receipt_verification_on_change) =====
+    _signed_loaded = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._signed_loaded = instance._signed_values()
+        return instance
+
+    def _signed_values(self):
+        # None when a signed field is deferred: its change cannot be ruled out.
+        values = self.__dict__
+        if "public_token" not in values or "created_at" not in values:
+            return None
+        return values["public_token"], values["created_at"]
+
+    # ===== Receipt snapshot (TransactionReceipt) =====
+    # Read/written like the former columns; loading a transaction without
+    # select_related("receipt") costs one query on first access.
+    _receipt_dirty = False
+
+    def _receipt_row(self, create: bool = False):
+        try:
+            return self.receipt
+        except TransactionReceipt.DoesNotExist:
+            if not create:
+                return None
+        self.receipt = TransactionReceipt()
+        return self.receipt
+
+    def _set_receipt_attr(self, name, value):
+        setattr(self._receipt_row(create=True), name, value)
+        self._receipt_dirty = True
+
+    receipt_payload = property(
+        lambda self: getattr(self._receipt_row(), "payload", None),
+        lambda self, value: self._set_receipt_attr("payload", value),
+    )
+    receipt_hmac = property(
+        lambda self: getattr(self._receipt_row(), "hmac", None),
+        lambda self, value: self._set_receipt_attr("hmac", value),
+    )
+    receipt_hmac_algo = property(
+        lambda self: getattr(self._receipt_row(), "hmac_algo", None),
+        lambda self, value: self._set_receipt_attr("hmac_algo", value),
+    )
+    receipt_hmac_created_at = property(
+        lambda self: getattr(self._receipt_row(), "hmac_created_at", None),
+        lambda self, value: self._set_receipt_attr("hmac_created_at", value),
+    )
+
+    def save(self, *args, **kwargs):
+        # update_fields may name the receipt properties: they go to TransactionReceipt.
+        update_fields = kwargs.get("update_fields")
+        save_receipt = self._receipt_dirty
+        if update_fields is not None:
+            save_receipt = save_receipt and bool(RECEIPT_PROPERTIES.intersection(update_fields))
+            kwargs["update_fields"] = [f for f in update_fields if f not in RECEIPT_PROPERTIES]
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        if save_receipt:
+            self.receipt.transaction = self
+            self.receipt.save(force_insert=adding)
+            self._receipt_dirty = False
+
+
+RECEIPT_PROPERTIES = frozenset({"receipt_payload", "receipt_hmac", "receipt_hmac_algo", "receipt_hmac_created_at"})
+
+
+# =====================================================
+# Transaction Receipt
+# =====================================================
+class TransactionReceipt(models.Model):
+    """
+    Snapshot الوصل المطبوع وتوقيعه (HMAC)
+
+    Kept out of Transaction so that listing / dashboard queries read narrow
+    rows; accessed through Transaction.receipt_payload / receipt_hmac / ...
+    """
+
+    transaction = models.OneToOneField(
+        Transaction,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='receipt'
+    )
+
+    # Snapshot of exactly what the POS printed/shown (for admin preview)
+    payload = models.JSONField(null=True, blank=True)
+
+    # Tamper-evident signature for payload (HMAC over a canonical representation).
+    hmac = models.CharField(max_length=128, null=True, blank=True, db_index=True)
+    hmac_algo = models.CharField(max_length=32, default='HMAC-SHA256')
+    hmac_created_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Receipt {self.transaction_id}"
+
+
+# =====================================================
+# Recharge Code Inventory
+# =====================================================
+class RechargeCodeInventory(models.Model):
+    """
+    مخزون أكواد الشحن (PINs) المستلمة من شركات الاتصالات
+
+    Cards are pulled by `apps.sales.services.inventory.reserve_codes`; the
+    partial index on AVAILABLE rows keeps each pull an index seek no matter
+    how many cards have already been sold.
+    """
+
+    class Status(models.TextChoices):
+        AVAILABLE = 'AVAILABLE', 'Available'
+        SOLD = 'SOLD', 'Sold'
+        VOID = 'VOID', 'Void'
+
+    denomination = models.ForeignKey(
+        RechargeDenomination,
+        on_delete=models.PROTECT,
+        related_name='inventory'
+    )
+
+    # مشفّر مثل Transaction.code
+    code = EncryptedTextField(max_length=150)
+
+    # HMAC of the code (see `inventory.code_digest`): duplicate check on import
+    code_hash = models.CharField(max_length=64, unique=True, null=True, editable=False)
+
+    status = models.CharField(
+        max_length=20,
+        choices=Status.choices,
+        default=Status.AVAILABLE
+    )
+
+    # Operator batch / file the card came from
+    batch_ref = models.CharField(max_length=100, blank=True)
+
+    # Claim marker used by the optimistic (no SKIP LOCKED) reservation path
+    reservation = models.UUIDField(null=True, blank=True, editable=False)
+
+    transaction = models.OneToOneField(
+        Transaction,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='inventory_card'
+    )
+
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+    sold_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['denomination', 'id'],
+                condition=models.Q(status='AVAILABLE'),
+                name='sales_inventory_available_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.denomination} - {self.status}"
+
+    def save(self, *args, **kwargs):
+        from apps.sales.services.inventory import code_digest
+
+        if self.code:
+            self.code_hash = code_digest(self.code)
+        super().save(*args, **kwargs)
+
+
+# =====================================================
+# Inventory Import Job
+# =====================================================
+class InventoryImportJob(models.Model):
+    """
+    استيراد ملف أكواد مرفوع من لوحة الإدارة (يُنفَّذ في الخلفية)
+
+    The admin page stores the upload and returns at once; a background
+    thread runs `apps.sales.services.inventory_import.run_import_job` and
+    writes the counters after every chunk, which the page shows.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = 'PENDING', 'Pending'
+        RUNNING = 'RUNNING', 'Running'
+        DONE = 'DONE', 'Done'
+        FAILED = 'FAILED', 'Failed'
+
+    denomination = models.ForeignKey(
+        RechargeDenomination,
+        on_delete=models.PROTECT,
+        related_name='import_jobs'
+    )
+
+    batch_ref = models.CharField(max_length=100, blank=True)
+
+    # Uploaded file name, and where the upload is kept until the job is done
+    file_name = models.CharField(max_length=255)
+    file_path = models.CharField(max_length=500, blank=True)
+
+    status = models.CharField(
+        max_length=10,
+        choices=Status.choices,
+        default=Status.PENDING
+    )
+
+    rows_read = models.PositiveIntegerField(default=0)
+    codes_created = models.PositiveIntegerField(default=0)
+    duplicates = models.PositiveIntegerField(default=0)
+    invalid = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='inventory_import_jobs'
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Bumped with every progress write: a RUNNING job that stops moving has stalled
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.file_name} -> {self.denomination} ({self.status})"
+
+    @property
+    def is_active(self) -> bool:
+        return self.status in (self.Status.PENDING, self.Status.RUNNING)
+
+    @property
+    def is_stalled(self) -> bool:
+        stale = timedelta(seconds=getattr(settings, "INVENTORY_IMPORT_STALE_SECONDS", 300))
+        return self.is_active and timezone.now() - self.updated_at > stale
+
+
+# =====================================================
+# Daily Sales Rollup
+# =====================================================
+class DailySalesRollup(models.Model):
+    """
+    ملخص يومي مجمّع للمبيعات (للتقارير)
+
+    One row per (sale date, agent, company, denomination, status), kept in
+    step with Transaction by `apps.sales.services.rollup` (sale + confirm)
+    and rebuildable with `manage.py backfill_sales_rollup`. `date` is the
+    local (TIME_ZONE) date of Transaction.created_at.
+    """
+
+    date = models.DateField()
+
+    agent = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='sales_rollups'
+    )
+    company = models.ForeignKey(
+        TelecomCompany,
+        on_delete=models.CASCADE,
+        related_name='sales_rollups'
+    )
+    denomination = models.ForeignKey(
+        RechargeDenomination,
+        on_delete=models.CASCADE,
+        related_name='sales_rollups'
+    )
+
+    status = models.CharField(max_length=20, choices=Transaction.STATUS_CHOICES)
+
+    # Signed on purpose: a confirm moves a sale from PRINTED to CONFIRMED.
+    tx_count = models.IntegerField(default=0)
+    total_price = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    total_commission = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date', 'agent', 'company', 'denomination', 'status'],
+                name='sales_rollup_unique_key',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'date']),
+            models.Index(fields=['agent', 'date']),
+        ]
+
+    def __str__(self):
+        return f"{self.date} - {self.agent_id} - {self.denomination_id} - {self.status}"
+
+
+# =====================================================
+# Receipt Verification
+# =====================================================
+class ReceiptVerification(models.Model):
+    """
+    نتيجة آخر تحقق من توقيع الوصل (receipt_hmac)
+
+    Written by `apps.sales.services.receipt_verification` (batch verifier,
+    `manage.py verify_receipts`, admin API) and read by the receipt previews
+    instead of recomputing the HMAC (previews never write it). A row applies only while the
+    transaction still carries the same `receipt_hmac` and RECEIPT_HMAC_KEY
+    (`key_id`); receipt saves delete it (see the signal receivers below).
+    """
+
+    STATUS_VALID = 'VALID'
+    STATUS_INVALID = 'INVALID'
+    STATUS_MISSING = 'MISSING'
+
+    STATUS_CHOICES = (
+        (STATUS_VALID, 'Valid'),
+        (STATUS_INVALID, 'Invalid'),
+        (STATUS_MISSING, 'Missing'),
+    )
+
+    transaction = models.OneToOneField(
+        Transaction,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='receipt_verification'
+    )
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES)
+
+    # The signature that was checked, and a fingerprint of the key used.
+    receipt_hmac = models.CharField(max_length=128, null=True, blank=True)
+    key_id = models.CharField(max_length=16)
+
+    verified_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'verified_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.transaction_id} - {self.status}"
+
+
+# =====================================================
+# Signals: catalog snapshot invalidation
+# =====================================================
+@receiver([post_save, post_delete], sender=TelecomCompany)
+@receiver([post_save, post_delete], sender=RechargeDenomination)
+def invalidate_catalog_on_change(sender, **kwargs):
+    """Bump the catalog version once the surrounding DB transaction commits."""
+    from apps.sales.services.catalog import invalidate_catalog
+
+    db_transaction.on_commit(invalidate_catalog)
+
+
+# =====================================================
+# Signals: receipt render cache eviction
+# =====================================================
+@receiver([post_save, post_delete], sender=Transaction)
+def evict_receipt_render_on_change(sender, instance, created=False, update_fields=None, **kwargs):
+    """Drop cached receipt pages of this token once the surrounding DB transaction commits."""
+    from apps.sales.services.receipt_render import RENDER_FIELDS, evict_receipt_on_commit
+
+    # A new row has nothing cached yet.
+    if created:
+        return
+    if update_fields is not None and not RENDER_FIELDS.intersection(update_fields):
+        return
+    evict_receipt_on_commit(instance.public_token)
+
+
+# Transaction fields a stored ReceiptVerification result depends on.
+RECEIPT_SIGNED_FIELDS = frozenset({"public_token", "created_at"})
+
+
+@receiver(post_save, sender=Transaction)
+@receiver(post_save, sender=TransactionReceipt)
+def drop_receipt_verification_on_change(sender, instance, created=False, update_fields=None, **kwargs):
+    """A re-signed (or edited) receipt must be verified again."""
+    if created:
+        return
+    if sender is Transaction:
+        if update_fields is not None and not RECEIPT_SIGNED_FIELDS.intersection(update_fields):
+            return
+        # Full save (e.g. confirm): only a changed public_token / created_at matters.
+        signed = instance._signed_values()
+        unchanged = signed is not None and signed == instance._signed_loaded
+        instance._signed_loaded = signed
+        if unchanged:
+            return
+    ReceiptVerification.objects.filter(transaction_id=instance.pk).delete()
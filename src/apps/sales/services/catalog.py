@@ -0,0 +1,179 @@
+"""Versioned catalog snapshots for the catalog APIs.
+
+The catalog (TelecomCompany + RechargeDenomination) changes a few times a day
+but is read by every POS on boot and refresh. Snapshots are built once per
+catalog version and host, serialized to the final JSON bytes and kept:
+
+- in a process-local dict (no DB, no serialization on hit), and
+- in Django's cache, so other workers can reuse a snapshot built elsewhere.
+
+Saving/deleting a company or denomination bumps the catalog version
+(see the signal receivers in `apps.sales.models`).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List
+from urllib.parse import urljoin
+
+from django.conf import settings
+from django.core.cache import cache
+
+from apps.core.api.messages import MESSAGES
+from apps.core.api.renderers import dumps
+from apps.core.cache import bump_version, get_version
+
+CATALOG_VERSION_NAME = "sales.catalog"
+
+PUBLIC = "public"
+AGENT = "agent"
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    version: str
+    etag: str
+    body: bytes
+    built_at: float
+
+
+_snapshots: Dict[tuple, CatalogSnapshot] = {}
+_lock = threading.Lock()
+
+
+def _timeout() -> int:
+    return int(getattr(settings, "CATALOG_CACHE_TIMEOUT", 300))
+
+
+def _active_companies():
+    from apps.sales.models import TelecomCompany
+
+    return (
+        TelecomCompany.objects
+        .filter(is_active=True)
+        .prefetch_related("denominations")
+        .order_by("display_order", "name_ar")
+    )
+
+
+def _logo_url(company, base_url: str):
+    return urljoin(base_url, company.logo.url) if company.logo else None
+
+
+def _build_public(base_url: str) -> List[Dict[str, Any]]:
+    result = []
+
+    for company in _active_companies():
+        products = {}
+
+        for d in company.denominations.all():
+            if not d.is_active:
+                continue
+
+            products.setdefault(d.product_type, []).append({
+                "id": d.id,
+                "value": d.value
+            })
+
+        if not products:
+            continue
+
+        result.append({
+            "company_id": company.id,
+            "company_code": company.code,
+            "company_name": company.name_ar,
+            "company_type": company.company_type,
+            "logo": _logo_url(company, base_url),
+            "products": products
+        })
+
+    return result
+
+
+def _build_agent(base_url: str) -> List[Dict[str, Any]]:
+    result = []
+
+    for company in _active_companies():
+        denominations = []
+
+        for d in company.denominations.all():
+            if not d.is_active:
+                continue
+
+            denominations.append({
+                "id": d.id,
+                "value": d.value,
+                "price_to_agent": str(d.price_to_agent),
+                "product_type": d.product_type
+            })
+
+        if not denominations:
+            continue
+
+        result.append({
+            "company_id": company.id,
+            "company_code": company.code,
+            "company_name": company.name_ar,
+            "company_type": company.company_type,
+            "logo": _logo_url(company, base_url),
+            "denominations": denominations
+        })
+
+    return result
+
+
+_BUILDERS = {
+    PUBLIC: _build_public,
+    AGENT: _build_agent,
+}
+
+
+def _serialize(data) -> bytes:
+    """Same envelope and encoding as `api_response` + DRF's JSONRenderer."""
+    payload = {
+        "success": True,
+        "message": MESSAGES.get("SUCCESS", "تم بنجاح"),
+        "code": "SUCCESS",
+        "data": data,
+    }
+    return dumps(payload)
+
+
+def get_catalog_snapshot(kind: str, request) -> CatalogSnapshot:
+    """Return the current snapshot for `kind` (PUBLIC / AGENT) as seen from this host."""
+    base_url = request.build_absolute_uri("/")
+    version = get_version(CATALOG_VERSION_NAME)
+    local_key = (kind, base_url)
+
+    snapshot = _snapshots.get(local_key)
+    if snapshot is not None and snapshot.version == version and time.monotonic() - snapshot.built_at < _timeout():
+        return snapshot
+
+    host_hash = hashlib.sha256(base_url.encode("utf-8")).hexdigest()[:16]
+    shared_key = f"sales:catalog:{kind}:{host_hash}:{version}"
+
+    body = cache.get(shared_key)
+    if body is None:
+        body = _serialize(_BUILDERS[kind](base_url))
+        cache.set(shared_key, body, timeout=_timeout())
+
+    snapshot = CatalogSnapshot(
+        version=version,
+        etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+        body=body,
+        built_at=time.monotonic(),
+    )
+    with _lock:
+        _snapshots[local_key] = snapshot
+    return snapshot
+
+
+def invalidate_catalog() -> None:
+    """Drop local snapshots and bump the shared catalog version."""
+    with _lock:
+        _snapshots.clear()
+    bump_version(CATALOG_VERSION_NAME)
@@ -0,0 +1,158 @@
+"""Recharge code (PIN) inventory.
+
+`reserve_codes` hands out AVAILABLE cards of one denomination to a sale and
+must run inside the sale's atomic block:
+
+- Backends with SKIP LOCKED (PostgreSQL, MySQL 8, Oracle):
+  `SELECT ... FOR UPDATE SKIP LOCKED LIMIT n` over the partial index on
+  AVAILABLE rows. Concurrent sales of the same denomination each lock
+  different cards instead of queueing behind one another.
+- Other backends (SQLite): optimistic claim. Pick candidate ids, flip them
+  with a conditional `UPDATE ... WHERE status = 'AVAILABLE'` tagged with a
+  per-call token, and retry for any rows lost to a concurrent claim.
+
+Either way the pull is an index seek on (denomination_id, id) WHERE
+status = 'AVAILABLE'; sold cards drop out of the index, so the cost does
+not grow with the number of cards sold. `mark_sold` links the cards to the
+inserted transactions with a single UPDATE.
+
+`code_digest` is the keyed hash stored in `code_hash` (unique); duplicate
+checks look cards up by it instead of by the code itself.
+"""
+
+import hashlib
+import hmac
+import uuid
+from typing import List, Sequence
+
+from django.conf import settings
+from django.db import connection, transaction as db_transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from apps.sales.models import RechargeCodeInventory
+
+AVAILABLE = RechargeCodeInventory.Status.AVAILABLE
+SOLD = RechargeCodeInventory.Status.SOLD
+
+_OPTIMISTIC_ATTEMPTS = 5
+
+
+class OutOfStock(Exception):
+    """Not enough AVAILABLE cards for the requested denomination/quantity."""
+
+    code = "OUT_OF_STOCK"
+    default_message = "لا توجد أكواد متاحة لهذه الفئة حاليًا"
+
+    def __init__(self, message=None):
+        self.message = message or self.default_message
+        super().__init__(self.message)
+
+
+def inventory_required() -> bool:
+    """True: a sale fails when the inventory is empty. False: fall back to generated codes."""
+    return bool(getattr(settings, "RECHARGE_INVENTORY_REQUIRED", False))
+
+
+def code_digest(code: str) -> str:
+    """HMAC-SHA256 (hex) of a recharge code, keyed by RECHARGE_CODE_HASH_KEY."""
+    key = getattr(settings, "RECHARGE_CODE_HASH_KEY", None) or settings.RECEIPT_HMAC_KEY
+    return hmac.new(key.encode("utf-8"), code.strip().encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def _available(denomination_id):
+    return (
+        RechargeCodeInventory.objects
+        .filter(denomination_id=denomination_id, status=AVAILABLE)
+        .order_by("id")
+    )
+
+
+def _reserve_skip_locked(denomination_id, quantity: int) -> List[RechargeCodeInventory]:
+    cards = list(
+        _available(denomination_id)
+        .select_for_update(skip_locked=True)
+        .only("id", "code", "denomination_id")[:quantity]
+    )
+    if len(cards) < quantity:
+        raise OutOfStock()
+    return cards
+
+
+def _reserve_optimistic(denomination_id, quantity: int) -> List[RechargeCodeInventory]:
+    token = uuid.uuid4()
+    tried: List[int] = []
+    claimed = 0
+
+    # Savepoint: a short claim is rolled back before OutOfStock propagates.
+    with db_transaction.atomic():
+        for _ in range(_OPTIMISTIC_ATTEMPTS):
+            candidates = list(
+                _available(denomination_id)
+                .exclude(id__in=tried)
+                .values_list("id", flat=True)[:quantity - claimed]
+            )
+            if not candidates:
+                break
+            tried.extend(candidates)
+            claimed += (
+                RechargeCodeInventory.objects
+                .filter(id__in=candidates, status=AVAILABLE)
+                .update(status=SOLD, reservation=token)
+            )
+            if claimed >= quantity:
+                break
+
+        if claimed < quantity:
+            raise OutOfStock()
+
+    return list(
+        RechargeCodeInventory.objects
+        .filter(id__in=tried, reservation=token)
+        .only("id", "code", "denomination_id")
+        .order_by("id")
+    )
+
+
+def reserve_codes(denomination, quantity: int = 1) -> List[RechargeCodeInventory]:
+    """Reserve `quantity` cards of `denomination` for the current DB transaction.
+
+    All or nothing: raises OutOfStock (and holds nothing) if there are fewer
+    AVAILABLE cards than requested.
+    """
+    if not connection.in_atomic_block:
+        raise RuntimeError("reserve_codes() must be called inside transaction.atomic()")
+
+    denomination_id = getattr(denomination, "pk", denomination)
+    if connection.features.has_select_for_update_skip_locked:
+        return _reserve_skip_locked(denomination_id, quantity)
+    return _reserve_optimistic(denomination_id, quantity)
+
+
+def mark_sold(cards: Sequence[RechargeCodeInventory], transactions: Sequence) -> None:
+    """Mark reserved `cards` SOLD and link each to the transaction at the same position."""
+    if not cards:
+        return
+    now = timezone.now()
+    for card, tx in zip(cards, transactions):
+        card.status = SOLD
+        card.transaction = tx
+        card.sold_at = now
+    RechargeCodeInventory.objects.bulk_update(cards, ["status", "transaction", "sold_at"])
+
+
+def release_codes(cards: Sequence[RechargeCodeInventory]) -> None:
+    """Return reserved but unused `cards` to the pool (within the same DB transaction)."""
+    if not cards:
+        return
+    RechargeCodeInventory.objects.filter(
+        id__in=[card.id for card in cards], transaction__isnull=True
+    ).update(status=AVAILABLE, reservation=None)
+
+
+def stock_levels(denomination_ids=None):
+    """{denomination_id: available cards}."""
+    qs = RechargeCodeInventory.objects.filter(status=AVAILABLE)
+    if denomination_ids is not None:
+        qs = qs.filter(denomination_id__in=denomination_ids)
+    return dict(qs.order_by().values("denomination_id").annotate(n=Count("id")).values_list("denomination_id", "n"))
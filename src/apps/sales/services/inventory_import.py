@@ -0,0 +1,341 @@
+"""Bulk import of operator voucher files into RechargeCodeInventory.
+
+Operators send batches of 100k+ PINs as CSV or XLSX. The import is a
+pipeline over fixed-size chunks, so memory depends on the chunk size and
+not on the file size:
+
+- `iter_file_codes` stream-parses the file: `csv.reader` over the upload,
+  or an openpyxl *read-only* workbook (rows are read from the zip as they
+  are iterated; the sheet is never loaded whole). It yields the first
+  column of each row.
+- `import_codes` takes `chunk_size` codes at a time, validates them, drops
+  duplicates within the chunk, looks the rest up by `code_hash` (one
+  indexed `IN` query per chunk) and inserts the new cards with one
+  `executemany` in the chunk's own DB transaction. A failure loses at
+  most the current chunk; re-running the same file skips what was
+  already loaded.
+
+Duplicates across chunks are caught by the lookup of the later chunk; the
+unique index on `code_hash` covers concurrent imports of the same file.
+
+Uploads from the admin page run as an InventoryImportJob: `start_import_job`
+keeps the file in INVENTORY_IMPORT_DIR and, after commit, starts
+`run_import_job` in a background thread, which stores the counters after
+every chunk. A job whose process died (stalled) is re-run with
+`manage.py import_recharge_codes --job <id>`; already loaded codes are
+skipped, so re-running is safe. The re-run needs the kept file: on an
+ephemeral filesystem (no persistent disk mounted at INVENTORY_IMPORT_DIR)
+it is gone after a restart or redeploy, the job fails with "file missing"
+and the file has to be uploaded again.
+"""
+
+import csv
+import io
+import logging
+import os
+import threading
+import uuid
+from dataclasses import dataclass
+from itertools import islice
+from typing import Callable, Iterable, Iterator, Optional
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import close_old_connections, connection, transaction as db_transaction
+from django.utils import timezone
+from openpyxl import load_workbook
+
+from apps.core.fields import encrypt_value
+from apps.sales.models import InventoryImportJob, RechargeCodeInventory
+from apps.sales.services.inventory import code_digest
+
+logger = logging.getLogger(__name__)
+
+# Codes per chunk (one lookup + one INSERT + one DB transaction each).
+IMPORT_CHUNK_SIZE = 5000
+
+CSV_EXTENSIONS = (".csv", ".txt")
+XLSX_EXTENSIONS = (".xlsx", ".xlsm")
+
+MAX_CODE_LENGTH = RechargeCodeInventory._meta.get_field("code").max_length
+
+# A first row with one of these in column A is treated as a header.
+HEADER_NAMES = {"code", "codes", "pin", "pins", "voucher", "serial", "كود", "الكود", "الرمز"}
+
+
+class ImportFileError(Exception):
+    """The uploaded file cannot be read as a voucher file."""
+
+
+@dataclass
+class ImportResult:
+    read: int = 0
+    created: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+
+
+# ==========================
+# 📄 File parsing
+# ==========================
+
+def _cell_text(value) -> str:
+    if value is None:
+        return ""
+    # Numeric PINs typed into Excel come back as int/float.
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def _iter_csv_rows(fileobj) -> Iterator:
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    try:
+        sample = text.read(4096)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t|")
+        except csv.Error:
+            dialect = csv.excel
+        text.seek(0)
+        yield from csv.reader(text, dialect)
+    except UnicodeDecodeError:
+        raise ImportFileError("الملف ليس بترميز UTF-8")
+    finally:
+        # Leave the underlying upload open for its owner.
+        text.detach()
+
+
+def _iter_xlsx_rows(fileobj) -> Iterator:
+    try:
+        wb = load_workbook(fileobj, read_only=True, data_only=True)
+    except Exception as exc:
+        raise ImportFileError(f"تعذر قراءة ملف Excel: {exc}")
+    try:
+        yield from wb.active.iter_rows(max_col=1, values_only=True)
+    finally:
+        wb.close()
+
+
+def iter_file_codes(fileobj, filename: str) -> Iterator[str]:
+    """Yield the code (first column) of every row of a CSV/XLSX voucher file."""
+    ext = os.path.splitext(filename or "")[1].lower()
+    if ext in CSV_EXTENSIONS:
+        rows = _iter_csv_rows(fileobj)
+    elif ext in XLSX_EXTENSIONS:
+        rows = _iter_xlsx_rows(fileobj)
+    else:
+        raise ImportFileError("صيغة الملف غير مدعومة (CSV أو XLSX فقط)")
+
+    first = True
+    for row in rows:
+        code = _cell_text(row[0] if row else None)
+        if first:
+            first = False
+            if code.lower() in HEADER_NAMES:
+                continue
+        yield code
+
+
+# ==========================
+# 📥 Import
+# ==========================
+
+def _insert_cards(denomination_id, cards, batch_ref: str) -> None:
+    """INSERT (digest, code) pairs as AVAILABLE cards (code encrypted, see apps.core.fields).
+
+    Plain `executemany` on PostgreSQL/SQLite: building a model instance per
+    row costs more than the INSERT itself at this volume. A concurrent
+    import of the same codes is skipped by ON CONFLICT instead of aborting
+    the chunk.
+    """
+    if not cards:
+        return
+
+    if connection.vendor not in ("postgresql", "sqlite"):
+        RechargeCodeInventory.objects.bulk_create(
+            [
+                RechargeCodeInventory(denomination_id=denomination_id, code=code, code_hash=digest, batch_ref=batch_ref)
+                for digest, code in cards
+            ],
+            ignore_conflicts=True,
+        )
+        return
+
+    meta = RechargeCodeInventory._meta
+    qn = connection.ops.quote_name
+    columns = [
+        qn(meta.get_field(name).column)
+        for name in ("denomination", "code", "code_hash", "status", "batch_ref", "created_at")
+    ]
+    sql = (
+        f"INSERT INTO {qn(meta.db_table)} ({', '.join(columns)}) "
+        f"VALUES ({', '.join(['%s'] * len(columns))}) "
+        f"ON CONFLICT ({qn(meta.get_field('code_hash').column)}) DO NOTHING"
+    )
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    status = RechargeCodeInventory.Status.AVAILABLE
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, [
+            (denomination_id, encrypt_value(code), digest, status, batch_ref, now)
+            for digest, code in cards
+        ])
+
+
+def _import_chunk(denomination_id, chunk, batch_ref: str, result: ImportResult) -> None:
+    result.read += len(chunk)
+
+    by_hash = {}
+    for code in chunk:
+        if not code or len(code) > MAX_CODE_LENGTH:
+            result.invalid += 1
+            continue
+        digest = code_digest(code)
+        if digest in by_hash:
+            result.duplicates += 1
+            continue
+        by_hash[digest] = code
+
+    if not by_hash:
+        return
+
+    with db_transaction.atomic():
+        existing = set(
+            RechargeCodeInventory.objects
+            .filter(code_hash__in=list(by_hash))
+            .values_list("code_hash", flat=True)
+        )
+        new_cards = [(digest, code) for digest, code in by_hash.items() if digest not in existing]
+        _insert_cards(denomination_id, new_cards, batch_ref)
+
+    result.duplicates += len(existing)
+    result.created += len(new_cards)
+
+
+def import_codes(
+    denomination,
+    codes: Iterable[str],
+    *,
+    batch_ref: str = "",
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+    progress: Optional[Callable[[ImportResult], None]] = None,
+) -> ImportResult:
+    """Load `codes` as AVAILABLE cards of `denomination`, skipping duplicates.
+
+    `progress(result)` is called after every committed chunk.
+    """
+    denomination_id = getattr(denomination, "pk", denomination)
+    batch_ref = (batch_ref or "")[:RechargeCodeInventory._meta.get_field("batch_ref").max_length]
+    chunk_size = max(1, int(chunk_size))
+
+    result = ImportResult()
+    codes = iter(codes)
+    while True:
+        chunk = list(islice(codes, chunk_size))
+        if not chunk:
+            break
+        _import_chunk(denomination_id, chunk, batch_ref, result)
+        if progress is not None:
+            progress(result)
+    return result
+
+
+# ==========================
+# 🧵 Background jobs (admin uploads)
+# ==========================
+
+def _upload_storage() -> FileSystemStorage:
+    return FileSystemStorage(location=settings.INVENTORY_IMPORT_DIR)
+
+
+def start_import_job(denomination, upload, *, batch_ref: str = "", user=None) -> InventoryImportJob:
+    """Keep `upload` and import it in a background thread once the current DB transaction commits."""
+    ext = os.path.splitext(upload.name or "")[1].lower()
+    if ext not in CSV_EXTENSIONS + XLSX_EXTENSIONS:
+        raise ImportFileError("صيغة الملف غير مدعومة (CSV أو XLSX فقط)")
+
+    path = _upload_storage().save(f"{uuid.uuid4().hex}{ext}", upload)
+    job = InventoryImportJob.objects.create(
+        denomination=denomination,
+        batch_ref=batch_ref[:InventoryImportJob._meta.get_field("batch_ref").max_length],
+        file_name=(upload.name or path)[:255],
+        file_path=path,
+        created_by=user,
+    )
+    db_transaction.on_commit(lambda: _spawn(job.pk))
+    return job
+
+
+def _spawn(job_id) -> None:
+    threading.Thread(target=_run_in_thread, args=(job_id,), name=f"inventory-import-{job_id}", daemon=True).start()
+
+
+def _run_in_thread(job_id) -> None:
+    try:
+        run_import_job(job_id)
+    except Exception:
+        logger.exception("Inventory import job %s failed", job_id)
+    finally:
+        # The thread's own DB connection.
+        close_old_connections()
+        connection.close()
+
+
+def run_import_job(job_id, *, chunk_size: int = IMPORT_CHUNK_SIZE) -> InventoryImportJob:
+    """Run (or re-run) an import job, storing progress after every chunk."""
+    job = InventoryImportJob.objects.select_related("denomination").get(pk=job_id)
+    if job.status == InventoryImportJob.Status.DONE:
+        return job
+
+    storage = _upload_storage()
+    jobs = InventoryImportJob.objects.filter(pk=job.pk)
+    if not job.file_path or not storage.exists(job.file_path):
+        jobs.update(
+            status=InventoryImportJob.Status.FAILED,
+            error="الملف المرفوع غير موجود، أعد رفعه",
+            finished_at=timezone.now(),
+        )
+        job.refresh_from_db()
+        return job
+
+    jobs.update(
+        status=InventoryImportJob.Status.RUNNING,
+        started_at=timezone.now(),
+        error="",
+        updated_at=timezone.now(),
+    )
+
+    def progress(result: ImportResult) -> None:
+        jobs.update(
+            rows_read=result.read,
+            codes_created=result.created,
+            duplicates=result.duplicates,
+            invalid=result.invalid,
+            updated_at=timezone.now(),
+        )
+
+    done = True
+    try:
+        with storage.open(job.file_path, "rb") as fh:
+            result = import_codes(
+                job.denomination,
+                iter_file_codes(fh, job.file_name),
+                batch_ref=job.batch_ref,
+                chunk_size=chunk_size,
+                progress=progress,
+            )
+    except ImportFileError as exc:
+        jobs.update(status=InventoryImportJob.Status.FAILED, error=str(exc), finished_at=timezone.now())
+    except Exception as exc:
+        # Keep the file: the job can be re-run once the cause is fixed.
+        done = False
+        jobs.update(status=InventoryImportJob.Status.FAILED, error=str(exc)[:1000], finished_at=timezone.now())
+        raise
+    else:
+        progress(result)
+        jobs.update(status=InventoryImportJob.Status.DONE, finished_at=timezone.now())
+    finally:
+        if done and job.file_path:
+            storage.delete(job.file_path)
+            jobs.update(file_path="")
+    job.refresh_from_db()
+    return job
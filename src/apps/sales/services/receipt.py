@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from datetime import timezone as dt_timezone
 from typing import Any, Dict, List, Optional
 
 from django.utils import timezone
@@ -9,80 +9,153 @@ import json
 import hmac
 import hashlib
 
-
-def _fmt_money(amount) -> str:
-    try:
-        return f"{amount:.2f}"
-    except Exception:
-        return str(amount)
-
-
-def build_receipt_payload(tx, *, printer_profile: str = "SUNMI_58", include_code: bool = True) -> Dict[str, Any]:
+from apps.sales.services.receipt_templates import (
+    ReceiptValues,
+    compact_receipt_payload,
+    expand_receipt_payload,
+    get_receipt_template,
+    receipt_values,
+    seal_receipt_payload,
+)
+
+
+# v1: bound to the transaction id (payload can only be built after INSERT).
+# v2: bound to public_token + created_at, both known before INSERT, so receipts
+#     can be signed up front and bulk-inserted. Prints a "Ref" instead of TxnID.
+RECEIPT_PAYLOAD_VERSION = 2
+
+
+def build_receipt_payload(
+    tx,
+    *,
+    printer_profile: str = "SUNMI_58",
+    include_code: bool = True,
+    version: int = 1,
+    values: Optional[ReceiptValues] = None,
+) -> Dict[str, Any]:
     """Build a POS/thermal receipt snapshot payload.
 
     This is stored on the Transaction so Admin can preview exactly what the Agent saw/printed.
-    Keep it deterministic and versioned.
+    Keep it deterministic and versioned. Pass `version=RECEIPT_PAYLOAD_VERSION`
+    to build it before the transaction is saved. The layout comes from the
+    compiled template of `printer_profile` (see receipt_templates); `values`
+    defaults to `receipt_values(tx)`.
     """
-    width = 32 if printer_profile == "SUNMI_58" else 42  # rough defaults (58mm vs 80mm)
-    now = timezone.localtime(tx.created_at) if getattr(tx, "created_at", None) else timezone.localtime()
-
-    company_name = getattr(getattr(tx, "company", None), "name_ar", None) or str(getattr(tx, "company", ""))
-    denom_value = getattr(getattr(tx, "denomination", None), "value", None) or str(getattr(tx, "denomination", ""))
-    agent_username = getattr(getattr(tx, "agent", None), "username", None) or ""
-
-    lines: List[str] = []
-    lines.append("RIADDA POS")
-    lines.append("-" * width)
-    lines.append(f"Company: {company_name}")
-    lines.append(f"Value: {denom_value}")
-    lines.append(f"Price: {_fmt_money(getattr(tx, 'price', ''))}")
-    if include_code:
-        lines.append(f"Code: {getattr(tx, 'code', '')}")
-    lines.append("-" * width)
-    lines.append(f"Agent: {agent_username}")
-    lines.append(f"TxnID: {getattr(tx, 'id', '')}")
-    lines.append(now.strftime("Date: %Y-%m-%d %H:%M:%S"))
-    lines.append("-" * width)
-    lines.append("Thank you")
+    template = get_receipt_template(printer_profile)
+    if values is None:
+        values = receipt_values(tx)
+
+    meta: Dict[str, Any] = {
+        "status": values.status,
+        "public_token": values.public_token,
+    }
+    if version >= 2:
+        meta["ref"] = values.ref
+    else:
+        meta["transaction_id"] = values.transaction_id
 
     return {
-        "version": 1,
+        "version": version,
         "printer_profile": printer_profile,
-        "width": width,
-        "lines": lines,
-        "meta": {
-            "transaction_id": getattr(tx, "id", None),
-            "status": getattr(tx, "status", None),
-            "public_token": str(getattr(tx, "public_token", "")),
-        },
+        "width": template.width,
+        "lines": template.lines(values, include_code=include_code, version=version),
+        "meta": meta,
     }
 
 
+def stored_receipt_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """What to save in Transaction.receipt_payload: the compact form when the layout allows.
+
+    Either way the recharge code is stored encrypted (see receipt_templates).
+    """
+    return compact_receipt_payload(payload) or seal_receipt_payload(payload)
+
+
+def receipt_escpos(payload: Dict[str, Any]) -> bytes:
+    """ESC/POS bytes of a stored receipt payload, laid out for its printer profile."""
+    payload = expand_receipt_payload(payload)
+    template = get_receipt_template(payload.get("printer_profile") or "SUNMI_58")
+    return template.escpos(payload.get("lines") or [])
+
+
 def _canonical_dumps(obj: Any) -> bytes:
     """Canonical JSON bytes (stable ordering) used for HMAC signing."""
     return json.dumps(obj, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
 
 
-def sign_receipt_payload(tx, payload: Dict[str, Any]) -> str:
-    """Return hex HMAC signature for the receipt payload, bound to the transaction."""
-    key = (getattr(settings, "RECEIPT_HMAC_KEY", "") or "").encode("utf-8")
+def _signed_timestamp(value) -> Optional[str]:
+    # Always UTC: values read back from the DB are UTC, while e.g. a POS
+    # `sold_at` parsed by DRF arrives in the current time zone.
+    if value is None:
+        return None
+    if timezone.is_aware(value):
+        value = value.astimezone(dt_timezone.utc)
+    return value.isoformat()
+
+
+def receipt_hmac_key() -> bytes:
+    return (getattr(settings, "RECEIPT_HMAC_KEY", "") or "").encode("utf-8")
+
+
+def receipt_key_id() -> str:
+    """Fingerprint of RECEIPT_HMAC_KEY (stored with verification results)."""
+    return hashlib.sha256(receipt_hmac_key()).hexdigest()[:16]
+
+
+def compute_receipt_hmac(key: bytes, tx_id, public_token, created_at, payload: Dict[str, Any]) -> str:
+    """HMAC of `payload` bound to the transaction identifiers (no model access).
+
+    Always computed over the full payload, whether `payload` is stored compact or not.
+    """
+    payload = expand_receipt_payload(payload)
     # Bind signature to key transaction identifiers to prevent payload reuse across txs.
+    identity = {
+        "public_token": str(public_token),
+        "created_at": _signed_timestamp(created_at),
+    }
+    if (payload or {}).get("version", 1) < 2:
+        identity["id"] = tx_id
     bound = {
-        "tx": {
-            "id": getattr(tx, "id", None),
-            "public_token": str(getattr(tx, "public_token", "")),
-            "created_at": (getattr(tx, "created_at", None).isoformat() if getattr(tx, "created_at", None) else None),
-        },
+        "tx": identity,
         "payload": payload,
     }
     msg = _canonical_dumps(bound)
     return hmac.new(key, msg, hashlib.sha256).hexdigest()
 
 
+def sign_receipt_payload(tx, payload: Dict[str, Any]) -> str:
+    """Return hex HMAC signature for the receipt payload, bound to the transaction."""
+    return compute_receipt_hmac(
+        receipt_hmac_key(),
+        getattr(tx, "id", None),
+        getattr(tx, "public_token", ""),
+        getattr(tx, "created_at", None),
+        payload,
+    )
+
+
 def verify_receipt_payload(tx) -> bool:
     """Verify stored receipt_hmac matches computed signature."""
     if not getattr(tx, "receipt_payload", None) or not getattr(tx, "receipt_hmac", None):
         return False
     computed = sign_receipt_payload(tx, tx.receipt_payload)
     # Use compare_digest to avoid timing attacks
-    return hmac.compare_digest(str(tx.receipt_hmac), computed)
\ No newline at end of file
+    return hmac.compare_digest(str(tx.receipt_hmac), computed)
+
+
+def verify_receipt_rows(key: bytes, rows) -> List[tuple]:
+    """Batch form of verify_receipt_payload for process pools.
+
+    `rows` are (id, public_token, created_at, receipt_payload, receipt_hmac)
+    tuples; returns (id, verified, receipt_hmac) per row. Needs no ORM, so it
+    runs in spawned worker processes (which read FIELD_ENCRYPTION_KEY from
+    the settings module they inherit, to open sealed codes).
+    """
+    results = []
+    for tx_id, public_token, created_at, payload, signature in rows:
+        if not payload or not signature:
+            results.append((tx_id, None, signature))
+            continue
+        computed = compute_receipt_hmac(key, tx_id, public_token, created_at, payload)
+        results.append((tx_id, hmac.compare_digest(str(signature), computed), signature))
+    return results
@@ -0,0 +1,204 @@
+"""Cached receipt pages for the public receipt links.
+
+Customers open, refresh and share `/receipt/<token>/` links many times, and
+every hit used to draw the QR PNG, base64 it and render the whole template.
+Here a rendered page is built once per (public_token, receipt_reissue_count,
+host, template) and kept in Django's cache together with its ETag:
+
+- one cache entry per token ("sales:receipt:<token>") holding the
+  reissue count it was built for and the rendered pages, so evicting a
+  receipt is a single delete;
+- QR PNGs are cached by URL (a URL always encodes to the same image).
+
+A request still reads the receipt's status / expiry / reissue count (one
+indexed row, no template work): an expired or reissued token never serves a
+cached page. Saves of a Transaction evict its entry after commit (see the
+signal receivers in `apps.sales.models`); reissues that replace the token
+also evict the old one. Entries never outlive `receipt_expires_at`.
+
+The recharge code is never cached: pages are rendered with a placeholder in
+its place and the request fills in the code it read (and decrypted) with the
+status row, so the shared cache (e.g. the DatabaseCache table) holds no more
+than the receipt layout. The ETag covers the filled-in page. Responses are
+`Cache-Control: private`.
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction as db_transaction
+from django.http import Http404, HttpResponse, HttpResponseNotModified
+from django.shortcuts import render
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.html import escape
+from django.utils.http import parse_etags
+
+try:
+    import qrcode
+except ImportError:  # pragma: no cover - optional dependency
+    qrcode = None
+
+CUSTOMER = "customer"
+HTML = "html"
+
+# Transaction fields a cached page depends on; saves touching only other fields keep it.
+RENDER_FIELDS = frozenset({
+    "public_token", "status", "code", "receipt_reissue_count",
+    "receipt_expires_at", "confirmed_at", "denomination", "company", "price",
+})
+
+
+# Stands in for the recharge code in cached pages (no HTML-escapable characters).
+CODE_PLACEHOLDER = "@@riadda-receipt-code@@"
+
+
+@dataclass(frozen=True)
+class RenderedReceipt:
+    etag: str
+    body: bytes
+
+    def with_code(self, code) -> "RenderedReceipt":
+        """This page with the placeholder replaced by `code` (escaped)."""
+        placeholder = CODE_PLACEHOLDER.encode("ascii")
+        if placeholder not in self.body:
+            return self
+        body = self.body.replace(placeholder, escape(code or "").encode("utf-8"))
+        return RenderedReceipt(etag=_etag(body), body=body)
+
+
+def _timeout() -> int:
+    return int(getattr(settings, "RECEIPT_RENDER_CACHE_TIMEOUT", 3600))
+
+
+def _max_age() -> int:
+    return int(getattr(settings, "RECEIPT_RENDER_MAX_AGE", 60))
+
+
+def _entry_key(token) -> str:
+    return f"sales:receipt:{token}"
+
+
+def _etag(body: bytes) -> str:
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def _seconds_left(expires_at, default: int) -> int:
+    if not expires_at:
+        return default
+    return max(0, min(default, int((expires_at - timezone.now()).total_seconds())))
+
+
+def qr_png(url: str, *, timeout: Optional[int] = None) -> bytes:
+    """PNG bytes of a QR code for `url` (b"" without the qrcode package)."""
+    if qrcode is None:
+        return b""
+    key = f"sales:receipt_qr:{hashlib.sha256(url.encode('utf-8')).hexdigest()[:32]}"
+    png = cache.get(key)
+    if png is None:
+        buffer = BytesIO()
+        qrcode.make(url).save(buffer, format="PNG")
+        png = buffer.getvalue()
+        cache.set(key, png, timeout=_timeout() if timeout is None else timeout)
+    return png
+
+
+def _customer_context(request, token, timeout: int) -> dict:
+    from apps.sales.models import Transaction
+
+    tx = (
+        Transaction.objects
+        .select_related("denomination__company")
+        .defer("code")
+        .get(public_token=token, status="CONFIRMED")
+    )
+    tx.code = CODE_PLACEHOLDER
+    png = qr_png(request.build_absolute_uri(request.path), timeout=timeout)
+    return {"transaction": tx, "qr_code": base64.b64encode(png).decode()}
+
+
+def _html_context(request, token, timeout: int) -> dict:
+    from apps.sales.models import Transaction
+
+    return {"tx": Transaction.objects.defer("code").get(public_token=token, status="CONFIRMED")}
+
+
+# kind -> (template, context builder, page shows the recharge code)
+_PAGES: Dict[str, tuple] = {
+    CUSTOMER: ("accounts/customer_receipt.html", _customer_context, True),
+    HTML: ("sales/receipt.html", _html_context, False),
+}
+
+
+def _render_page(request, kind: str, token, timeout: int) -> RenderedReceipt:
+    template, build_context, _ = _PAGES[kind]
+    body = render_to_string(template, build_context(request, token, timeout), request=request).encode("utf-8")
+    return RenderedReceipt(etag=_etag(body), body=body)
+
+
+def get_rendered_receipt(request, kind: str, token, reissue_count: int, expires_at=None) -> RenderedReceipt:
+    """Cached page `kind` (CUSTOMER / HTML) of the receipt `token` as seen from this host.
+
+    The page still has CODE_PLACEHOLDER where the code goes (`with_code`).
+    """
+    timeout = _seconds_left(expires_at, _timeout())
+    variant = f"{kind}:{hashlib.sha256(request.build_absolute_uri('/').encode('utf-8')).hexdigest()[:16]}"
+
+    entry = cache.get(_entry_key(token))
+    if entry is not None and entry["count"] == reissue_count:
+        page = entry["pages"].get(variant)
+        if page is not None:
+            return page
+    else:
+        entry = {"count": reissue_count, "pages": {}}
+
+    page = _render_page(request, kind, token, timeout)
+    if timeout > 0:
+        entry["pages"][variant] = page
+        cache.set(_entry_key(token), entry, timeout=timeout)
+    return page
+
+
+def receipt_response(request, token, kind: str, *, check_expiry: bool = True) -> HttpResponse:
+    """Serve a receipt page from the cache: 404 unknown, expired page, 304 or 200 with ETag."""
+    from apps.sales.models import Transaction
+
+    shows_code = _PAGES[kind][2]
+    fields = ("receipt_reissue_count", "receipt_expires_at") + (("code",) if shows_code else ())
+    row = Transaction.objects.filter(public_token=token, status="CONFIRMED").values(*fields).first()
+    if row is None:
+        raise Http404("No Transaction matches the given query.")
+
+    expires_at = row["receipt_expires_at"]
+    if check_expiry and expires_at and timezone.now() > expires_at:
+        return render(request, "errors/receipt_expired.html")
+
+    page = get_rendered_receipt(request, kind, token, row["receipt_reissue_count"], expires_at)
+    if shows_code:
+        page = page.with_code(row["code"])
+
+    if page.etag in parse_etags(request.headers.get("If-None-Match", "")):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(page.body, content_type="text/html; charset=utf-8")
+    response["ETag"] = page.etag
+    patch_cache_control(response, private=True, max_age=_seconds_left(expires_at, _max_age()))
+    return response
+
+
+def evict_receipt(token) -> None:
+    """Drop every cached page of the receipt `token` (call after reissue)."""
+    if token:
+        cache.delete(_entry_key(token))
+
+
+def evict_receipt_on_commit(token) -> None:
+    db_transaction.on_commit(lambda: evict_receipt(token))
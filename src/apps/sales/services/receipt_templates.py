@@ -0,0 +1,331 @@
+"""Compiled receipt layouts per printer profile.
+
+A `ReceiptTemplate` is built once per `printer_profile` and holds everything
+that does not depend on the sale: width, separator, the static header and
+footer lines, and their ESC/POS encodings. Filling one in is a handful of
+string joins over a `ReceiptValues` tuple that `receipt_values(tx)` reads
+from the transaction once.
+
+`ReceiptTemplate.escpos(lines)` turns a stored payload's lines into the
+bytes a thermal printer takes directly (ESC/POS), so the POS does not
+re-layout the text on device.
+
+Rows store the compact form (`compact_receipt_payload`): the per-sale
+texts only, expanded back to the full payload on read. The recharge code in
+a stored payload is encrypted like Transaction.code (apps.core.fields);
+`expand_receipt_payload` decrypts it, so signatures, verification, previews
+and printing keep working on the plaintext receipt.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+from django.utils import timezone
+
+from apps.core.fields import decrypt_value, encrypt_value, is_encrypted
+
+TITLE = "RIADDA POS"
+FOOTER = "Thank you"
+
+# Width used for a profile nobody registered (matches the 80mm layout).
+DEFAULT_WIDTH = 42
+
+# ESC/POS commands
+ESC = b"\x1b"
+GS = b"\x1d"
+INIT = ESC + b"@"
+ALIGN_LEFT = ESC + b"a\x00"
+ALIGN_CENTER = ESC + b"a\x01"
+BOLD_ON = ESC + b"E\x01"
+BOLD_OFF = ESC + b"E\x00"
+FEED = ESC + b"d\x03"
+PARTIAL_CUT = GS + b"V\x42\x00"
+
+
+class ReceiptValues(NamedTuple):
+    """Per-sale values of one receipt, read from the transaction once."""
+
+    company_name: Any
+    denomination_value: Any
+    price: str
+    code: Any
+    agent_username: str
+    ref: str
+    transaction_id: Any
+    local_time: datetime
+    status: Any
+    public_token: str
+
+
+def _fmt_money(amount) -> str:
+    try:
+        return f"{amount:.2f}"
+    except Exception:
+        return str(amount)
+
+
+def receipt_ref(tx) -> str:
+    """Short human-readable reference printed on v2 receipts."""
+    return str(getattr(tx, "public_token", "")).replace("-", "")[:12].upper()
+
+
+def receipt_values(tx, *, shared: Optional[ReceiptValues] = None) -> ReceiptValues:
+    """Values of `tx`'s receipt.
+
+    `shared`: values of another receipt of the same sale (same agent,
+    denomination, price and created_at, e.g. a bulk sell); only the
+    per-card fields are then read from `tx`.
+    """
+    if shared is not None:
+        token = str(tx.public_token)
+        return shared._replace(
+            code=tx.code,
+            ref=token.replace("-", "")[:12].upper(),
+            transaction_id=tx.id,
+            status=tx.status,
+            public_token=token,
+        )
+    company = getattr(tx, "company", "")
+    denomination = getattr(tx, "denomination", "")
+    created_at = getattr(tx, "created_at", None)
+    return ReceiptValues(
+        company_name=getattr(company, "name_ar", None) or str(company),
+        denomination_value=getattr(denomination, "value", None) or str(denomination),
+        price=_fmt_money(getattr(tx, "price", "")),
+        code=getattr(tx, "code", ""),
+        agent_username=getattr(getattr(tx, "agent", None), "username", None) or "",
+        ref=receipt_ref(tx),
+        transaction_id=getattr(tx, "id", None),
+        local_time=timezone.localtime(created_at) if created_at else timezone.localtime(),
+        status=getattr(tx, "status", None),
+        public_token=str(getattr(tx, "public_token", "")),
+    )
+
+
+@dataclass
+class ReceiptTemplate:
+    """Precomputed layout of one printer profile.
+
+    `codepage` (ESC t n) and `encoding` must match the printer model; the
+    default sends UTF-8 with no code page switch. `cut` adds a partial cut
+    for printers with a cutter.
+    """
+
+    profile: str
+    width: int
+    cut: bool = False
+    codepage: Optional[int] = None
+    encoding: str = "utf-8"
+
+    separator: str = field(init=False)
+    _head: tuple = field(init=False, repr=False)
+    _tail: tuple = field(init=False, repr=False)
+    _escpos_start: bytes = field(init=False, repr=False)
+    _escpos_end: bytes = field(init=False, repr=False)
+    _escpos_static: Dict[str, bytes] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.separator = "-" * self.width
+        self._head = (TITLE, self.separator)
+        self._tail = (self.separator, FOOTER)
+
+        start = INIT
+        if self.codepage is not None:
+            start += ESC + b"t" + bytes([self.codepage])
+        self._escpos_start = start
+        self._escpos_end = FEED + (PARTIAL_CUT if self.cut else b"")
+        self._escpos_static = {
+            TITLE: ALIGN_CENTER + BOLD_ON + self._encode(TITLE) + BOLD_OFF + b"\n" + ALIGN_LEFT,
+            FOOTER: ALIGN_CENTER + self._encode(FOOTER) + b"\n" + ALIGN_LEFT,
+            self.separator: self._encode(self.separator) + b"\n",
+        }
+
+    def _encode(self, text: str) -> bytes:
+        return text.encode(self.encoding, errors="replace")
+
+    def lines(self, values: ReceiptValues, *, include_code: bool = True, version: int = 1) -> List[str]:
+        lines = [
+            *self._head,
+            f"Company: {values.company_name}",
+            f"Value: {values.denomination_value}",
+            f"Price: {values.price}",
+        ]
+        if include_code:
+            lines.append(f"Code: {values.code}")
+        lines.append(self.separator)
+        lines.append(f"Agent: {values.agent_username}")
+        lines.append(f"Ref: {values.ref}" if version >= 2 else f"TxnID: {values.transaction_id}")
+        lines.append(values.local_time.strftime("Date: %Y-%m-%d %H:%M:%S"))
+        lines.extend(self._tail)
+        return lines
+
+    def escpos(self, lines: Sequence[str]) -> bytes:
+        """ESC/POS bytes for `lines` (e.g. a stored receipt_payload["lines"])."""
+        static = self._escpos_static
+        parts = [self._escpos_start]
+        for line in lines:
+            encoded = static.get(line)
+            parts.append(encoded if encoded is not None else self._encode(line) + b"\n")
+        parts.append(self._escpos_end)
+        return b"".join(parts)
+
+
+_TEMPLATES: Dict[str, ReceiptTemplate] = {}
+
+
+def register_receipt_template(profile: str, width: int, **options) -> ReceiptTemplate:
+    template = ReceiptTemplate(profile=profile, width=width, **options)
+    _TEMPLATES[profile] = template
+    return template
+
+
+def get_receipt_template(profile: str) -> ReceiptTemplate:
+    template = _TEMPLATES.get(profile)
+    if template is None:
+        template = register_receipt_template(profile, DEFAULT_WIDTH)
+    return template
+
+
+register_receipt_template("SUNMI_58", 32)
+register_receipt_template("SUNMI_80", 42, cut=True)
+
+
+# =====================================================
+# Compact storage
+# =====================================================
+# A stored receipt_payload used to repeat the whole layout (title,
+# separators, labels, footer) on every row. The compact form keeps only the
+# per-sale texts and the layout version; `expand_receipt_payload` rebuilds
+# the identical full payload, which is what is signed, verified, previewed
+# and printed. Full payloads (old rows) are still accepted everywhere.
+#
+#   {"compact": 1, "version": 2, "printer_profile": "SUNMI_58", "width": 32,
+#    "meta": {...}, "f": [company, value, price, enc(code) | null, agent, ref, date]}
+#
+# `width` is stored (not looked up from the registry) so re-registering a
+# profile never changes how existing rows expand.
+#
+# The code is stored encrypted (`seal_receipt_payload`): f[3] in the compact
+# form, the "Code: " line of a full payload kept as is. Rows written before
+# that hold it in plaintext and still expand; `manage.py
+# compact_receipt_payloads` seals them.
+
+COMPACT_LAYOUT_VERSION = 1
+CODE_LABEL = "Code: "
+
+
+def _open_code(code):
+    return decrypt_value(code) if is_encrypted(code) else code
+
+
+def _seal_code(code):
+    return code if code is None or is_encrypted(code) else encrypt_value(code)
+
+
+def _layout_v1(width: int, fields: Sequence, version: int) -> List[str]:
+    separator = "-" * width
+    company, value, price, code, agent, ref, date = fields
+    lines = [TITLE, separator, "Company: " + company, "Value: " + value, "Price: " + price]
+    if code is not None:
+        lines.append(CODE_LABEL + _open_code(code))
+    lines.append(separator)
+    lines.append("Agent: " + agent)
+    lines.append(("Ref: " if version >= 2 else "TxnID: ") + ref)
+    lines.append("Date: " + date)
+    lines.append(separator)
+    lines.append(FOOTER)
+    return lines
+
+
+_COMPACT_LAYOUTS = {
+    1: _layout_v1,
+}
+
+
+def is_compact(payload) -> bool:
+    return isinstance(payload, dict) and "compact" in payload
+
+
+def _map_code_lines(payload, convert):
+    lines = payload.get("lines") if isinstance(payload, dict) else None
+    if not lines:
+        return payload
+    mapped = [
+        CODE_LABEL + convert(line[len(CODE_LABEL):]) if isinstance(line, str) and line.startswith(CODE_LABEL) else line
+        for line in lines
+    ]
+    return payload if mapped == lines else {**payload, "lines": mapped}
+
+
+def seal_receipt_payload(payload):
+    """`payload` (compact or full) with its recharge code encrypted; sealed payloads are returned as is."""
+    if is_compact(payload):
+        code = payload["f"][3]
+        if code is None or is_encrypted(code):
+            return payload
+        fields = list(payload["f"])
+        fields[3] = _seal_code(code)
+        return {**payload, "f": fields}
+    return _map_code_lines(payload, _seal_code)
+
+
+def expand_receipt_payload(payload):
+    """Full plaintext payload (with "lines") of a stored one, compact or full."""
+    if not is_compact(payload):
+        return _map_code_lines(payload, _open_code)
+    layout = _COMPACT_LAYOUTS[payload["compact"]]
+    return {
+        "version": payload["version"],
+        "printer_profile": payload["printer_profile"],
+        "width": payload["width"],
+        "lines": layout(payload["width"], payload["f"], payload["version"]),
+        "meta": payload["meta"],
+    }
+
+
+def _strip(line: str, label: str) -> str:
+    if not line.startswith(label):
+        raise ValueError(label)
+    return line[len(label):]
+
+
+def compact_receipt_payload(payload):
+    """Sealed compact form of a payload, or None if it does not follow a known layout.
+
+    The result always expands back to exactly the plaintext `payload`
+    (checked here), so the receipt HMAC stays verifiable.
+    """
+    if is_compact(payload):
+        return seal_receipt_payload(payload)
+    payload = expand_receipt_payload(payload)
+    try:
+        version, width, lines = payload["version"], payload["width"], payload["lines"]
+        has_code = len(lines) == 12
+        if len(lines) not in (11, 12):
+            return None
+        rest = lines[5 + has_code:]
+        fields = [
+            _strip(lines[2], "Company: "),
+            _strip(lines[3], "Value: "),
+            _strip(lines[4], "Price: "),
+            _seal_code(_strip(lines[5], CODE_LABEL)) if has_code else None,
+            _strip(rest[1], "Agent: "),
+            _strip(rest[2], "Ref: " if version >= 2 else "TxnID: "),
+            _strip(rest[3], "Date: "),
+        ]
+        compact = {
+            "compact": COMPACT_LAYOUT_VERSION,
+            "version": version,
+            "printer_profile": payload["printer_profile"],
+            "width": width,
+            "meta": payload["meta"],
+            "f": fields,
+        }
+        if expand_receipt_payload(compact) != payload:
+            return None
+    except (KeyError, TypeError, ValueError, IndexError):
+        return None
+    return compact
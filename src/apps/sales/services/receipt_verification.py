@@ -0,0 +1,174 @@
+"""Batch receipt integrity checks and stored verification results.
+
+`verify_receipt_payload` re-canonicalizes the whole payload and recomputes
+its HMAC; auditors checking a month of receipts, and every preview, paid
+that per receipt. Here:
+
+- `verify_receipts(qs)` streams (id, public_token, created_at,
+  receipt_payload, receipt_hmac) tuples with `values_list().iterator()`,
+  verifies them in chunks across a process pool (or in-process for
+  `workers <= 1`) and upserts one ReceiptVerification row per receipt;
+- `receipt_verified(tx)` is what previews call: it returns the stored
+  result while it still applies (same receipt_hmac and key) and otherwise
+  verifies the receipt without storing anything (previews are reads);
+- `verify_pending_receipts(qs, limit)` verifies at most `limit` receipts of
+  `qs` that have no result for the current key: the admin API's bounded
+  unit of work, repeated until nothing is left.
+
+Workers are spawned (not forked) so they never share the parent's DB
+connection; they only run `verify_receipt_rows`, which needs no ORM.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, time, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.db.models import Count
+from django.utils import timezone
+
+from apps.sales.models import ReceiptVerification, Transaction
+from apps.sales.services.receipt import receipt_hmac_key, receipt_key_id, verify_receipt_payload, verify_receipt_rows
+
+ROW_FIELDS = ("id", "public_token", "created_at", "receipt__payload", "receipt__hmac")
+
+
+def _chunk_size() -> int:
+    return int(getattr(settings, "RECEIPT_VERIFY_CHUNK_SIZE", 500))
+
+
+def request_limit() -> int:
+    return int(getattr(settings, "RECEIPT_VERIFY_REQUEST_LIMIT", 2000))
+
+
+def default_workers() -> int:
+    return int(getattr(settings, "RECEIPT_VERIFY_WORKERS", 0)) or (os.cpu_count() or 1)
+
+
+def _status(verified: Optional[bool]) -> str:
+    if verified is None:
+        return ReceiptVerification.STATUS_MISSING
+    return ReceiptVerification.STATUS_VALID if verified else ReceiptVerification.STATUS_INVALID
+
+
+def month_bounds(month: str) -> Tuple[datetime, datetime]:
+    """[start, end) of a local YYYY-MM month as aware datetimes; ValueError if malformed."""
+    first = datetime.strptime(month, "%Y-%m").date()
+    following = (first.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return (
+        timezone.make_aware(datetime.combine(first, time.min)),
+        timezone.make_aware(datetime.combine(following, time.min)),
+    )
+
+
+def receipts_between(start: Optional[datetime] = None, end: Optional[datetime] = None):
+    qs = Transaction.objects.all()
+    if start is not None:
+        qs = qs.filter(created_at__gte=start)
+    if end is not None:
+        qs = qs.filter(created_at__lt=end)
+    return qs
+
+
+def _chunks(rows: Iterable[tuple], size: int) -> Iterator[List[tuple]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _store(results: List[tuple], key_id: str, verified_at: datetime) -> Counter:
+    ReceiptVerification.objects.bulk_create(
+        [
+            ReceiptVerification(
+                transaction_id=tx_id,
+                status=_status(verified),
+                receipt_hmac=signature,
+                key_id=key_id,
+                verified_at=verified_at,
+            )
+            for tx_id, verified, signature in results
+        ],
+        update_conflicts=True,
+        unique_fields=["transaction"],
+        update_fields=["status", "receipt_hmac", "key_id", "verified_at"],
+    )
+    return Counter(_status(verified) for _, verified, _ in results)
+
+
+def verify_receipts(qs, *, workers: int = 1, chunk_size: Optional[int] = None) -> Dict[str, int]:
+    """Verify every receipt in `qs` and store the results; returns counts per status."""
+    key, key_id = receipt_hmac_key(), receipt_key_id()
+    size = chunk_size or _chunk_size()
+    verified_at = timezone.now()
+    rows = qs.order_by().values_list(*ROW_FIELDS).iterator(chunk_size=size)
+    totals: Counter = Counter()
+
+    if workers <= 1:
+        for chunk in _chunks(rows, size):
+            totals += _store(verify_receipt_rows(key, chunk), key_id, verified_at)
+        return {status: totals[status] for status, _ in ReceiptVerification.STATUS_CHOICES}
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        # Bounded look-ahead: at most 2 chunks per worker in flight, so memory
+        # stays flat however many receipts `qs` matches.
+        pending = deque()
+        for chunk in _chunks(rows, size):
+            pending.append(pool.submit(verify_receipt_rows, key, chunk))
+            if len(pending) >= workers * 2:
+                totals += _store(pending.popleft().result(), key_id, verified_at)
+        while pending:
+            totals += _store(pending.popleft().result(), key_id, verified_at)
+
+    return {status: totals[status] for status, _ in ReceiptVerification.STATUS_CHOICES}
+
+
+def unverified_receipts(qs):
+    """Receipts of `qs` without a stored result for the current key."""
+    return qs.exclude(receipt_verification__key_id=receipt_key_id())
+
+
+def verify_pending_receipts(qs, limit: int) -> Dict[str, int]:
+    """`verify_receipts` over at most `limit` unverified receipts of `qs` (lowest ids first)."""
+    batch = unverified_receipts(qs).order_by("pk").values("pk")[:limit]
+    return verify_receipts(Transaction.objects.filter(pk__in=batch))
+
+
+def verification_summary(qs) -> Dict[str, int]:
+    """Stored results for the receipts in `qs` (current key only), plus how many are unverified."""
+    counts = dict(
+        ReceiptVerification.objects
+        .filter(transaction__in=qs.order_by().values("pk"), key_id=receipt_key_id())
+        .order_by()
+        .values("status")
+        .annotate(n=Count("pk"))
+        .values_list("status", "n")
+    )
+    summary = {status: counts.get(status, 0) for status, _ in ReceiptVerification.STATUS_CHOICES}
+    summary["UNVERIFIED"] = qs.count() - sum(counts.values())
+    return summary
+
+
+def receipt_verified(tx) -> bool:
+    """`verify_receipt_payload(tx)`, answered from the stored result when it still applies.
+
+    Read-only: a receipt without a usable stored result is verified here
+    and not stored (the batch verifier stores results).
+    """
+    try:
+        stored = tx.receipt_verification
+    except ReceiptVerification.DoesNotExist:
+        stored = None
+
+    if stored is not None and stored.receipt_hmac == tx.receipt_hmac and stored.key_id == receipt_key_id():
+        return stored.status == ReceiptVerification.STATUS_VALID
+    return verify_receipt_payload(tx)
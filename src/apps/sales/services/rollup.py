@@ -0,0 +1,298 @@
+"""Daily sales rollup maintenance and queries.
+
+DailySalesRollup holds one row per (sale date, agent, company, denomination,
+status) with the count, sum(price) and sum(commission) of those sales, so
+reports read a few hundred rows instead of scanning Transaction.
+
+- `record_sales`: called in the same DB transaction as the INSERT of new
+  (PRINTED) sales.
+- `record_confirmation`: called in the same DB transaction as a confirm;
+  moves the sale from the PRINTED row to the CONFIRMED row.
+- `record_admin_change` / `forget_sales`: Django admin adds, edits and
+  deletes of Transaction rows (see TransactionAdmin).
+- `rebuild_rollup`: recomputes a date range from Transaction (used by the
+  `backfill_sales_rollup` command and the initial migration).
+
+Increments are a single multi-row `INSERT ... ON CONFLICT DO UPDATE` on
+PostgreSQL/SQLite; other backends fall back to UPDATE-then-INSERT.
+
+On PostgreSQL every increment holds a shared advisory transaction lock and a
+rebuild holds it exclusively, so a rebuild (delete + recompute) never
+interleaves with in-flight sales: it waits for them to commit, and sales
+arriving meanwhile apply their increment after it. SQLite serializes writers
+already. Other writes to Transaction (shell, raw SQL) are not tracked;
+`backfill_sales_rollup` corrects them.
+"""
+
+from collections import defaultdict
+from datetime import date as date_cls
+from decimal import Decimal
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.db import IntegrityError, connection, transaction as db_transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from apps.sales.models import DailySalesRollup, Transaction
+
+ZERO = Decimal("0")
+
+RollupKey = Tuple[date_cls, int, int, int, str]
+
+# pg_advisory_xact_lock key shared by increments and rebuilds.
+ROLLUP_LOCK_ID = 7_310_412_001
+
+
+def _rollup_date(created_at) -> date_cls:
+    # Same day boundary as `created_at__date` lookups (current TIME_ZONE).
+    return timezone.localdate(created_at)
+
+
+def _key(tx, status: str) -> RollupKey:
+    return (_rollup_date(tx.created_at), tx.agent_id, tx.company_id, tx.denomination_id, status)
+
+
+def _lock_rollup(*, exclusive: bool = False) -> None:
+    if connection.vendor != "postgresql":
+        return
+    function = "pg_advisory_xact_lock" if exclusive else "pg_advisory_xact_lock_shared"
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT {function}(%s)", [ROLLUP_LOCK_ID])
+
+
+def _supports_upsert() -> bool:
+    return connection.vendor in ("postgresql", "sqlite")
+
+
+def _upsert_sql(rows) -> None:
+    meta = DailySalesRollup._meta
+    qn = connection.ops.quote_name
+    table = qn(meta.db_table)
+    key_cols = [qn(meta.get_field(name).column) for name in ("date", "agent", "company", "denomination", "status")]
+    count, price, commission, updated_at = (
+        qn(meta.get_field(name).column) for name in ("tx_count", "total_price", "total_commission", "updated_at")
+    )
+
+    placeholders = ", ".join(["(%s, %s, %s, %s, %s, %s, %s, %s, %s)"] * len(rows))
+    sql = (
+        f"INSERT INTO {table} ({', '.join(key_cols)}, {count}, {price}, {commission}, {updated_at}) "
+        f"VALUES {placeholders} "
+        f"ON CONFLICT ({', '.join(key_cols)}) DO UPDATE SET "
+        f"{count} = {table}.{count} + EXCLUDED.{count}, "
+        f"{price} = {table}.{price} + EXCLUDED.{price}, "
+        f"{commission} = {table}.{commission} + EXCLUDED.{commission}, "
+        f"{updated_at} = EXCLUDED.{updated_at}"
+    )
+
+    ops = connection.ops
+    now = ops.adapt_datetimefield_value(timezone.now())
+    params = []
+    for (day, agent_id, company_id, denomination_id, status), (n, total, comm) in rows:
+        params.extend([
+            ops.adapt_datefield_value(day),
+            agent_id,
+            company_id,
+            denomination_id,
+            status,
+            n,
+            ops.adapt_decimalfield_value(total),
+            ops.adapt_decimalfield_value(comm),
+            now,
+        ])
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def _upsert_fallback(rows) -> None:
+    for (day, agent_id, company_id, denomination_id, status), (n, total, comm) in rows:
+        lookup = dict(date=day, agent_id=agent_id, company_id=company_id, denomination_id=denomination_id, status=status)
+        changes = dict(
+            tx_count=F("tx_count") + n,
+            total_price=F("total_price") + total,
+            total_commission=F("total_commission") + comm,
+            updated_at=timezone.now(),
+        )
+        if DailySalesRollup.objects.filter(**lookup).update(**changes):
+            continue
+        try:
+            with db_transaction.atomic():
+                DailySalesRollup.objects.create(**lookup, tx_count=n, total_price=total, total_commission=comm)
+        except IntegrityError:
+            # Created concurrently: apply as an increment instead.
+            DailySalesRollup.objects.filter(**lookup).update(**changes)
+
+
+def apply_rollup_deltas(deltas: Dict[RollupKey, Tuple[int, Decimal, Decimal]]) -> None:
+    """Add (count, price, commission) deltas to their rollup rows, creating rows as needed."""
+    rows = [(key, value) for key, value in sorted(deltas.items()) if any(value)]
+    if not rows:
+        return
+    _lock_rollup()
+    if _supports_upsert():
+        _upsert_sql(rows)
+    else:
+        _upsert_fallback(rows)
+
+
+def record_sales(transactions: Iterable[Transaction]) -> None:
+    """Count newly inserted sales (in their current status) in the rollup."""
+    deltas = defaultdict(lambda: [0, ZERO, ZERO])
+    for tx in transactions:
+        delta = deltas[_key(tx, tx.status)]
+        delta[0] += 1
+        delta[1] += Decimal(tx.price)
+        delta[2] += Decimal(tx.commission_amount or 0)
+    apply_rollup_deltas({key: tuple(value) for key, value in deltas.items()})
+
+
+def forget_sales(transactions: Iterable[Transaction]) -> None:
+    """Take deleted sales out of the rollup (as they were last saved)."""
+    deltas = defaultdict(lambda: [0, ZERO, ZERO])
+    for tx in transactions:
+        delta = deltas[_key(tx, tx.status)]
+        delta[0] -= 1
+        delta[1] -= Decimal(tx.price)
+        delta[2] -= Decimal(tx.commission_amount or 0)
+    apply_rollup_deltas({key: tuple(value) for key, value in deltas.items()})
+
+
+def record_admin_change(before: Optional[Transaction], after: Transaction) -> None:
+    """Apply an edit of a sale (`before` as stored, None for a new row) to the rollup."""
+    deltas = defaultdict(lambda: [0, ZERO, ZERO])
+    if before is not None:
+        delta = deltas[_key(before, before.status)]
+        delta[0] -= 1
+        delta[1] -= Decimal(before.price)
+        delta[2] -= Decimal(before.commission_amount or 0)
+    delta = deltas[_key(after, after.status)]
+    delta[0] += 1
+    delta[1] += Decimal(after.price)
+    delta[2] += Decimal(after.commission_amount or 0)
+    apply_rollup_deltas({key: tuple(value) for key, value in deltas.items()})
+
+
+def record_confirmation(tx: Transaction, previous_status: str = "PRINTED", previous_commission=ZERO) -> None:
+    """Move a just-confirmed sale from its `previous_status` row to its current status row."""
+    price = Decimal(tx.price)
+    apply_rollup_deltas({
+        _key(tx, previous_status): (-1, -price, -Decimal(previous_commission or 0)),
+        _key(tx, tx.status): (1, price, Decimal(tx.commission_amount or 0)),
+    })
+
+
+def rebuild_rollup(date_from: Optional[date_cls] = None, date_to: Optional[date_cls] = None, *, agent_id=None) -> int:
+    """Recompute rollup rows for [date_from, date_to] (inclusive) from Transaction.
+
+    Returns the number of rollup rows written.
+    """
+    transactions = Transaction.objects.all()
+    rollups = DailySalesRollup.objects.all()
+    if date_from:
+        transactions = transactions.filter(created_at__date__gte=date_from)
+        rollups = rollups.filter(date__gte=date_from)
+    if date_to:
+        transactions = transactions.filter(created_at__date__lte=date_to)
+        rollups = rollups.filter(date__lte=date_to)
+    if agent_id is not None:
+        transactions = transactions.filter(agent_id=agent_id)
+        rollups = rollups.filter(agent_id=agent_id)
+
+    grouped = (
+        transactions
+        .order_by()
+        .annotate(day=TruncDate("created_at"))
+        .values("day", "agent_id", "company_id", "denomination_id", "status")
+        .annotate(
+            tx_count=Count("id"),
+            total_price=Sum("price"),
+            total_commission=Sum("commission_amount"),
+        )
+    )
+
+    written = 0
+    with db_transaction.atomic():
+        # Waits for in-flight increments; the recompute below then sees their sales.
+        _lock_rollup(exclusive=True)
+        rollups.delete()
+        batch = []
+        for row in grouped.iterator(chunk_size=2000):
+            batch.append(DailySalesRollup(
+                date=row["day"],
+                agent_id=row["agent_id"],
+                company_id=row["company_id"],
+                denomination_id=row["denomination_id"],
+                status=row["status"],
+                tx_count=row["tx_count"],
+                total_price=row["total_price"] or ZERO,
+                total_commission=row["total_commission"] or ZERO,
+            ))
+            if len(batch) >= 2000:
+                DailySalesRollup.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        if batch:
+            DailySalesRollup.objects.bulk_create(batch)
+            written += len(batch)
+    return written
+
+
+# ==========================
+# 📊 Report queries
+# ==========================
+
+def rollup_totals(rollups) -> Dict:
+    """{'total_transactions', 'total_sales', 'total_commission'} over a rollup queryset."""
+    totals = rollups.aggregate(
+        total_transactions=Sum("tx_count"),
+        total_sales=Sum("total_price"),
+        total_commission=Sum("total_commission"),
+    )
+    return {
+        "total_transactions": totals["total_transactions"] or 0,
+        "total_sales": totals["total_sales"] or ZERO,
+        "total_commission": totals["total_commission"] or ZERO,
+    }
+
+
+def rollup_by_agent(rollups):
+    """Per-agent totals over a rollup queryset, like `values('agent__username').annotate(...)`."""
+    return (
+        rollups
+        .values("agent__username")
+        .annotate(total_sales=Sum("total_price"), total_transactions=Sum("tx_count"))
+        .order_by("agent__username")
+    )
+
+
+def agent_day_summary(agent, day: date_cls) -> Dict:
+    """Per-status counts and amounts of one agent's sales on `day`."""
+    rows = (
+        DailySalesRollup.objects
+        .filter(agent_id=getattr(agent, "pk", agent), date=day)
+        .values("status")
+        .annotate(count=Sum("tx_count"), amount=Sum("total_price"))
+    )
+    by_status = {row["status"]: row for row in rows}
+    confirmed = by_status.get("CONFIRMED", {})
+    printed = by_status.get("PRINTED", {})
+    return {
+        "total_transactions": (confirmed.get("count") or 0) + (printed.get("count") or 0),
+        "total_amount": (confirmed.get("amount") or ZERO) + (printed.get("amount") or ZERO),
+        "confirmed_amount": confirmed.get("amount") or ZERO,
+        "confirmed_count": confirmed.get("count") or 0,
+        "printed_count": printed.get("count") or 0,
+    }
+
+
+def agent_transaction_count(agent, status: Optional[str] = None, date_from=None, date_to=None) -> int:
+    """Number of `agent`'s sales (optionally one status / local date range) from the rollup."""
+    rollups = DailySalesRollup.objects.filter(agent_id=getattr(agent, "pk", agent))
+    if status:
+        rollups = rollups.filter(status=status)
+    if date_from:
+        rollups = rollups.filter(date__gte=date_from)
+    if date_to:
+        rollups = rollups.filter(date__lte=date_to)
+    return rollups.aggregate(n=Sum("tx_count"))["n"] or 0
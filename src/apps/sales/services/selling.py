@@ -0,0 +1,394 @@
+"""Sell pipeline.
+
+Receipts are built and signed *before* the Transaction is inserted (receipt
+payload v2 is bound to public_token + created_at, not the row id), so a sale
+needs no UPDATE after its INSERTs: one into sales_transaction and one into
+sales_transactionreceipt, which holds the signed snapshot (`sell_bulk`
+bulk-creates both). The balance is debited last with a single conditional
+UPDATE (see `apps.billing.services`), so the agent's balance row is only
+locked between that statement and COMMIT. AuditLog rows go through the
+audit sink (`apps.accounts.services.audit`) and are bulk-inserted after
+commit, outside the locked section.
+
+- `sell_one`: a single card. Card pull, INSERTs, rollup, debit, commit.
+- `sell_bulk`: N cards of one denomination in one DB transaction: all
+  transactions are inserted with a single `bulk_create`, one grouped audit
+  row is queued, and the balance is debited once by the total.
+- `sync_offline_sales`: drains a POS offline queue keyed by `offline_uuid`;
+  retried batches are answered from the dedupe query without any writes.
+"""
+
+from __future__ import annotations
+
+import uuid
+from collections import defaultdict
+from decimal import Decimal
+from itertools import zip_longest
+from typing import Dict, List, NamedTuple, Optional
+
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.utils import timezone
+
+from apps.accounts.models import AuditLog
+from apps.accounts.services.audit import record_audit
+from apps.billing.models import AgentBalance
+from apps.billing.services import BalanceNotFound, InsufficientBalance, debit, debit_transactions
+from apps.sales.models import RechargeDenomination, Transaction, TransactionReceipt
+from apps.sales.services.receipt import (
+    RECEIPT_PAYLOAD_VERSION,
+    build_receipt_payload,
+    sign_receipt_payload,
+    stored_receipt_payload,
+)
+from apps.sales.services.receipt_templates import ReceiptValues, receipt_values
+from apps.sales.services.inventory import (
+    OutOfStock,
+    inventory_required,
+    mark_sold,
+    release_codes,
+    reserve_codes,
+)
+from apps.sales.services.rollup import record_sales
+
+
+def bulk_sell_max_quantity() -> int:
+    return int(getattr(settings, "BULK_SELL_MAX_QUANTITY", 50))
+
+
+class SaleError(Exception):
+    """Business error raised by the selling service; mapped to api_response by views."""
+
+    def __init__(self, code: str, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.status_code = status_code
+
+
+def _debit(agent, debit_fn, *args, **kwargs) -> Decimal:
+    """Debit inside the caller's atomic block; a failure rolls the whole sale back."""
+    try:
+        return debit_fn(agent, *args, **kwargs)
+    except BalanceNotFound as exc:
+        raise SaleError(exc.code, exc.message, 404)
+    except InsufficientBalance as exc:
+        raise SaleError(exc.code, exc.message, 400)
+
+
+def generate_recharge_code(company) -> str:
+    # Placeholder code for denominations without inventory (RECHARGE_INVENTORY_REQUIRED=False).
+    return f"{company.code}-{uuid.uuid4().hex[:12]}"
+
+
+def _take_codes(denomination, quantity: int):
+    """Return (cards, codes) for `quantity` sales; call inside the sale's atomic block."""
+    try:
+        cards = reserve_codes(denomination, quantity)
+    except OutOfStock as exc:
+        if inventory_required():
+            raise SaleError(exc.code, exc.message, 409)
+        return [], [generate_recharge_code(denomination.company) for _ in range(quantity)]
+    return cards, [card.code for card in cards]
+
+
+def prepare_transaction(
+    agent,
+    denomination,
+    *,
+    code: Optional[str] = None,
+    source: str = "WEB",
+    device_id=None,
+    now=None,
+    receipt_shared: Optional[ReceiptValues] = None,
+) -> Transaction:
+    """Return an unsaved Transaction with its receipt payload and HMAC already set.
+
+    `receipt_shared`: receipt values common to a batch (see `receipt_values`).
+    """
+    now = now or timezone.now()
+    tx = Transaction(
+        agent=agent,
+        company=denomination.company,
+        denomination=denomination,
+        price=Decimal(denomination.price_to_agent),
+        code=code or generate_recharge_code(denomination.company),
+        status="PRINTED",
+        commission_amount=Decimal("0"),
+        source=source,
+        device_id=device_id,
+        created_at=now,
+    )
+    payload = build_receipt_payload(
+        tx, version=RECEIPT_PAYLOAD_VERSION, values=receipt_values(tx, shared=receipt_shared)
+    )
+    tx.receipt_payload = stored_receipt_payload(payload)
+    tx.receipt_payload_version = payload["version"]
+    tx.receipt_hmac = sign_receipt_payload(tx, payload)
+    tx.receipt_hmac_created_at = now
+    return tx
+
+
+def _insert_receipts(transactions: List[Transaction]) -> None:
+    """INSERT the TransactionReceipt rows of bulk-created transactions (bulk_create skips save())."""
+    TransactionReceipt.objects.bulk_create([tx.receipt for tx in transactions])
+    for tx in transactions:
+        tx._receipt_dirty = False
+
+
+def sell_one(
+    agent,
+    denomination,
+    *,
+    code: Optional[str] = None,
+    source: str = "WEB",
+    device_id=None,
+    audit_message: Optional[str] = None,
+) -> Transaction:
+    """Sell one card. Raises SaleError (OUT_OF_STOCK / BALANCE_NOT_FOUND / INSUFFICIENT_BALANCE).
+
+    Without an explicit `code` the card is pulled from the inventory.
+    """
+    if audit_message is None:
+        audit_message = f"تم بيع {denomination.company.name_ar} فئة {denomination.value}"
+
+    with db_transaction.atomic():
+        cards = []
+        if code is None:
+            cards, (code,) = _take_codes(denomination, 1)
+
+        tx = prepare_transaction(agent, denomination, code=code, source=source, device_id=device_id)
+        tx.save(force_insert=True)
+        mark_sold(cards, [tx])
+
+        record_audit(
+            actor=agent,
+            action=AuditLog.Action.SELL,
+            transaction_id=tx.id,
+            message=audit_message,
+        )
+        record_sales([tx])
+
+        # Debit last: the balance row is locked from here until COMMIT only.
+        _debit(agent, debit, tx.price, transaction=tx, actor=agent)
+
+    return tx
+
+
+def sell_bulk(agent, denomination, quantity: int, *, source: str = "WEB", device_id=None) -> List[Transaction]:
+    """Sell `quantity` cards of `denomination` to `agent` atomically.
+
+    Raises SaleError (OUT_OF_STOCK / BALANCE_NOT_FOUND / INSUFFICIENT_BALANCE)
+    and rolls everything back if the batch cannot be served or paid for in full.
+    """
+    company = denomination.company
+    price = Decimal(denomination.price_to_agent)
+    total = price * quantity
+
+    now = timezone.now()
+    # Agent / company / denomination / price / time lines are the same on every card.
+    shared = receipt_values(
+        Transaction(agent=agent, company=company, denomination=denomination, price=price, created_at=now)
+    )
+    with db_transaction.atomic():
+        cards, codes = _take_codes(denomination, quantity)
+        transactions = [
+            prepare_transaction(
+                agent, denomination, code=code, source=source, device_id=device_id, now=now,
+                receipt_shared=shared,
+            )
+            for code in codes
+        ]
+        transactions = Transaction.objects.bulk_create(transactions)
+        _insert_receipts(transactions)
+        mark_sold(cards, transactions)
+
+        record_audit(
+            actor=agent,
+            action=AuditLog.Action.SELL,
+            message=(
+                f"بيع جماعي: {quantity} × {company.name_ar} فئة {denomination.value} "
+                f"({denomination.product_type}) | المجموع {total} | "
+                f"العمليات {transactions[0].id}–{transactions[-1].id}"
+            ),
+        )
+        record_sales(transactions)
+
+        _debit(agent, debit_transactions, transactions)
+
+    return transactions
+
+
+# ==========================
+# 📴 POS offline sync
+# ==========================
+
+SYNC_CREATED = "CREATED"
+SYNC_DUPLICATE = "DUPLICATE"
+SYNC_CONFLICT = "CONFLICT"
+SYNC_INVALID_DENOMINATION = "INVALID_DENOMINATION"
+SYNC_INSUFFICIENT_BALANCE = "INSUFFICIENT_BALANCE"
+SYNC_OUT_OF_STOCK = "OUT_OF_STOCK"
+
+
+class _PlannedSale(NamedTuple):
+    offline_uuid: uuid.UUID
+    denomination: RechargeDenomination
+    sold_at: object
+    code: Optional[str]
+
+
+def pos_sync_max_items() -> int:
+    return int(getattr(settings, "POS_SYNC_MAX_ITEMS", 200))
+
+
+def _sync_result(offline_uuid, status: str, tx=None, **extra) -> Dict:
+    result = {"offline_uuid": str(offline_uuid), "status": status}
+    if tx is not None:
+        result.update({
+            "transaction_id": tx["id"] if isinstance(tx, dict) else tx.id,
+            "receipt_token": str(tx["public_token"] if isinstance(tx, dict) else tx.public_token),
+        })
+    result.update(extra)
+    return result
+
+
+def sync_offline_sales(agent, items: List[Dict], *, device_id=None) -> List[Dict]:
+    """Store sales captured offline by a POS; one result per item, in request order.
+
+    `items`: dicts with `offline_uuid`, `denomination_id` and optional
+    `sold_at` / `code`. Already-synced uuids are detected with a single
+    `offline_uuid__in` query, so a retried batch costs no writes. New sales
+    are inserted with `bulk_create(ignore_conflicts=True)`; rows that lose a
+    race with a concurrent retry are recognised by their public_token and
+    not debited twice.
+    """
+    now = timezone.now()
+    agent_id = agent.pk
+
+    # Same uuid twice in one batch: keep the first.
+    unique_items = {}
+    for item in items:
+        unique_items.setdefault(item["offline_uuid"], item)
+
+    existing = {
+        row["offline_uuid"]: row
+        for row in Transaction.objects
+        .filter(offline_uuid__in=list(unique_items))
+        .values("offline_uuid", "id", "agent_id", "public_token")
+    }
+
+    denominations = RechargeDenomination.objects.select_related("company").in_bulk(
+        {item["denomination_id"] for uuid_, item in unique_items.items() if uuid_ not in existing}
+    )
+
+    results: Dict = {}
+    planned = []
+    pending: List[Transaction] = []
+    balance = AgentBalance.objects.filter(agent_id=agent_id).values_list("balance", flat=True).first()
+    available = balance if balance is not None else Decimal("0")
+
+    for offline_uuid, item in unique_items.items():
+        row = existing.get(offline_uuid)
+        if row is not None:
+            status = SYNC_DUPLICATE if row["agent_id"] == agent_id else SYNC_CONFLICT
+            results[offline_uuid] = _sync_result(offline_uuid, status, row if status == SYNC_DUPLICATE else None)
+            continue
+
+        denomination = denominations.get(item["denomination_id"])
+        if denomination is None:
+            results[offline_uuid] = _sync_result(offline_uuid, SYNC_INVALID_DENOMINATION)
+            continue
+
+        price = Decimal(denomination.price_to_agent)
+        if price > available:
+            results[offline_uuid] = _sync_result(offline_uuid, SYNC_INSUFFICIENT_BALANCE)
+            continue
+        available -= price
+
+        planned.append(_PlannedSale(offline_uuid, denomination, min(item.get("sold_at") or now, now), item.get("code") or None))
+
+    if planned:
+        with db_transaction.atomic():
+            # Sales the POS did not print a code for get cards from the inventory.
+            needs_code = defaultdict(list)
+            for plan in planned:
+                if plan.code is None:
+                    needs_code[plan.denomination.id].append(plan)
+
+            cards_by_uuid, codes_by_uuid = {}, {}
+            for group in needs_code.values():
+                try:
+                    cards, codes = _take_codes(group[0].denomination, len(group))
+                except SaleError:
+                    for plan in group:
+                        results[plan.offline_uuid] = _sync_result(plan.offline_uuid, SYNC_OUT_OF_STOCK)
+                    continue
+                for plan, card, code in zip_longest(group, cards, codes):
+                    cards_by_uuid[plan.offline_uuid] = card
+                    codes_by_uuid[plan.offline_uuid] = code
+
+            for plan in planned:
+                code = plan.code or codes_by_uuid.get(plan.offline_uuid)
+                if code is None:
+                    continue
+                tx = prepare_transaction(
+                    agent,
+                    plan.denomination,
+                    code=code,
+                    source="POS",
+                    device_id=device_id,
+                    now=plan.sold_at,
+                )
+                tx.offline_uuid = plan.offline_uuid
+                pending.append(tx)
+
+            Transaction.objects.bulk_create(pending, ignore_conflicts=True)
+
+            # ignore_conflicts doesn't return ids: read them back and keep only our rows.
+            stored = {
+                row["offline_uuid"]: row
+                for row in Transaction.objects
+                .filter(offline_uuid__in=[tx.offline_uuid for tx in pending])
+                .values("offline_uuid", "id", "agent_id", "public_token")
+            }
+            inserted = []
+            for tx in pending:
+                row = stored[tx.offline_uuid]
+                if row["public_token"] == tx.public_token:
+                    tx.id = row["id"]
+                    inserted.append(tx)
+                    results[tx.offline_uuid] = _sync_result(tx.offline_uuid, SYNC_CREATED, tx, code=tx.code)
+                else:
+                    status = SYNC_DUPLICATE if row["agent_id"] == agent_id else SYNC_CONFLICT
+                    results[tx.offline_uuid] = _sync_result(
+                        tx.offline_uuid, status, row if status == SYNC_DUPLICATE else None
+                    )
+
+            _insert_receipts(inserted)
+
+            # Cards of rows that lost a race go back to the pool.
+            sold = [tx for tx in inserted if cards_by_uuid.get(tx.offline_uuid) is not None]
+            mark_sold([cards_by_uuid.pop(tx.offline_uuid) for tx in sold], sold)
+            release_codes([card for card in cards_by_uuid.values() if card is not None])
+
+            if inserted:
+                record_audit(
+                    actor=agent,
+                    action=AuditLog.Action.SELL,
+                    message=(
+                        f"مزامنة POS ({device_id or '-'}): {len(inserted)} عملية | "
+                        f"العمليات {inserted[0].id}–{inserted[-1].id}"
+                    ),
+                )
+                record_sales(inserted)
+                _debit(agent, debit_transactions, inserted)
+
+    ordered, seen = [], set()
+    for item in items:
+        result = results[item["offline_uuid"]]
+        if item["offline_uuid"] in seen and result["status"] == SYNC_CREATED:
+            result = dict(result, status=SYNC_DUPLICATE)
+        seen.add(item["offline_uuid"])
+        ordered.append(result)
+    return ordered
@@ -1,3 +1,179 @@
-from django.test import TestCase
+import json
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.accounts.models import User
+from apps.billing.models import AgentBalance
+from apps.billing.services import credit
+from apps.core.api.idempotency import REPLAYED_HEADER, _Entry
+from apps.sales.models import (
+    ReceiptVerification,
+    RechargeCodeInventory,
+    RechargeDenomination,
+    TelecomCompany,
+    Transaction,
+    TransactionReceipt,
+)
+from apps.sales.services.inventory import code_digest
+from apps.sales.services.receipt import verify_receipt_payload
+from apps.sales.services.receipt_templates import expand_receipt_payload, is_compact, seal_receipt_payload
+from apps.sales.services.receipt_verification import receipt_verified, verify_receipts
+from apps.sales.services.selling import sell_bulk, sell_one
+
+
+class SalesTestData:
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = TelecomCompany.objects.create(code="jawwal", name_ar="جوال")
+        cls.denomination = RechargeDenomination.objects.create(
+            company=cls.company, product_type="MOBILE", value=10, price_to_agent=Decimal("9.50")
+        )
+        RechargeCodeInventory.objects.bulk_create([
+            RechargeCodeInventory(denomination=cls.denomination, code=code, code_hash=code_digest(code))
+            for code in (f"5555-0000-{i:04d}" for i in range(10))
+        ])
+        cls.agent = User.objects.create(username="agent1", role=User.Role.AGENT)
+        credit(cls.agent, "100.00")
+
+    def balance(self) -> Decimal:
+        return AgentBalance.objects.get(agent=self.agent).balance
+
+
+class IdempotentSellTests(SalesTestData, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.agent)
+
+    def _post(self, url, body, key):
+        return self.client.post(url, body, format="json", HTTP_IDEMPOTENCY_KEY=key)
+
+    def _stored_data(self, key):
+        return cache.get(_Entry(self.agent.pk, key, "").result_key)["data"]
+
+    def test_sell_replay_returns_same_sale_once(self):
+        body = {"company_code": "jawwal", "product_type": "MOBILE", "value": 10}
+        first = self._post("/api/sales/sell/", body, "key-1")
+        second = self._post("/api/sales/sell/", body, "key-1")
+
+        self.assertEqual(first.status_code, second.status_code)
+        self.assertLess(first.status_code, 300)
+        self.assertIsNone(first.get(REPLAYED_HEADER))
+        self.assertEqual(second[REPLAYED_HEADER], "true")
+        self.assertEqual(second.json(), first.json())
+
+        sale = first.json()["data"]
+        self.assertTrue(sale["code"].startswith("5555-0000-"))
+        self.assertEqual(Transaction.objects.filter(agent=self.agent).count(), 1)
+        self.assertEqual(self.balance(), Decimal("90.50"))
+
+        # الكود لا يُحفظ في الكاش، يُقرأ من Transaction عند الإعادة
+        self.assertIsNone(self._stored_data("key-1")["data"]["code"])
+
+    def test_bulk_sell_replay(self):
+        body = {"denomination_id": self.denomination.pk, "quantity": 3}
+        first = self._post("/api/sales/sell/bulk/", body, "key-2")
+        second = self._post("/api/sales/sell/bulk/", body, "key-2")
+
+        self.assertEqual(second[REPLAYED_HEADER], "true")
+        self.assertEqual(second.json(), first.json())
+        codes = [item["code"] for item in first.json()["data"]["items"]]
+        self.assertEqual(len(set(codes)), 3)
+        self.assertEqual(Transaction.objects.filter(agent=self.agent).count(), 3)
+        self.assertEqual(self.balance(), Decimal("71.50"))
+        self.assertEqual([item["code"] for item in self._stored_data("key-2")["data"]["items"]], [None] * 3)
+
+    def test_other_body_with_same_key_is_refused(self):
+        self._post("/api/sales/sell/bulk/", {"denomination_id": self.denomination.pk, "quantity": 1}, "key-3")
+        response = self._post("/api/sales/sell/bulk/", {"denomination_id": self.denomination.pk, "quantity": 2}, "key-3")
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Transaction.objects.filter(agent=self.agent).count(), 1)
+
+    def test_replay_is_per_agent(self):
+        other = User.objects.create(username="agent2", role=User.Role.AGENT)
+        credit(other, "100.00")
+        body = {"denomination_id": self.denomination.pk, "quantity": 1}
+        self._post("/api/sales/sell/bulk/", body, "key-4")
+
+        client = APIClient()
+        client.force_authenticate(other)
+        response = client.post("/api/sales/sell/bulk/", body, format="json", HTTP_IDEMPOTENCY_KEY="key-4")
+
+        self.assertIsNone(response.get(REPLAYED_HEADER))
+        self.assertEqual(Transaction.objects.filter(agent=other).count(), 1)
+
+    def test_failed_sale_is_replayed_without_selling(self):
+        AgentBalance.objects.filter(agent=self.agent).update(balance=Decimal("1.00"))
+        body = {"denomination_id": self.denomination.pk, "quantity": 1}
+        first = self._post("/api/sales/sell/bulk/", body, "key-5")
+        credit(self.agent, "100.00")
+        second = self._post("/api/sales/sell/bulk/", body, "key-5")
+
+        self.assertEqual(first.status_code, 400)
+        self.assertEqual(second.status_code, 400)
+        self.assertEqual(second[REPLAYED_HEADER], "true")
+        self.assertFalse(Transaction.objects.filter(agent=self.agent).exists())
+
+
+class ReceiptSignatureTests(SalesTestData, TestCase):
+    def setUp(self):
+        self.tx = sell_one(self.agent, self.denomination)
+
+    def _reload(self):
+        return Transaction.objects.select_related("receipt").get(pk=self.tx.pk)
+
+    def _store_payload(self, payload):
+        TransactionReceipt.objects.filter(pk=self.tx.pk).update(payload=payload)
+
+    def test_new_sale_verifies(self):
+        tx = self._reload()
+        self.assertTrue(is_compact(tx.receipt_payload))
+        self.assertNotIn(self.tx.code, json.dumps(tx.receipt_payload, ensure_ascii=False))
+        self.assertIn(f"Code: {self.tx.code}", expand_receipt_payload(tx.receipt_payload)["lines"])
+        self.assertTrue(verify_receipt_payload(tx))
+
+    def test_full_payload_verifies_like_compact(self):
+        self._store_payload(seal_receipt_payload(expand_receipt_payload(self._reload().receipt_payload)))
+        self.assertTrue(verify_receipt_payload(self._reload()))
+
+    def test_tampered_payload_fails(self):
+        payload = expand_receipt_payload(self._reload().receipt_payload)
+        payload["lines"] = [line.replace("9.50", "0.50") for line in payload["lines"]]
+        self.assertIn("0.50", "\n".join(payload["lines"]))
+        self._store_payload(seal_receipt_payload(payload))
+
+        self.assertFalse(verify_receipt_payload(self._reload()))
+
+    def test_signature_is_bound_to_the_transaction(self):
+        other = sell_one(self.agent, self.denomination)
+        TransactionReceipt.objects.filter(pk=self.tx.pk).update(
+            payload=other.receipt_payload, hmac=other.receipt_hmac
+        )
+        self.assertFalse(verify_receipt_payload(self._reload()))
+
+        Transaction.objects.filter(pk=other.pk).update(created_at=other.created_at + timedelta(seconds=1))
+        self.assertFalse(verify_receipt_payload(Transaction.objects.get(pk=other.pk)))
+
+    def test_other_key_fails(self):
+        with override_settings(RECEIPT_HMAC_KEY="another-key"):
+            self.assertFalse(verify_receipt_payload(self._reload()))
+
+    def test_batch_verifier_stores_results(self):
+        bulk = sell_bulk(self.agent, self.denomination, 3)
+        TransactionReceipt.objects.filter(pk=bulk[0].pk).update(hmac="0" * 64)
+        TransactionReceipt.objects.filter(pk=bulk[1].pk).update(payload=None)
+
+        counts = verify_receipts(Transaction.objects.filter(agent=self.agent), chunk_size=2)
+
+        self.assertEqual(
+            counts,
+            {ReceiptVerification.STATUS_VALID: 2, ReceiptVerification.STATUS_INVALID: 1, ReceiptVerification.STATUS_MISSING: 1},
+        )
+        self.assertEqual(ReceiptVerification.objects.get(pk=bulk[0].pk).status, ReceiptVerification.STATUS_INVALID)
+        self.assertTrue(receipt_verified(self._reload()))
+        self.assertFalse(receipt_verified(Transaction.objects.get(pk=bulk[0].pk)))
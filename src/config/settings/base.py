@@ -59,6 +59,18 @@ if not RECEIPT_HMAC_KEY:
     else:
         raise RuntimeError("DJANGO_RECEIPT_HMAC_KEY environment variable is required in production")
 
+# Key material for encrypted model fields (apps.core.fields, e.g. Transaction.code).
+# Changing it makes already-encrypted values unreadable.
+FIELD_ENCRYPTION_KEY = os.environ.get("DJANGO_FIELD_ENCRYPTION_KEY")
+if not FIELD_ENCRYPTION_KEY:
+    if DEBUG:
+        # Dev default only. Must be stable across restarts: never the generated
+        # per-process SECRET_KEY above, or codes saved before a restart no
+        # longer decrypt.
+        FIELD_ENCRYPTION_KEY = os.environ.get("DJANGO_SECRET_KEY") or "riadda-insecure-dev-field-encryption-key"
+    else:
+        raise RuntimeError("DJANGO_FIELD_ENCRYPTION_KEY environment variable is required in production")
+
 # ---------------------
 # Applications
 # ---------------------
@@ -163,6 +175,102 @@ else:
             }
         }
 
+# ---------------------
+# Cache
+# ---------------------
+# Local memory by default (development only). Production must point
+# DJANGO_CACHE_BACKEND / DJANGO_CACHE_LOCATION at a shared backend (database
+# cache, redis, memcached): Idempotency-Key locks and stored responses, and
+# the version stamps of the catalog / commissions / settings caches, only
+# reach every gunicorn worker through it. With a per-process cache a retried
+# sell landing on another worker is executed (and debited) twice.
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get("DJANGO_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.environ.get("DJANGO_CACHE_LOCATION", "riadda-default"),
+    }
+}
+if not DEBUG and CACHES["default"]["BACKEND"].endswith(("locmem.LocMemCache", "dummy.DummyCache")):
+    raise RuntimeError(
+        "DJANGO_CACHE_BACKEND must be a shared cache backend in production "
+        "(e.g. django.core.cache.backends.db.DatabaseCache)"
+    )
+
+# How long (seconds) a worker reuses a version stamp (apps.core.cache) before
+# reading it from the cache backend again; bounds how late other workers'
+# invalidations are seen. 0 reads the backend on every check.
+VERSION_STAMP_LOCAL_TTL = float(os.environ.get("DJANGO_VERSION_STAMP_LOCAL_TTL", "2"))
+
+# Max age (seconds) of a process-local catalog snapshot before it is re-checked.
+CATALOG_CACHE_TIMEOUT = int(os.environ.get("DJANGO_CATALOG_CACHE_TIMEOUT", "300"))
+
+# Max age (seconds) of the process-local commission matrix (see
+# apps.commissions.services). Edits bump its version stamp; this bounds how
+# long a worker can resolve an old commission when the stamp does not reach it.
+COMMISSION_MATRIX_CACHE_TIMEOUT = int(os.environ.get("DJANGO_COMMISSION_MATRIX_CACHE_TIMEOUT", "60"))
+
+# Max age (seconds) of a cached AdminPermission snapshot (see
+# apps.accounts.services.permissions). Saves refresh it immediately on a
+# shared cache backend; this bounds staleness on per-process caches.
+ADMIN_PERMISSION_CACHE_TIMEOUT = int(os.environ.get("DJANGO_ADMIN_PERMISSION_CACHE_TIMEOUT", "60"))
+
+# Max age (seconds) of a process-local SystemSetting snapshot (see
+# apps.accounts.services.system_settings). Saves bump its version stamp;
+# this bounds staleness on per-process caches.
+SYSTEM_SETTINGS_CACHE_TIMEOUT = int(os.environ.get("DJANGO_SYSTEM_SETTINGS_CACHE_TIMEOUT", "60"))
+
+# Receipt render cache (apps.sales.services.receipt_render): rendered /receipt/<token>/
+# pages (QR included) are kept this long (seconds), never past receipt_expires_at.
+# Browsers may reuse a page for RECEIPT_RENDER_MAX_AGE seconds (then revalidate by ETag).
+RECEIPT_RENDER_CACHE_TIMEOUT = int(os.environ.get("DJANGO_RECEIPT_RENDER_CACHE_TIMEOUT", "3600"))
+RECEIPT_RENDER_MAX_AGE = int(os.environ.get("DJANGO_RECEIPT_RENDER_MAX_AGE", "60"))
+
+# Batch receipt HMAC verification (manage.py verify_receipts): worker processes
+# (0 = CPU count) and receipts per worker task.
+RECEIPT_VERIFY_WORKERS = int(os.environ.get("DJANGO_RECEIPT_VERIFY_WORKERS", "0"))
+RECEIPT_VERIFY_CHUNK_SIZE = int(os.environ.get("DJANGO_RECEIPT_VERIFY_CHUNK_SIZE", "500"))
+# Receipts verified per POST to the admin verification API (the rest: POST again, or the command).
+RECEIPT_VERIFY_REQUEST_LIMIT = int(os.environ.get("DJANGO_RECEIPT_VERIFY_REQUEST_LIMIT", "2000"))
+
+# Audit sink (apps.accounts.services.audit): sell/confirm/reissue AuditLog rows are
+# queued after commit and bulk-inserted by a background thread every
+# AUDIT_BATCH_SIZE rows or AUDIT_FLUSH_INTERVAL_MS. AUDIT_ASYNC=False writes
+# them synchronously in the request's transaction instead. Queued rows are lost
+# if the worker is killed before the next flush; past AUDIT_MAX_QUEUE queued rows
+# the oldest are dropped.
+AUDIT_ASYNC = os.environ.get("DJANGO_AUDIT_ASYNC", "True").lower() in ("1", "true", "yes")
+AUDIT_BATCH_SIZE = int(os.environ.get("DJANGO_AUDIT_BATCH_SIZE", "100"))
+AUDIT_FLUSH_INTERVAL_MS = int(os.environ.get("DJANGO_AUDIT_FLUSH_INTERVAL_MS", "200"))
+AUDIT_MAX_QUEUE = int(os.environ.get("DJANGO_AUDIT_MAX_QUEUE", "10000"))
+
+# Max cards per bulk sell request (sales/sell/bulk/).
+BULK_SELL_MAX_QUANTITY = int(os.environ.get("DJANGO_BULK_SELL_MAX_QUANTITY", "50"))
+
+# True: selling a denomination with no AVAILABLE cards in RechargeCodeInventory
+# fails with OUT_OF_STOCK. False (dev/demo): a placeholder code is generated.
+RECHARGE_INVENTORY_REQUIRED = os.environ.get("DJANGO_RECHARGE_INVENTORY_REQUIRED", "False").lower() in ("1", "true", "yes")
+
+# Key for RechargeCodeInventory.code_hash (duplicate detection on import).
+# Must stay stable once cards are loaded; defaults to RECEIPT_HMAC_KEY.
+RECHARGE_CODE_HASH_KEY = os.environ.get("DJANGO_RECHARGE_CODE_HASH_KEY") or RECEIPT_HMAC_KEY
+
+# Voucher files uploaded on the admin import page wait here (plaintext PINs:
+# never under MEDIA_ROOT) until their background import is done. A running
+# import that writes no progress for INVENTORY_IMPORT_STALE_SECONDS is shown
+# as stalled (resume: manage.py import_recharge_codes --job <id>).
+# The directory must survive restarts for that resume to work: on an
+# ephemeral filesystem (Render without a persistent disk) a redeploy or
+# restart deletes waiting files, and their jobs fail with "file missing"
+# until the file is uploaded again (already loaded codes are skipped).
+INVENTORY_IMPORT_DIR = os.environ.get("DJANGO_INVENTORY_IMPORT_DIR") or str(BASE_DIR / "var" / "inventory_imports")
+INVENTORY_IMPORT_STALE_SECONDS = int(os.environ.get("DJANGO_INVENTORY_IMPORT_STALE_SECONDS", "300"))
+
+# Max offline sales per POS sync request (pos/sales/sync/).
+POS_SYNC_MAX_ITEMS = int(os.environ.get("DJANGO_POS_SYNC_MAX_ITEMS", "200"))
+
+# How long (seconds) a response stored under an Idempotency-Key is replayed.
+IDEMPOTENCY_TTL = int(os.environ.get("DJANGO_IDEMPOTENCY_TTL", str(24 * 60 * 60)))
+
 AUTH_USER_MODEL = "accounts.User"
 
 # ---------------------
@@ -268,6 +376,12 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",
     ),
+    # orjson when installed, same output as DRF's JSONRenderer (apps.core.api.renderers).
+    # prod.py drops the browsable API.
+    "DEFAULT_RENDERER_CLASSES": (
+        "apps.core.api.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_THROTTLE_CLASSES": [
         "rest_framework.throttling.AnonRateThrottle",
@@ -85,6 +85,11 @@ REST_FRAMEWORK["DEFAULT_PERMISSION_CLASSES"] = (
     "rest_framework.permissions.IsAuthenticated",
 )
 
+# JSON only: no browsable API (HTML forms, extra queries) in production
+REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"] = (
+    "apps.core.api.renderers.FastJSONRenderer",
+)
+
 REST_FRAMEWORK["DEFAULT_THROTTLE_CLASSES"] = [
     "rest_framework.throttling.AnonRateThrottle",
     "rest_framework.throttling.UserRateThrottle",